@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import argparse
+import json
+import platform
+import random
+import string
+import sys
+import time
+
+import numpy as np
+
+from kneedeepio.filters.bloom import CountingBloomFilter, SimpleBloomFilter
+from kneedeepio.filters.bloom.utils import false_positive_rate
+
+### GLOBALS ###
+# Filter sizes in bits, number of seeds and key lengths to benchmark, in full and quick mode
+FULL_MATRIX = {
+    "sizes": [1 << 16, 1 << 20, 1 << 24],
+    "seed_counts": [3, 7],
+    "key_lengths": [16, 128],
+}
+QUICK_MATRIX = {
+    "sizes": [1 << 16],
+    "seed_counts": [3, 7],
+    "key_lengths": [16],
+}
+FILTER_CLASSES = {
+    "simple": SimpleBloomFilter,
+    "counting": CountingBloomFilter,
+}
+
+# Filters are loaded to this many bits per item, about a 1% FP rate at the optimal seed count
+BITS_PER_ITEM = 10
+# Items timed one at a time, for throughput and latency percentiles
+SINGLE_OPS = 5000
+# Items per call in the batched measurements
+BATCH_SIZE = 10000
+# Absent keys queried to measure the FP rate
+FP_PROBES = 50000
+# Every measurement is repeated and the best run kept
+REPEATS = 3
+# Fixed so that runs see the same keys
+RANDOM_SEED = 1234
+
+# Whether a larger value of a metric is better, used by the compare mode
+METRIC_HIGHER_IS_BETTER = {
+    "add_ops_per_sec": True,
+    "query_ops_per_sec": True,
+    "remove_ops_per_sec": True,
+    "add_many_ops_per_sec": True,
+    "query_many_ops_per_sec": True,
+    "remove_many_ops_per_sec": True,
+    "add_p50_ns": False,
+    "add_p99_ns": False,
+    "query_p50_ns": False,
+    "query_p99_ns": False,
+    "bytes_per_item": False,
+    "fp_rate_measured": False,
+}
+
+### FUNCTIONS ###
+def make_keys(count: int, length: int, prefix: str) -> list:
+    rng = random.Random("{}-{}-{}".format(RANDOM_SEED, prefix, length))
+    alphabet = string.ascii_letters + string.digits
+    tail = max(0, length - len(prefix))
+    return [prefix + "".join(rng.choices(alphabet, k = tail)) for _ in range(count)]
+
+def time_single(func, keys) -> dict:
+    # Per call latencies in nanoseconds, best of REPEATS by total time
+    best = None
+    for _ in range(REPEATS):
+        latencies = np.empty(len(keys), dtype = np.int64)
+        for index, key in enumerate(keys):
+            start = time.perf_counter_ns()
+            func(key)
+            latencies[index] = time.perf_counter_ns() - start
+        if best is None or latencies.sum() < best.sum():
+            best = latencies
+    return {
+        "ops_per_sec": len(keys) / (best.sum() / 1e9),
+        "p50_ns": float(np.percentile(best, 50)),
+        "p99_ns": float(np.percentile(best, 99)),
+    }
+
+def time_batches(func, keys) -> float:
+    # Items per second through func called on BATCH_SIZE slices of keys, best of REPEATS
+    best = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for index in range(0, len(keys), BATCH_SIZE):
+            func(keys[index:index + BATCH_SIZE])
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(keys) / best
+
+def make_filter(name: str, size: int, seeds: list):
+    if name == "counting":
+        # Hot counters are not what is being measured
+        return CountingBloomFilter(size = size, seeds = seeds, ignore_errors = True)
+    return FILTER_CLASSES[name](size = size, seeds = seeds)
+
+def run_case(name: str, size: int, num_seeds: int, key_length: int) -> dict:
+    seeds = list(range(1, num_seeds + 1))
+    num_items = size // BITS_PER_ITEM
+    items = make_keys(num_items, key_length, "in-")
+    missing = make_keys(FP_PROBES, key_length, "out-")
+    sample = items[:SINGLE_OPS]
+    result = {}
+
+    # Single item operations on a fresh filter
+    bloom = make_filter(name, size, seeds)
+    add = time_single(bloom.add, sample)
+    result["add_ops_per_sec"] = add["ops_per_sec"]
+    result["add_p50_ns"] = add["p50_ns"]
+    result["add_p99_ns"] = add["p99_ns"]
+    query = time_single(bloom.query, sample)
+    result["query_ops_per_sec"] = query["ops_per_sec"]
+    result["query_p50_ns"] = query["p50_ns"]
+    result["query_p99_ns"] = query["p99_ns"]
+    if name == "counting":
+        result["remove_ops_per_sec"] = time_single(bloom.remove, sample)["ops_per_sec"]
+
+    result.update(run_macro(name, size, seeds, items, missing))
+    return result
+
+def run_macro(name: str, size: int, seeds: list, items: list, missing: list) -> dict:
+    # Load a fresh filter to its design capacity with the batched calls, then measure accuracy
+    result = {}
+    best = None
+    for _ in range(REPEATS):
+        bloom = make_filter(name, size, seeds)
+        start = time.perf_counter()
+        for index in range(0, len(items), BATCH_SIZE):
+            bloom.add_many(items[index:index + BATCH_SIZE])
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    result["add_many_ops_per_sec"] = len(items) / best
+    result["query_many_ops_per_sec"] = time_batches(bloom.query_many, missing)
+    if name == "counting":
+        # Removing and re-adding the same items leaves the filter as it was
+        def cycle(keys):
+            bloom.remove_many(keys)
+            bloom.add_many(keys)
+        result["remove_many_ops_per_sec"] = 2 * time_batches(cycle, items)
+    result["bytes_per_item"] = len(bloom.bit_vector) / len(items)
+    result["fp_rate_measured"] = float(bloom.query_many(missing).mean())
+    result["fp_rate_theoretical"] = false_positive_rate(size, len(seeds), len(items))
+    return result
+
+def run_benchmarks(matrix: dict) -> dict:
+    results = {}
+    for name in FILTER_CLASSES:
+        for size in matrix["sizes"]:
+            for num_seeds in matrix["seed_counts"]:
+                for key_length in matrix["key_lengths"]:
+                    case = "{}-m{}-k{}-len{}".format(name, size, num_seeds, key_length)
+                    print("Running {}...".format(case))
+                    results[case] = run_case(name, size, num_seeds, key_length)
+    return results
+
+def print_results(results: dict):
+    template = "  {0:34} {1:>12} {2:>12} {3:>10} {4:>10} {5:>12} {6:>8} {7:>8}"
+    print(template.format("Case", "Add ops/s", "Query ops/s", "Query p50", "Query p99", "Batch add/s",
+                          "FP", "FP theo"))
+    for case, result in results.items():
+        print(template.format(
+            case,
+            "{:.0f}".format(result["add_ops_per_sec"]),
+            "{:.0f}".format(result["query_ops_per_sec"]),
+            "{:.0f}ns".format(result["query_p50_ns"]),
+            "{:.0f}ns".format(result["query_p99_ns"]),
+            "{:.0f}".format(result["add_many_ops_per_sec"]),
+            "{:.4f}".format(result["fp_rate_measured"]),
+            "{:.4f}".format(result["fp_rate_theoretical"])
+        ))
+
+def metric_regression(case: str, metric: str, baseline: dict, current: dict, threshold: float) -> str:
+    # Description of the metric's regression, or None if it didn't get worse by more than threshold or can't be
+    # compared
+    if metric not in current or metric not in baseline or baseline[metric] == 0:
+        return None
+    change = (current[metric] - baseline[metric]) / baseline[metric]
+    change_for_worse = -change if METRIC_HIGHER_IS_BETTER[metric] else change
+    if change_for_worse <= threshold:
+        return None
+    return "{} {}: {:.4g} -> {:.4g} ({:+.1%})".format(case, metric, baseline[metric], current[metric], change)
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> list:
+    # Returns a description of every metric that got worse by more than threshold, relative to baseline
+    regressions = []
+    for case, result in current.items():
+        if case not in baseline:
+            continue
+        for metric in METRIC_HIGHER_IS_BETTER:
+            regression = metric_regression(case, metric, baseline[case], result, threshold)
+            if regression is not None:
+                regressions.append(regression)
+    return regressions
+
+### CLASSES ###
+
+### MAIN ###
+def main():
+    parser = argparse.ArgumentParser(description = "Benchmark the bloom filter implementations")
+    parser.add_argument("--quick", action = "store_true", help = "run a reduced matrix")
+    parser.add_argument("--output", default = "benchmark_results.json", help = "where to write the JSON results")
+    parser.add_argument("--compare", metavar = "BASELINE", help = "JSON results to check for regressions against")
+    parser.add_argument("--threshold", type = float, default = 0.10,
+                        help = "relative change counted as a regression (default 0.10)")
+    args = parser.parse_args()
+
+    print("Running benchmarks...")
+    results = run_benchmarks(QUICK_MATRIX if args.quick else FULL_MATRIX)
+    report = {
+        "metadata": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+
+    print('\nGenerating report...')
+    print_results(results)
+    with open(args.output, "w", encoding = "utf-8") as output_file:
+        json.dump(report, output_file, indent = 2, sort_keys = True)
+    print("\nResults written to {}".format(args.output))
+
+    # Exit with a non-zero code if anything regressed against the baseline
+    if args.compare:
+        with open(args.compare, "r", encoding = "utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare_results(baseline["results"], results, args.threshold)
+        if regressions:
+            print("\nRegressions against {}:".format(args.compare))
+            for regression in regressions:
+                print("  " + regression)
+            sys.exit(1)
+        print("\nNo regressions against {}".format(args.compare))
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
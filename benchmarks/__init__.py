@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+
+### GLOBALS ###
+
+### FUNCTIONS ###
+
+### CLASSES ###
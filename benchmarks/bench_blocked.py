@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+# Accuracy and latency of BlockedBloomFilter against SimpleBloomFilter at the same size
+# and number of seeds.  Run from the project root with: python -m benchmarks.bench_blocked [size_mb]
+
+### IMPORTS ###
+import sys
+import time
+
+from kneedeepio.filters.bloom import BlockedBloomFilter, SimpleBloomFilter
+from kneedeepio.filters.bloom.utils import false_positive_rate, optimal_number_of_hashes
+
+### GLOBALS ###
+DEFAULT_SIZE_MB = 64
+BITS_PER_ITEM = 10
+NUM_QUERIES = 200000
+BATCH_SIZE = 10000
+
+### FUNCTIONS ###
+def time_per_key(func, keys) -> float:
+    # Nanoseconds per key, running func over keys in batches
+    start = time.perf_counter()
+    for index in range(0, len(keys), BATCH_SIZE):
+        func(keys[index:index + BATCH_SIZE])
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+def time_single(func, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+### CLASSES ###
+
+### MAIN ###
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE_MB
+    size = size_mb * 8 * 1024 * 1024
+    num_items = size // BITS_PER_ITEM
+    seeds = list(range(optimal_number_of_hashes(size, num_items)))
+    print("Filter: {} MB, {} items, {} seeds, theoretical FP rate {:.5f}".format(
+        size_mb, num_items, len(seeds), false_positive_rate(size, len(seeds), num_items)))
+
+    items = ["item-{}".format(index) for index in range(num_items)]
+    missing = ["missing-{}".format(index) for index in range(NUM_QUERIES)]
+    present = items[:NUM_QUERIES]
+
+    template = "{0:>8} {1:>10} {2:>14} {3:>14} {4:>14} {5:>10}"
+    print(template.format("Filter", "Add ns", "Query ns", "Batch q ns", "Miss q ns", "FP rate"))
+    for cls in [SimpleBloomFilter, BlockedBloomFilter]:
+        bloom = cls(size = size, seeds = seeds)
+        add_ns = time_per_key(bloom.add_many, items)
+        query_ns = time_single(bloom.query, present[:NUM_QUERIES // 10])
+        batch_ns = time_per_key(bloom.query_many, present)
+        miss_ns = time_per_key(bloom.query_many, missing)
+        fp_rate = bloom.query_many(missing).mean()
+        print(template.format(cls.__name__.replace("BloomFilter", ""), "{:.0f}".format(add_ns),
+                              "{:.0f}".format(query_ns), "{:.0f}".format(batch_ns), "{:.0f}".format(miss_ns),
+                              "{:.5f}".format(fp_rate)))
+
+if __name__ == "__main__":
+    main()
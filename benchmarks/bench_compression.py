@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+# Compression ratio and encode / decode throughput of each encoding of a SimpleBloomFilter at several fill
+# ratios, and the cost of querying the compressed form.  Run from the project root with:
+# python -m benchmarks.bench_compression [size_mb]
+
+### IMPORTS ###
+import math
+import sys
+import time
+
+from kneedeepio.filters.bloom import CompressedBloomFilter, SimpleBloomFilter, compress, decompress
+from kneedeepio.filters.bloom.compression import ENCODING_NAMES, read_compressed
+
+### GLOBALS ###
+DEFAULT_SIZE_MB = 8
+NUM_SEEDS = 7
+FILL_RATIOS = [0.001, 0.01, 0.05, 0.1, 0.2, 0.5]
+NUM_QUERIES = 20000
+
+### FUNCTIONS ###
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def filled_filter(size: int, fill_ratio: float) -> SimpleBloomFilter:
+    # Adds items until about fill_ratio of the bits are set, each item setting NUM_SEEDS bits at first
+    bloom = SimpleBloomFilter(size = size, seeds = list(range(NUM_SEEDS)))
+    num_items = int(-size / NUM_SEEDS * math.log(1 - fill_ratio))
+    bloom.add_many(["item-{}".format(index) for index in range(num_items)])
+    return bloom
+
+### CLASSES ###
+
+### MAIN ###
+def main():
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE_MB
+    size = size_mb * 8 * 1024 * 1024
+    raw_mb = size / 8 / 1024 / 1024
+    print("Filter: {} MB, {} seeds".format(size_mb, NUM_SEEDS))
+
+    template = "{0:>6} {1:>10} {2:>8} {3:>12} {4:>12}"
+    print(template.format("Fill", "Encoding", "Ratio", "Encode MB/s", "Decode MB/s"))
+    for fill_ratio in FILL_RATIOS:
+        bloom = filled_filter(size, fill_ratio)
+        for encoding in list(ENCODING_NAMES) + [None]:
+            buffer, encode_seconds = timed(compress, bloom, encoding = encoding)
+            _, decode_seconds = timed(decompress, buffer)
+            name = ENCODING_NAMES[read_compressed(buffer).encoding]
+            print(template.format("{:.1%}".format(fill_ratio), name if encoding is not None else "best " + name,
+                                  "{:.2f}".format(raw_mb * 1024 * 1024 / len(buffer)),
+                                  "{:.0f}".format(raw_mb / encode_seconds), "{:.0f}".format(raw_mb / decode_seconds)))
+
+    print()
+    template = "{0:>6} {1:>10} {2:>16} {3:>16}"
+    print(template.format("Fill", "Encoding", "Raw query ns", "Compressed ns"))
+    queries = ["query-{}".format(index) for index in range(NUM_QUERIES)]
+    for fill_ratio in [0.01, 0.1]:
+        bloom = filled_filter(size, fill_ratio)
+        _, raw_seconds = timed(bloom.query_many, queries)
+        replica = CompressedBloomFilter(compress(bloom))
+        _, compressed_seconds = timed(replica.query_many, queries)
+        print(template.format("{:.1%}".format(fill_ratio), ENCODING_NAMES[replica.compressed.encoding],
+                              "{:.0f}".format(raw_seconds / NUM_QUERIES * 1e9),
+                              "{:.0f}".format(compressed_seconds / NUM_QUERIES * 1e9)))
+
+if __name__ == "__main__":
+    main()
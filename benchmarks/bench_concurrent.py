@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# Multithreaded throughput of ConcurrentBloomFilter against one global lock, scaling the
+# number of threads.  Run from the project root with: python -m benchmarks.bench_concurrent
+
+### IMPORTS ###
+import threading
+import time
+
+from kneedeepio.filters.bloom import ConcurrentBloomFilter, CountingBloomFilter, SimpleBloomFilter
+
+### GLOBALS ###
+THREAD_COUNTS = [1, 2, 4, 8, 16]
+OPS_PER_THREAD = 20000
+BATCH_SIZE = 1000
+FILTER_SIZE = 1 << 24
+SEEDS = [3, 5, 7, 11, 13]
+
+### FUNCTIONS ###
+def global_lock_ops(bloom):
+    # Baseline: every operation serialized behind one lock
+    lock = threading.Lock()
+    def add(item):
+        with lock:
+            bloom.add(item)
+    def query(item):
+        with lock:
+            return bloom.query(item)
+    def add_many(items):
+        with lock:
+            bloom.add_many(items)
+    return add, query, add_many
+
+def striped_ops(bloom):
+    concurrent = ConcurrentBloomFilter(bloom)
+    return concurrent.add, concurrent.query, concurrent.add_many
+
+def worker(ops, thread_index: int, mode: str):
+    add, query, add_many = ops
+    items = ["t{}-item-{}".format(thread_index, index) for index in range(OPS_PER_THREAD)]
+    if mode == "single":
+        for item in items:
+            add(item)
+            query(item)
+    else:
+        for index in range(0, len(items), BATCH_SIZE):
+            add_many(items[index:index + BATCH_SIZE])
+
+def throughput(make_ops, cls, num_threads: int, mode: str) -> float:
+    # Operations per second across all threads
+    ops = make_ops(cls(size = FILTER_SIZE, seeds = SEEDS))
+    threads = [threading.Thread(target = worker, args = (ops, index, mode)) for index in range(num_threads)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    ops_per_item = 2 if mode == "single" else 1
+    return num_threads * OPS_PER_THREAD * ops_per_item / elapsed
+
+### CLASSES ###
+
+### MAIN ###
+def main():
+    template = "{0:>10} {1:>7} {2:>8} {3:>14} {4:>14}"
+    print(template.format("Filter", "Mode", "Threads", "Global ops/s", "Striped ops/s"))
+    for cls in [SimpleBloomFilter, CountingBloomFilter]:
+        for mode in ["single", "batch"]:
+            for num_threads in THREAD_COUNTS:
+                baseline = throughput(global_lock_ops, cls, num_threads, mode)
+                striped = throughput(striped_ops, cls, num_threads, mode)
+                print(template.format(cls.__name__.replace("BloomFilter", ""), mode, num_threads,
+                                      "{:.0f}".format(baseline), "{:.0f}".format(striped)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# Memory, accuracy and speed of CuckooFilter against CountingBloomFilter sized for the same
+# false positive rate.  Run from the project root with: python -m benchmarks.bench_cuckoo [num_items]
+
+### IMPORTS ###
+import sys
+import time
+
+from kneedeepio.filters.bloom import CountingBloomFilter, CuckooFilter
+from kneedeepio.filters.bloom.utils import optimal_number_of_hashes, optimal_size_of_filter
+
+### GLOBALS ###
+DEFAULT_NUM_ITEMS = 1000000
+NUM_QUERIES = 200000
+NUM_SINGLE = 20000
+BATCH_SIZE = 10000
+
+### FUNCTIONS ###
+def time_per_key(func, keys) -> float:
+    # Nanoseconds per key, running func over keys in batches
+    start = time.perf_counter()
+    for index in range(0, len(keys), BATCH_SIZE):
+        func(keys[index:index + BATCH_SIZE])
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+def time_single(func, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+def measure(bloom, items, missing, probes_per_query: int) -> list:
+    add_many_ns = time_per_key(bloom.add_many, items)
+    query_many_ns = time_per_key(bloom.query_many, missing)
+    query_ns = time_single(bloom.query, missing[:NUM_SINGLE])
+    fp_rate = bloom.query_many(missing).mean()
+    return [
+        "{:.2f}".format(len(bloom.bit_vector) / len(items)),
+        "{:.5f}".format(fp_rate),
+        probes_per_query,
+        "{:.0f}".format(add_many_ns),
+        "{:.0f}".format(query_many_ns),
+        "{:.0f}".format(query_ns),
+    ]
+
+### CLASSES ###
+
+### MAIN ###
+def main():
+    num_items = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_ITEMS
+    items = ["item-{}".format(index) for index in range(num_items)]
+    missing = ["missing-{}".format(index) for index in range(NUM_QUERIES)]
+
+    template = "{0:>10} {1:>11} {2:>9} {3:>9} {4:>8} {5:>8} {6:>8} {7:>8}"
+    print(template.format("Filter", "Fingerprint", "Bytes/key", "FP", "Probes", "Add ns", "Batch ns", "Query ns"))
+    for fingerprint_bits in [8, 16]:
+        cuckoo = CuckooFilter.for_capacity(num_items, fingerprint_bits = fingerprint_bits)
+        row = measure(cuckoo, items, missing, 2)
+        print(template.format("Cuckoo", fingerprint_bits, *row))
+        # Counting filter sized for the FP rate the cuckoo filter reaches when full
+        size = optimal_size_of_filter(cuckoo.false_positive_rate() / 2, num_items)
+        seeds = list(range(optimal_number_of_hashes(size, num_items)))
+        counting = CountingBloomFilter(size = size, seeds = seeds, ignore_errors = True)
+        print(template.format("Counting", "-", *measure(counting, items, missing, len(seeds))))
+
+if __name__ == "__main__":
+    main()
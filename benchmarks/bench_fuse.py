@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+# Size, accuracy, build and query speed of BinaryFuseFilter against a SimpleBloomFilter sized for
+# the same false positive rate, and the time to open a saved filter by mapping it.
+# Run from the project root with: python -m benchmarks.bench_fuse [num_items]
+
+### IMPORTS ###
+import os
+import sys
+import tempfile
+import time
+
+from kneedeepio.filters.bloom import BinaryFuseFilter, SimpleBloomFilter, load
+from kneedeepio.filters.bloom.utils import optimal_number_of_hashes, optimal_size_of_filter
+
+### GLOBALS ###
+DEFAULT_NUM_ITEMS = 1000000
+NUM_QUERIES = 200000
+NUM_SINGLE = 20000
+BATCH_SIZE = 10000
+
+### FUNCTIONS ###
+def time_per_key(func, keys) -> float:
+    # Nanoseconds per key, running func over keys in batches
+    start = time.perf_counter()
+    for index in range(0, len(keys), BATCH_SIZE):
+        func(keys[index:index + BATCH_SIZE])
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+def time_single(func, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        func(key)
+    return (time.perf_counter() - start) / len(keys) * 1e9
+
+def time_load(bloom) -> float:
+    # Milliseconds to open a saved copy of bloom by mapping it
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "filter.kdbf")
+        bloom.save(path)
+        start = time.perf_counter()
+        mapped = load(path)
+        elapsed = time.perf_counter() - start
+        mapped.close()
+    return elapsed * 1000
+
+def build_bloom(items, fp_rate: float):
+    # Bloom filter sized for fp_rate, with the seconds taken to fill it
+    size = optimal_size_of_filter(fp_rate, len(items))
+    seeds = list(range(optimal_number_of_hashes(size, len(items))))
+    start = time.perf_counter()
+    bloom = SimpleBloomFilter(size = size, seeds = seeds)
+    bloom.add_many(items)
+    return bloom, time.perf_counter() - start
+
+### CLASSES ###
+
+### MAIN ###
+def main():
+    num_items = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_ITEMS
+    items = ["item-{}".format(index) for index in range(num_items)]
+    missing = ["missing-{}".format(index) for index in range(NUM_QUERIES)]
+
+    template = "{0:>8} {1:>6} {2:>9} {3:>9} {4:>6} {5:>8} {6:>9} {7:>9} {8:>8}"
+    print(template.format("Filter", "Bits", "Bits/key", "FP", "Probes", "Build s", "Batch ns", "Query ns",
+                          "Load ms"))
+    for fingerprint_bits in [8, 16]:
+        start = time.perf_counter()
+        fuse = BinaryFuseFilter.build(items, fingerprint_bits = fingerprint_bits)
+        build = time.perf_counter() - start
+        bloom, bloom_build = build_bloom(items, fuse.false_positive_rate())
+        for name, dut, probes, seconds in [("Fuse", fuse, 3, build), ("Bloom", bloom, len(bloom.seeds), bloom_build)]:
+            print(template.format(
+                name,
+                fingerprint_bits,
+                "{:.2f}".format(len(dut.bit_vector) * 8 / num_items),
+                "{:.6f}".format(dut.query_many(missing).mean()),
+                probes,
+                "{:.2f}".format(seconds),
+                "{:.0f}".format(time_per_key(dut.query_many, missing)),
+                "{:.0f}".format(time_single(dut.query, missing[:NUM_SINGLE])),
+                "{:.2f}".format(time_load(dut))
+            ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+# Per key cost of the seeded and double hashing strategies.
+# Run from the project root with: python -m benchmarks.bench_hashing
+
+### IMPORTS ###
+import random
+import string
+import time
+
+from kneedeepio.filters.bloom.hashing import HASH_STRATEGIES, hash_indices, hash_indices_many
+
+### GLOBALS ###
+NUM_KEYS = 20000
+KEY_LENGTHS = [16, 128, 1024]
+HASH_COUNTS = [3, 7, 14]
+FILTER_SIZE = 1 << 24
+REPEATS = 5
+
+### FUNCTIONS ###
+def make_keys(length: int, count: int = NUM_KEYS):
+    rng = random.Random(length)
+    alphabet = string.ascii_letters + string.digits
+    return ["".join(rng.choices(alphabet, k = length)) for _ in range(count)]
+
+def best_time(func, *args) -> float:
+    # Best of several runs, in seconds
+    results = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(*args)
+        results.append(time.perf_counter() - start)
+    return min(results)
+
+def run_single(keys, seeds, strategy):
+    for key in keys:
+        hash_indices(key, FILTER_SIZE, seeds, strategy)
+
+def run_batch(keys, seeds, strategy):
+    hash_indices_many(keys, FILTER_SIZE, seeds, strategy)
+
+### CLASSES ###
+
+### MAIN ###
+def main():
+    template = "{0:>8} {1:>4} {2:>8} {3:>12} {4:>12}"
+    print(template.format("Key len", "k", "Strategy", "Single ns", "Batch ns"))
+    for length in KEY_LENGTHS:
+        keys = make_keys(length)
+        for num_hashes in HASH_COUNTS:
+            seeds = list(range(1, num_hashes + 1))
+            for strategy in HASH_STRATEGIES:
+                single = best_time(run_single, keys, seeds, strategy) / len(keys) * 1e9
+                batch = best_time(run_batch, keys, seeds, strategy) / len(keys) * 1e9
+                print(template.format(length, num_hashes, strategy, "{:.0f}".format(single), "{:.0f}".format(batch)))
+
+if __name__ == "__main__":
+    main()
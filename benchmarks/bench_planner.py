@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+# Every configuration the planner measures for a capacity and false positive rate, and the plans it picks for
+# speed, for memory and for removable filters, with the time planning took.  Run from the project root with:
+# python -m benchmarks.bench_planner [capacity] [fp_rate]
+
+### IMPORTS ###
+import sys
+import time
+
+from kneedeepio.filters.bloom import plan_filter
+from kneedeepio.filters.bloom.planner import OBJECTIVE_MEMORY, OBJECTIVE_SPEED, evaluate
+
+### GLOBALS ###
+DEFAULT_CAPACITY = 1000000
+DEFAULT_FP_RATE = 0.01
+
+### FUNCTIONS ###
+def describe_kwargs(kwargs: dict) -> str:
+    # Seeds are always 0 .. n - 1, so only their number is shown
+    return " ".join("{}={}".format(key, len(value) if key == "seeds" else value) for key, value in kwargs.items())
+
+### CLASSES ###
+
+### MAIN ###
+def main():
+    capacity = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CAPACITY
+    fp_rate = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_FP_RATE
+    print("Capacity: {}, target false positive rate: {}".format(capacity, fp_rate))
+
+    template = "{0:>20} {1:>52} {2:>10} {3:>10} {4:>8} {5:>10} {6:>10}"
+    print(template.format("Filter", "Configuration", "KB", "FP", "Add ns", "Query ns", "Batch ns"))
+    start = time.perf_counter()
+    plans = evaluate(capacity, fp_rate, filter_types = ["simple", "blocked", "counting", "cuckoo"])
+    print("Measured {} configurations in {:.2f} s".format(len(plans), time.perf_counter() - start))
+    for plan in plans:
+        print(template.format(plan.filter_class.__name__, describe_kwargs(plan.kwargs),
+                              "{:.0f}".format(plan.memory_bytes / 1024), "{:.2e}".format(plan.measured_fp_rate),
+                              "{:.0f}".format(plan.add_ns), "{:.0f}".format(plan.query_ns),
+                              "{:.0f}".format(plan.batch_query_ns)))
+
+    print()
+    for label, kwargs in [("Speed", {"objective": OBJECTIVE_SPEED}), ("Memory", {"objective": OBJECTIVE_MEMORY}),
+                          ("Removable", {"removable": True})]:
+        plan = plan_filter(capacity, fp_rate, **kwargs)
+        print("{:>10}: {}".format(label, plan.describe()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+# Load generator for the filter server, run against a server process started here on a Unix
+# socket and on localhost TCP.  Reports items per second and per request latency as the number
+# of pipelined requests in flight grows.  Run from the project root with:
+# python -m benchmarks.bench_server
+
+### IMPORTS ###
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from kneedeepio.filters.bloom import FilterClient
+
+### GLOBALS ###
+IN_FLIGHT = [1, 4, 16, 64]
+BATCH_SIZES = [1, 100, 1000]
+ITEMS_PER_RUN = 100000
+POOL_SIZE = 4
+FILTER_SIZE = 1 << 24
+SEEDS = [3, 5, 7, 11, 13]
+TCP_PORT = 7879
+
+### FUNCTIONS ###
+async def wait_for_server(address, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            async with FilterClient(address, pool_size = 1) as client:
+                await client.list()
+            return
+        except (ConnectionError, FileNotFoundError):
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+async def run_load(client: FilterClient, operation: str, batch_size: int, in_flight: int) -> dict:
+    # in_flight tasks each send their share of the batches one after the other
+    num_batches = max(1, ITEMS_PER_RUN // batch_size) if batch_size > 1 else ITEMS_PER_RUN // 20
+    batches = [["{}-{}-{}".format(operation, batch, index) for index in range(batch_size)]
+               for batch in range(num_batches)]
+    method = client.add_many if operation == "add" else client.query_many
+    latencies = []
+    async def worker(share):
+        for batch in share:
+            start = time.perf_counter_ns()
+            await method("bench", batch)
+            latencies.append(time.perf_counter_ns() - start)
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(batches[index::in_flight]) for index in range(in_flight)])
+    elapsed = time.perf_counter() - start
+    return {
+        "items_per_sec": num_batches * batch_size / elapsed,
+        "p50_us": np.percentile(latencies, 50) / 1000,
+        "p99_us": np.percentile(latencies, 99) / 1000,
+    }
+
+async def bench_address(label: str, address):
+    await wait_for_server(address)
+    template = "{0:>5} {1:>6} {2:>6} {3:>9} {4:>14} {5:>10} {6:>10}"
+    async with FilterClient(address, pool_size = POOL_SIZE) as client:
+        await client.create("bench", size = FILTER_SIZE, seeds = SEEDS)
+        for operation in ["add", "query"]:
+            for batch_size in BATCH_SIZES:
+                for in_flight in IN_FLIGHT:
+                    result = await run_load(client, operation, batch_size, in_flight)
+                    print(template.format(label, operation, batch_size, in_flight,
+                                          "{:.0f}".format(result["items_per_sec"]),
+                                          "{:.0f}us".format(result["p50_us"]),
+                                          "{:.0f}us".format(result["p99_us"])))
+        await client.drop("bench")
+
+### CLASSES ###
+
+### MAIN ###
+def main():
+    template = "{0:>5} {1:>6} {2:>6} {3:>9} {4:>14} {5:>10} {6:>10}"
+    print(template.format("Link", "Op", "Batch", "In flight", "Items/s", "p50", "p99"))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bloom.sock")
+        command = [sys.executable, "-m", "kneedeepio.filters.bloom.server", "--log-level", "WARNING"]
+        for label, arguments, address in [("unix", ["--unix", path], path),
+                                          ("tcp", ["--port", str(TCP_PORT)], ("127.0.0.1", TCP_PORT))]:
+            with subprocess.Popen(command + arguments) as server:
+                try:
+                    asyncio.run(bench_address(label, address))
+                finally:
+                    server.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# Memory, setup time and batched add / query latency of a FilterStore against one SimpleBloomFilter per
+# tenant.  Run from the project root with: python -m benchmarks.bench_store [num_tenants]
+
+### IMPORTS ###
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from kneedeepio.filters.bloom import FilterStore, SimpleBloomFilter
+
+### GLOBALS ###
+DEFAULT_NUM_TENANTS = 50000
+FILTER_SIZE = 1024
+SEEDS = [3, 5, 7]
+NUM_ITEMS = 200000
+
+### FUNCTIONS ###
+def measured(func):
+    # Result, seconds and bytes allocated by func
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, seconds, allocated
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+### CLASSES ###
+
+### MAIN ###
+def main():
+    num_tenants = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_TENANTS
+    print("Tenants: {}, {} bits each, {} seeds".format(num_tenants, FILTER_SIZE, len(SEEDS)))
+    tenants = np.random.default_rng(0).integers(0, num_tenants, NUM_ITEMS)
+    items = ["item-{}".format(index) for index in range(NUM_ITEMS)]
+
+    filters, filters_seconds, filters_bytes = measured(
+        lambda: [SimpleBloomFilter(size = FILTER_SIZE, seeds = SEEDS) for _ in range(num_tenants)])
+    store, store_seconds, store_bytes = measured(
+        lambda: FilterStore(num_filters = num_tenants, size = FILTER_SIZE, seeds = SEEDS))
+
+    def add_each():
+        for tenant, item in zip(tenants.tolist(), items):
+            filters[tenant].add(item)
+    filters_add = timed(add_each)[1]
+    store_add = timed(lambda: store.add_many(tenants, items))[1]
+    found, store_query = timed(lambda: store.query_many(tenants, items))
+    assert found.all()
+
+    template = "{0:>10} {1:>12} {2:>12} {3:>12} {4:>12}"
+    print(template.format("", "Setup ms", "Memory MB", "Add ns", "Query ns"))
+    print(template.format("Filters", "{:.0f}".format(filters_seconds * 1e3), "{:.1f}".format(filters_bytes / 1e6),
+                          "{:.0f}".format(filters_add / NUM_ITEMS * 1e9), "-"))
+    print(template.format("Store", "{:.2f}".format(store_seconds * 1e3), "{:.1f}".format(store_bytes / 1e6),
+                          "{:.0f}".format(store_add / NUM_ITEMS * 1e9),
+                          "{:.0f}".format(store_query / NUM_ITEMS * 1e9)))
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,29 @@
 #!/usr/bin/env python3
 
 ### IMPORTS ###
-from .simple import SimpleBloomFilter
+from .simple import SimpleBloomFilter, estimate_intersection_size, estimate_union_size
 from .counting import CountingBloomFilter
-from .exceptions import TooFewCountsException, TooManyCountsException
+from .heavy_hitters import HeavyHitters
+from .scalable import ScalableBloomFilter
+from .windowed import RotatingBloomFilter
+from .blocked import BlockedBloomFilter
+from .cuckoo import CuckooFilter
+from .fuse import BinaryFuseFilter
+from .store import FilterHandle, FilterStore
+from .concurrent import ConcurrentBloomFilter
+from .parallel import parallel_build
+from .metrics import FilterMetrics
+from .client import FilterClient
+from .partitioned import LocalShard, PartitionedFilter, RemoteShard, Shard
+from .exceptions import BloomFilterException, FilterFullException, IncompatibleFiltersException, SerializationException
+from .exceptions import MissingDeltaException, ProtocolException, RemoteException, TooFewCountsException
+from .exceptions import TooManyCountsException
+from .hashing import HASH_STRATEGY_DOUBLE, HASH_STRATEGY_SEEDED, Probe, compute_indices, encode_key, struct_key_encoder
+from .probing import query_matrix
+from .planner import FilterPlan, plan_filter
+from .serialization import from_buffer, load, read_from, save
+from .replication import FULL_DELTA
+from .compression import CompressedBloomFilter, compress, decompress
 
 ### GLOBALS ###
 
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+# Command line tools for building and inspecting saved filters.  Run with:
+#   python -m kneedeepio.filters.bloom build keys.txt.gz -o keys.kdbf --fp-rate 0.001
+#   python -m kneedeepio.filters.bloom query keys.kdbf some-key other-key
+#   python -m kneedeepio.filters.bloom query --tenant 12 tenants.kdbf some-key
+#   python -m kneedeepio.filters.bloom info keys.kdbf
+
+### IMPORTS ###
+import argparse
+import logging
+import sys
+import time
+import numpy as np
+
+from .blocked import BlockedBloomFilter
+from .cuckoo import CuckooFilter
+from .fuse import BinaryFuseFilter
+from .ingest import DEFAULT_CHUNK_SIZE, FILTER_TYPES, build_filter, estimate_line_count, iter_items, iter_lines
+from .ingest import PARALLEL_TYPES, open_input
+from .metrics import InstrumentedFilter
+from .serialization import load
+from .storage import popcount, vector_array
+from .store import FilterStore
+from .utils import estimate_num_items
+
+### GLOBALS ###
+# Seconds between progress reports while building
+PROGRESS_INTERVAL = 5.0
+
+### FUNCTIONS ###
+def parse_column(value: str):
+    # Column index if numeric, otherwise a header name
+    return int(value) if value.isdigit() else value
+
+def progress_reporter(num_items: int):
+    last_report = [0.0]
+    def report(added: int, elapsed: float):
+        if elapsed - last_report[0] >= PROGRESS_INTERVAL:
+            last_report[0] = elapsed
+            expected = " of ~{}".format(num_items) if num_items else ""
+            print("  {}{} items, {:.0f} items/s".format(added, expected, added / elapsed), file = sys.stderr)
+    return report
+
+def command_build(args: argparse.Namespace) -> int:
+    if args.workers > 1 and args.type not in PARALLEL_TYPES:
+        print("--workers needs a --type of {}".format(" or ".join(PARALLEL_TYPES)), file = sys.stderr)
+        return 2
+    num_items = args.count
+    if num_items is None and args.type != "fuse":
+        if "-" in args.inputs:
+            print("--count is required when reading standard input", file = sys.stderr)
+            return 2
+        start = time.perf_counter()
+        num_items = sum(estimate_line_count(path) for path in args.inputs)
+        print("Estimated {} items in {:.2f}s".format(num_items, time.perf_counter() - start), file = sys.stderr)
+    items = iter_items(args.inputs, column = args.column, delimiter = args.delimiter, has_header = not args.no_header)
+    bloom, report = build_filter(items, filter_type = args.type, fp_rate = args.fp_rate, num_items = num_items,
+                                 chunk_size = args.chunk_size, workers = args.workers,
+                                 progress = None if args.quiet else progress_reporter(num_items))
+    bloom.save(args.output)
+    print("Added {} items in {:.2f}s ({:.0f} items/s), {} bytes written to {}".format(
+        report.items, report.seconds, report.items_per_second, len(bloom.bit_vector), args.output))
+    return 0
+
+def describe_filter(bloom) -> dict:
+    # Details of each type of filter load can give, raising ValueError for any other
+    if isinstance(bloom, InstrumentedFilter):
+        return bloom.stats()
+    if isinstance(bloom, BlockedBloomFilter):
+        slots_set = popcount(vector_array(bloom.bit_vector))
+        return {"size": bloom.size, "num_hashes": len(bloom.seeds), "slots_set": slots_set,
+                "fill_ratio": slots_set / bloom.size,
+                "estimated_items": estimate_num_items(bloom.size, len(bloom.seeds), slots_set)}
+    if isinstance(bloom, (CuckooFilter, BinaryFuseFilter)):
+        return {"size": bloom.size, "fingerprint_bits": bloom.fingerprint_bits, "items": len(bloom),
+                "fp_rate": bloom.false_positive_rate()}
+    if isinstance(bloom, FilterStore):
+        popcounts = bloom.popcounts()
+        return {"filters": bloom.num_filters, "size": bloom.size, "num_hashes": len(bloom.seeds),
+                "empty_filters": int(np.count_nonzero(popcounts == 0)), "slots_set": int(popcounts.sum())}
+    raise ValueError("Unsupported filter type {}".format(type(bloom).__name__))
+
+def command_query(args: argparse.Namespace) -> int:
+    # Exits 1 if any item is absent
+    with load(args.filter) as bloom:
+        if isinstance(bloom, FilterStore) != (args.tenant is not None):
+            print("--tenant is needed for a FilterStore and only for one", file = sys.stderr)
+            return 2
+        if args.file:
+            with open_input(args.file) as fileobj:
+                items = list(iter_lines(fileobj))
+        else:
+            items = args.items
+        if not items:
+            results = []
+        elif isinstance(bloom, FilterStore):
+            if not 0 <= args.tenant < bloom.num_filters:
+                print("Tenant {} out of range for {} filters".format(args.tenant, bloom.num_filters), file = sys.stderr)
+                return 2
+            results = bloom.query_many(np.full(len(items), args.tenant), items)
+        else:
+            results = bloom.query_many(items)
+        for item, result in zip(items, results):
+            print("{}\t{}".format(item, "present" if result else "absent"))
+        return 0 if all(results) else 1
+
+def command_info(args: argparse.Namespace) -> int:
+    with load(args.filter) as bloom:
+        try:
+            details = describe_filter(bloom)
+        except ValueError as error:
+            print(error, file = sys.stderr)
+            return 2
+        print("type: {}".format(type(bloom).__name__))
+        print("bytes: {}".format(len(bloom.bit_vector)))
+        for key, value in details.items():
+            print("{}: {}".format(key, value))
+    return 0
+
+### CLASSES ###
+
+### MAIN ###
+def main(argv = None) -> int:
+    parser = argparse.ArgumentParser(prog = "python -m kneedeepio.filters.bloom",
+                                     description = "Build and inspect saved filters")
+    parser.add_argument("--log-level", default = "WARNING")
+    subparsers = parser.add_subparsers(dest = "command", required = True)
+
+    build = subparsers.add_parser("build", help = "build a filter from newline delimited or CSV files")
+    build.add_argument("inputs", nargs = "+", help = "input files, .gz, .bz2 and .xz are decompressed, - is stdin")
+    build.add_argument("-o", "--output", required = True, help = "where to save the filter")
+    build.add_argument("--type", choices = FILTER_TYPES, default = "simple")
+    build.add_argument("--fp-rate", type = float, default = 0.01, help = "target false positive rate")
+    build.add_argument("--count", type = int, help = "expected number of items, estimated from the files if absent")
+    build.add_argument("--column", type = parse_column, help = "read this CSV column, by index or header name")
+    build.add_argument("--delimiter", default = ",")
+    build.add_argument("--no-header", action = "store_true", help = "the CSV files have no header row")
+    build.add_argument("--chunk-size", type = int, default = DEFAULT_CHUNK_SIZE)
+    build.add_argument("--workers", type = int, default = 1,
+                       help = "worker processes, {} only".format(" and ".join(PARALLEL_TYPES)))
+    build.add_argument("--quiet", action = "store_true", help = "don't report progress")
+    build.set_defaults(handler = command_build)
+
+    query = subparsers.add_parser("query", help = "check items against a saved filter")
+    query.add_argument("filter")
+    query.add_argument("items", nargs = "*")
+    query.add_argument("--file", help = "read the items from a file, one per line")
+    query.add_argument("--tenant", type = int, help = "the filter to check in a FilterStore")
+    query.set_defaults(handler = command_query)
+
+    info = subparsers.add_parser("info", help = "describe a saved filter")
+    info.add_argument("filter")
+    info.set_defaults(handler = command_info)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level = args.log_level.upper())
+    return args.handler(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import numpy as np
+import xxhash
+
+from typing import Iterable, List, Tuple, Union
+
+from .hashing import HASH_STRATEGY_DOUBLE, MASK_64, Key, KeyEncoder, digest_128_many, encode_key
+from .serialization import FILTER_TYPE_BLOCKED, FilterHeader, SerializableFilter, register_filter_type
+from .storage import allocate_vector, check_vector, vector_array
+
+### GLOBALS ###
+# One block is one 64 byte cache line
+BLOCK_BYTES = 64
+BLOCK_BITS = BLOCK_BYTES * 8
+
+MASK_32 = (1 << 32) - 1
+
+### FUNCTIONS ###
+
+### CLASSES ###
+@register_filter_type(FILTER_TYPE_BLOCKED)
+class BlockedBloomFilter(SerializableFilter):
+    """
+    This is a cache line blocked bloom filter based on the paper "Cache-, Hash- and Space-Efficient Bloom Filters"
+    by Putze et al.  The low half of one xxh3_128 digest, seeded with the first seed, picks a 64 byte block and the
+    high half places one bit per seed inside that block by double hashing, so every operation touches a single
+    cache line.  The size is rounded up to a whole number of blocks.
+    """
+    def __init__(self, size: int = 4096, seeds: List[int] = None, bit_vector: Union[bytearray, memoryview] = None,
+                 key_encoder: KeyEncoder = None):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        self.seeds: List[int] = seeds if seeds is not None else [3, 5, 7]
+        self.num_blocks: int = max(1, (size + BLOCK_BITS - 1) // BLOCK_BITS)
+        self.size: int = self.num_blocks * BLOCK_BITS
+        # Kept for compatibility with code inspecting the other filters
+        self.hash_strategy: str = HASH_STRATEGY_DOUBLE
+        # Not saved with the filter, set it again after loading
+        self.key_encoder: KeyEncoder = key_encoder if key_encoder is not None else encode_key
+
+        # ByteArray containing Bits for Bloom Filter, one block after the other
+        num_bytes: int = self.num_blocks * BLOCK_BYTES
+        if bit_vector is None:
+            bit_vector = allocate_vector(num_bytes)
+        check_vector(bit_vector, num_bytes)
+        self.bit_vector = bit_vector
+
+    def serialization_header(self) -> FilterHeader:
+        return self.header_for()
+
+    @classmethod
+    def from_header(cls, header: FilterHeader, bit_vector: Union[bytearray, memoryview]):
+        return cls(size = header.size, seeds = header.seeds, bit_vector = bit_vector)
+
+    def _block(self, item: Key) -> Tuple[int, int]:
+        # Returns the byte offset of the item's block and the mask of its bits within the block
+        digest = xxhash.xxh3_128_intdigest(self.key_encoder(item), self.seeds[0])
+        block = (digest & MASK_64) % self.num_blocks
+        position = (digest >> 64) & MASK_32
+        # An odd step visits distinct bits for up to BLOCK_BITS seeds
+        step = (digest >> 96) | 1
+        mask = 0
+        for _ in self.seeds:
+            mask |= 1 << (position % BLOCK_BITS)
+            position += step
+        return block * BLOCK_BYTES, mask
+
+    def _blocks_many(self, items: Iterable[Key]) -> Tuple[np.ndarray, np.ndarray]:
+        # Returns the byte index and bit mask of every bit of every item, as arrays of shape (items, seeds)
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        digests = digest_128_many(items, self.seeds[0], self.key_encoder)
+        blocks = (digests[:, 0] % np.uint64(self.num_blocks)).astype(np.intp)
+        position = digests[:, 1] & np.uint64(MASK_32)
+        step = (digests[:, 1] >> np.uint64(32)) | np.uint64(1)
+        steps = np.arange(len(self.seeds), dtype = np.uint64)
+        bits = ((position[:, None] + steps * step[:, None]) % np.uint64(BLOCK_BITS)).astype(np.intp)
+        byte_indices = blocks[:, None] * BLOCK_BYTES + (bits >> 3)
+        masks = np.left_shift(1, bits & 7).astype(np.uint8)
+        return byte_indices, masks
+
+    def add(self, item: Key):
+        offset, mask = self._block(item)
+        block = int.from_bytes(self.bit_vector[offset:offset + BLOCK_BYTES], "little") | mask
+        self.bit_vector[offset:offset + BLOCK_BYTES] = block.to_bytes(BLOCK_BYTES, "little")
+
+    def query(self, item: Key) -> bool:
+        offset, mask = self._block(item)
+        block = int.from_bytes(self.bit_vector[offset:offset + BLOCK_BYTES], "little")
+        return (block & mask) == mask
+
+    def add_many(self, items: Iterable[Key]):
+        byte_indices, masks = self._blocks_many(items)
+        vector = vector_array(self.bit_vector, writable = True)
+        np.bitwise_or.at(vector, byte_indices.ravel(), masks.ravel())
+
+    def query_many(self, items: Iterable[Key]) -> np.ndarray:
+        byte_indices, masks = self._blocks_many(items)
+        vector = vector_array(self.bit_vector)
+        return ((vector[byte_indices] & masks) != 0).all(axis = 1)
+
+    def merge_vector(self, vector: Union[bytearray, memoryview]):
+        # OR in the bit vector of a filter with the same configuration, in one pass
+        check_vector(vector, len(self.bit_vector))
+        target = vector_array(self.bit_vector, writable = True)
+        np.bitwise_or(target, vector_array(vector), out = target)
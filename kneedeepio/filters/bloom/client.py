@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import asyncio
+import itertools
+import logging
+import numpy as np
+
+from typing import Dict, Iterable, List, Tuple, Union
+
+from . import protocol
+from .exceptions import RemoteException
+
+### GLOBALS ###
+DEFAULT_POOL_SIZE = 4
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class FilterConnection:
+    """
+    One connection to a FilterServer.  Any number of requests may be outstanding at once, a background task
+    reads the responses and resolves each request's future by its request id.
+    """
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        self.reader = reader
+        self.writer = writer
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.request_ids = itertools.count()
+        self.read_task = asyncio.ensure_future(self._read_responses())
+
+    @classmethod
+    async def open(cls, address: Union[str, Tuple[str, int]]) -> "FilterConnection":
+        # A string address is the path of a Unix socket, a tuple is a TCP host and port
+        if isinstance(address, str):
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*address)
+        return cls(reader, writer)
+
+    @property
+    def closed(self) -> bool:
+        return self.read_task.done()
+
+    async def _read_responses(self):
+        try:
+            while True:
+                request_id, status, payload = await protocol.read_response(self.reader)
+                future = self.pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if status == protocol.STATUS_OK:
+                    future.set_result(payload)
+                else:
+                    future.set_exception(RemoteException(payload.decode("utf-8")))
+        except (asyncio.IncompleteReadError, ConnectionError) as error:
+            self.logger.debug("Connection closed: %s", error)
+        finally:
+            for future in self.pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection to the filter server closed"))
+            self.pending.clear()
+
+    async def request(self, opcode: int, name: str, payload: bytes = b"") -> bytes:
+        if self.closed:
+            raise ConnectionError("Connection to the filter server closed")
+        request_id = next(self.request_ids) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        self.writer.write(protocol.pack_request(request_id, opcode, name, payload))
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        await self.read_task
+
+class FilterClient:
+    """
+    Client for a FilterServer, spreading requests round robin over a pool of up to pool_size connections that
+    are opened on first use and reopened if the server drops them.  Every method is a coroutine and concurrent
+    calls are pipelined, use it as an async context manager or call close when done.
+    """
+    def __init__(self, address: Union[str, Tuple[str, int]], pool_size: int = DEFAULT_POOL_SIZE):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        self.address = address
+        self.pool_size: int = pool_size
+        self.connections: List[FilterConnection] = []
+        self.next_connection = itertools.count()
+        self.lock = asyncio.Lock()
+
+    async def _connection(self) -> FilterConnection:
+        async with self.lock:
+            index = next(self.next_connection) % self.pool_size
+            if index >= len(self.connections):
+                self.connections.append(await FilterConnection.open(self.address))
+            elif self.connections[index].closed:
+                self.connections[index] = await FilterConnection.open(self.address)
+            return self.connections[index]
+
+    async def _request(self, opcode: int, name: str, payload: bytes = b"") -> bytes:
+        connection = await self._connection()
+        return await connection.request(opcode, name, payload)
+
+    async def create(self, name: str, filter_type: str = "simple", **options):
+        # options are passed to the filter's constructor, see server.CREATE_OPTIONS
+        options["type"] = filter_type
+        await self._request(protocol.OP_CREATE, name, protocol.encode_json(options))
+
+    async def drop(self, name: str):
+        await self._request(protocol.OP_DROP, name)
+
+    async def list(self) -> List[str]:
+        return protocol.decode_json(await self._request(protocol.OP_LIST, ""))
+
+    async def stats(self, name: str) -> dict:
+        return protocol.decode_json(await self._request(protocol.OP_STATS, name))
+
+    async def add(self, name: str, item: str):
+        await self.add_many(name, [item])
+
+    async def remove(self, name: str, item: str):
+        await self.remove_many(name, [item])
+
+    async def query(self, name: str, item: str) -> bool:
+        return bool((await self.query_many(name, [item]))[0])
+
+    async def add_many(self, name: str, items: Iterable[str]):
+        await self._request(protocol.OP_ADD, name, protocol.encode_items(items))
+
+    async def remove_many(self, name: str, items: Iterable[str]):
+        await self._request(protocol.OP_REMOVE, name, protocol.encode_items(items))
+
+    async def query_many(self, name: str, items: Iterable[str]) -> np.ndarray:
+        return protocol.decode_results(await self._request(protocol.OP_QUERY, name, protocol.encode_items(items)))
+
+    async def close(self):
+        connections, self.connections = self.connections, []
+        for connection in connections:
+            await connection.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+
+# Compressed format for shipping filters, all integers little endian:
+#
+#   magic          4s   b"KDBZ"
+#   encoding       u8   ENCODING_* code, the same for every chunk
+#   padding        3x
+#   chunk_bytes    u32  bytes of the vector per chunk, the last chunk may be shorter
+#   num_chunks     u64
+#   header         the filter header of the uncompressed format, see serialization
+#   offsets        u64 * (num_chunks + 1), where each chunk starts in the data, the last being its length
+#   data           the encoded chunks one after the other
+#
+# Chunks are encoded independently, so a single chunk can be decoded to answer a query without
+# decoding the rest of the vector.
+
+### IMPORTS ###
+import collections
+import logging
+import struct
+import zlib
+import numpy as np
+
+from typing import Dict, Iterable, List, Union
+
+from .exceptions import SerializationException
+from .hashing import Key, KeyEncoder, encode_key, hash_indices, hash_indices_many
+from .serialization import FILTER_TYPE_SIMPLE, FILTER_TYPES, FilterHeader, pack_header, unpack_header
+from .storage import vector_array
+
+### GLOBALS ###
+COMPRESSED_MAGIC = b"KDBZ"
+COMPRESSED_STRUCT = struct.Struct("<4sBxxxIQ")
+
+# The vector as it is
+ENCODING_RAW = 0
+# Lengths of the alternating runs of clear and set bits, starting with clear, as varints
+ENCODING_RUNS = 1
+# Gaps between the positions of the set bits, as varints
+ENCODING_POSITIONS = 2
+# zlib compressed bytes
+ENCODING_ZLIB = 3
+ENCODING_NAMES = {
+    ENCODING_RAW: "raw",
+    ENCODING_RUNS: "runs",
+    ENCODING_POSITIONS: "positions",
+    ENCODING_ZLIB: "zlib",
+}
+
+DEFAULT_CHUNK_BYTES = 16 * 1024
+# Chunks encoded every way to choose the encoding of a filter
+SAMPLE_CHUNKS = 16
+# Higher levels gain little on the near random bytes of a filter and are several times slower
+ZLIB_LEVEL = 1
+# Decoded chunks kept by a CompressedBloomFilter
+DEFAULT_CACHED_CHUNKS = 64
+
+### FUNCTIONS ###
+def varint_encode(values: np.ndarray) -> bytes:
+    # Unsigned LEB128, seven bits a byte low bits first with the top bit set on all but the last byte
+    values = values.astype(np.uint64)
+    lengths = np.ones(len(values), dtype = np.int64)
+    largest = int(values.max()) if len(values) else 0
+    for shift in range(7, largest.bit_length(), 7):
+        lengths += values >= np.uint64(1 << shift)
+    offsets = np.cumsum(lengths) - lengths
+    encoded = np.zeros(int(lengths.sum()), dtype = np.uint8)
+    for byte in range(int(lengths.max()) if len(values) else 0):
+        selected = lengths > byte
+        part = (values[selected] >> np.uint64(7 * byte)) & np.uint64(0x7F)
+        more = np.where(lengths[selected] > byte + 1, 0x80, 0).astype(np.uint64)
+        encoded[offsets[selected] + byte] = (part | more).astype(np.uint8)
+    return encoded.tobytes()
+
+def varint_decode(data: Union[bytes, memoryview]) -> np.ndarray:
+    encoded = np.frombuffer(data, dtype = np.uint8)
+    if len(encoded) == 0:
+        return np.zeros(0, dtype = np.uint64)
+    if encoded[-1] & 0x80:
+        raise SerializationException("Truncated varint")
+    ends = np.flatnonzero(encoded < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = (np.arange(len(encoded)) - np.repeat(starts, ends - starts + 1)) * 7
+    parts = (encoded & 0x7F).astype(np.uint64) << shifts.astype(np.uint64)
+    return np.bitwise_or.reduceat(parts, starts)
+
+def set_bit_positions(vector: np.ndarray) -> np.ndarray:
+    # Positions of the set bits of a uint8 array, bit i being bit i % 8 of byte i // 8.  Only the non zero
+    # bytes are unpacked, which keeps sparse vectors cheap.
+    nonzero = np.flatnonzero(vector)
+    bits = np.flatnonzero(np.unpackbits(vector[nonzero], bitorder = "little"))
+    return nonzero[bits >> 3].astype(np.int64) * 8 + (bits & 7)
+
+def encode_chunk(chunk: np.ndarray, encoding: int) -> bytes:
+    if encoding == ENCODING_RAW:
+        return chunk.tobytes()
+    if encoding == ENCODING_ZLIB:
+        return zlib.compress(chunk.tobytes(), ZLIB_LEVEL)
+    positions = set_bit_positions(chunk)
+    if encoding == ENCODING_POSITIONS:
+        return varint_encode(np.diff(positions, prepend = -1) - 1)
+    if encoding == ENCODING_RUNS:
+        # A run ends wherever the next bit differs, the set runs start and end around the set positions
+        breaks = np.flatnonzero(np.diff(positions) != 1)
+        starts = positions[np.concatenate(([0], breaks + 1))] if len(positions) else positions
+        ends = positions[np.concatenate((breaks, [len(positions) - 1]))] + 1 if len(positions) else positions
+        clear = starts - np.concatenate(([0], ends[:-1]))
+        runs = np.stack([clear, ends - starts], axis = 1).ravel()
+        return varint_encode(runs)
+    raise ValueError("Unknown encoding {}".format(encoding))
+
+def decode_chunk(data: Union[bytes, memoryview], encoding: int, num_bytes: int) -> np.ndarray:
+    if encoding == ENCODING_RAW:
+        chunk = np.frombuffer(data, dtype = np.uint8)
+    elif encoding == ENCODING_ZLIB:
+        chunk = np.frombuffer(zlib.decompress(data), dtype = np.uint8)
+    else:
+        bits = np.zeros(num_bytes * 8, dtype = np.uint8)
+        values = varint_decode(data).astype(np.int64)
+        if encoding == ENCODING_POSITIONS:
+            positions = np.cumsum(values + 1) - 1
+            if len(positions) and positions[-1] >= len(bits):
+                raise SerializationException("Set bit {} beyond the chunk".format(positions[-1]))
+            bits[positions] = 1
+        elif encoding == ENCODING_RUNS:
+            flags = np.arange(len(values)) & 1
+            if values.sum() > len(bits):
+                raise SerializationException("Runs of {} bits overflow the chunk".format(values.sum()))
+            bits[:values.sum()] = np.repeat(flags, values)
+        else:
+            raise SerializationException("Unknown encoding {}".format(encoding))
+        chunk = np.packbits(bits, bitorder = "little")
+    if len(chunk) != num_bytes:
+        raise SerializationException("Chunk decoded to {} bytes, expected {}".format(len(chunk), num_bytes))
+    return chunk
+
+def _chunks(vector: np.ndarray, chunk_bytes: int) -> List[np.ndarray]:
+    return [vector[start:start + chunk_bytes] for start in range(0, len(vector), chunk_bytes)]
+
+def choose_encoding(vector: np.ndarray, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> int:
+    # The encoding giving the smallest output for a sample of chunks spread over the vector
+    chunks = _chunks(vector, chunk_bytes)
+    sample = chunks[::max(1, len(chunks) // SAMPLE_CHUNKS)][:SAMPLE_CHUNKS]
+    sizes = {encoding: sum(len(encode_chunk(chunk, encoding)) for chunk in sample) for encoding in ENCODING_NAMES}
+    # Raw wins ties, it is the cheapest to decode
+    return min(sorted(sizes), key = sizes.get)
+
+def compress(bloom, encoding: int = None, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> bytes:
+    # The filter in the compressed format, by default with the encoding that suits its vector best
+    vector = vector_array(bloom.bit_vector)
+    if encoding is None:
+        encoding = choose_encoding(vector, chunk_bytes)
+    if encoding not in ENCODING_NAMES:
+        raise ValueError("Unknown encoding {}, expected one of {}".format(encoding, list(ENCODING_NAMES)))
+    encoded = [encode_chunk(chunk, encoding) for chunk in _chunks(vector, chunk_bytes)]
+    offsets = np.concatenate(([0], np.cumsum([len(data) for data in encoded], dtype = np.int64)))
+    logging.getLogger(__name__).debug("Compressed %d bytes to %d using %s", len(vector), int(offsets[-1]),
+                                      ENCODING_NAMES[encoding])
+    return b"".join([
+        COMPRESSED_STRUCT.pack(COMPRESSED_MAGIC, encoding, chunk_bytes, len(encoded)),
+        pack_header(bloom.serialization_header()),
+        offsets.astype("<u8").tobytes(),
+    ] + encoded)
+
+def read_compressed(buffer) -> "CompressedVector":
+    # Parses the compressed format without decoding any chunk
+    view = memoryview(buffer).cast("B")
+    if len(view) < COMPRESSED_STRUCT.size:
+        raise SerializationException("Buffer too short for a compressed filter")
+    magic, encoding, chunk_bytes, num_chunks = COMPRESSED_STRUCT.unpack_from(view)
+    if magic != COMPRESSED_MAGIC:
+        raise SerializationException("Bad magic {!r}".format(magic))
+    if encoding not in ENCODING_NAMES:
+        raise SerializationException("Unknown encoding {}".format(encoding))
+    header, header_length = unpack_header(view[COMPRESSED_STRUCT.size:])
+    start = COMPRESSED_STRUCT.size + header_length
+    end = start + 8 * (num_chunks + 1)
+    if len(view) < end or num_chunks != -(-header.payload_length // chunk_bytes):
+        raise SerializationException("Buffer too short for {} chunk offsets".format(num_chunks))
+    offsets = np.frombuffer(view[start:end], dtype = "<u8").astype(np.int64)
+    if len(view) != end + offsets[-1]:
+        raise SerializationException("Buffer is {} bytes, expected {}".format(len(view), end + offsets[-1]))
+    return CompressedVector(header, encoding, chunk_bytes, offsets, view[end:])
+
+def decompress(buffer):
+    # Rebuilds the filter held in a compressed buffer, with its own writable vector
+    compressed = read_compressed(buffer)
+    return FILTER_TYPES[compressed.header.filter_type].from_header(compressed.header, compressed.decode())
+
+### CLASSES ###
+class CompressedVector:
+    """
+    A vector in the compressed format, whose chunks are decoded on demand.
+    """
+    def __init__(self, header: FilterHeader, encoding: int, chunk_bytes: int, offsets: np.ndarray,
+                 data: memoryview):
+        self.header: FilterHeader = header
+        self.encoding: int = encoding
+        self.chunk_bytes: int = chunk_bytes
+        self.offsets: np.ndarray = offsets
+        self.data: memoryview = data
+
+    def __len__(self) -> int:
+        # Number of chunks
+        return len(self.offsets) - 1
+
+    def compressed_bytes(self) -> int:
+        return int(self.offsets[-1])
+
+    def chunk(self, index: int) -> np.ndarray:
+        num_bytes = min(self.chunk_bytes, self.header.payload_length - index * self.chunk_bytes)
+        return decode_chunk(self.data[self.offsets[index]:self.offsets[index + 1]], self.encoding, num_bytes)
+
+    def decode(self) -> bytearray:
+        vector = bytearray(self.header.payload_length)
+        target = np.frombuffer(vector, dtype = np.uint8)
+        for index in range(len(self)):
+            target[index * self.chunk_bytes:(index + 1) * self.chunk_bytes] = self.chunk(index)
+        return vector
+
+class CompressedBloomFilter:
+    """
+    This is a read-only SimpleBloomFilter answering queries straight from the compressed format.  Only the
+    chunks a query touches are decoded, and the last cached_chunks of them are kept, so a replica holds little
+    more than the compressed bytes.  Queries cost a chunk decode on a cache miss, so this suits filters that
+    are queried less often than they are shipped, or whose queries cluster in a few chunks.
+    """
+    def __init__(self, buffer, cached_chunks: int = DEFAULT_CACHED_CHUNKS, key_encoder: KeyEncoder = None):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        self.compressed: CompressedVector = read_compressed(buffer)
+        header = self.compressed.header
+        if header.filter_type != FILTER_TYPE_SIMPLE:
+            raise SerializationException("Buffer holds a {}, not a SimpleBloomFilter".format(
+                FILTER_TYPES[header.filter_type].__name__))
+        self.size: int = header.size
+        self.seeds: List[int] = header.seeds
+        self.hash_strategy: str = header.hash_strategy
+        # Not saved with the filter, pass the one the filter was built with
+        self.key_encoder: KeyEncoder = key_encoder if key_encoder is not None else encode_key
+        self.chunk_bits: int = self.compressed.chunk_bytes * 8
+        self.cached_chunks: int = cached_chunks
+        self.cache: Dict[int, np.ndarray] = collections.OrderedDict()
+
+    def compression_ratio(self) -> float:
+        # Raw vector bytes per compressed byte
+        return self.compressed.header.payload_length / max(1, self.compressed.compressed_bytes())
+
+    def _chunk(self, index: int) -> np.ndarray:
+        chunk = self.cache.get(index)
+        if chunk is None:
+            chunk = self.compressed.chunk(index)
+            self.cache[index] = chunk
+            if len(self.cache) > self.cached_chunks:
+                self.cache.popitem(last = False)
+        else:
+            self.cache.move_to_end(index)
+        return chunk
+
+    def query(self, item: Key) -> bool:
+        for index in hash_indices(item, self.size, self.seeds, self.hash_strategy, self.key_encoder):
+            chunk_index, bit = divmod(index, self.chunk_bits)
+            if not (self._chunk(chunk_index)[bit >> 3] >> (bit & 7)) & 1:
+                return False
+        return True
+
+    def query_many(self, items: Iterable[Key]) -> np.ndarray:
+        indices = hash_indices_many(items, self.size, self.seeds, self.hash_strategy, self.key_encoder)
+        chunk_indices, bits = np.divmod(indices.ravel(), self.chunk_bits)
+        found = np.zeros(indices.size, dtype = bool)
+        # Each chunk is decoded once, however many indices fall in it, the indices being grouped by chunk once
+        order = np.argsort(chunk_indices, kind = "stable")
+        chunks, starts = np.unique(chunk_indices[order], return_index = True)
+        for chunk_index, positions in zip(chunks.tolist(), np.split(order, starts[1:])):
+            chunk_bits = bits[positions]
+            found[positions] = (self._chunk(chunk_index)[chunk_bits >> 3] >> (chunk_bits & 7)) & 1
+        found = found.reshape(indices.shape)
+        return found.all(axis = 1)
+
+    def decompress(self):
+        # A writable SimpleBloomFilter holding the same bits
+        bloom = FILTER_TYPES[FILTER_TYPE_SIMPLE].from_header(self.compressed.header, self.compressed.decode())
+        bloom.key_encoder = self.key_encoder
+        return bloom
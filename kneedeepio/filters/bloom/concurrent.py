@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import contextlib
+import logging
+import threading
+import numpy as np
+
+from typing import Iterable, List, Union
+
+from .counting import CountingBloomFilter
+from .hashing import Key
+from .simple import SimpleBloomFilter
+
+### GLOBALS ###
+DEFAULT_NUM_STRIPES = 64
+# Bytes of bit_vector covered by one stripe, a whole number of pages keeps neighbouring
+# stripes from sharing a cache line
+DEFAULT_STRIPE_BYTES = 4096
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class ConcurrentBloomFilter:
+    """
+    Thread safe wrapper around a SimpleBloomFilter or CountingBloomFilter.  The bit vector is split into
+    contiguous stripes of stripe_bytes, and stripe i is guarded by lock i % num_stripes.  A write takes only the
+    locks of the stripes its indices fall in, always in ascending order so writers can't deadlock, and writers
+    touching different stripes run in parallel.  Queries on a SimpleBloomFilter take no lock at all: bits only
+    ever go from 0 to 1, so a racing query can only miss an add that hasn't completed yet.  Counting filter
+    queries take the stripe locks, as a counter may be mid update.
+    """
+    def __init__(self, bloom: Union[SimpleBloomFilter, CountingBloomFilter], num_stripes: int = DEFAULT_NUM_STRIPES,
+                 stripe_bytes: int = DEFAULT_STRIPE_BYTES):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        if not isinstance(bloom, (SimpleBloomFilter, CountingBloomFilter)):
+            raise TypeError("Expected a SimpleBloomFilter or CountingBloomFilter, got {}".format(type(bloom).__name__))
+        self.bloom = bloom
+        self.num_stripes: int = num_stripes
+        self.locks: List[threading.Lock] = [threading.Lock() for _ in range(num_stripes)]
+        # Slots per stripe, from the width of one slot in bits
+        self.stripe_slots: int = stripe_bytes * 8 // getattr(bloom, "counter_bits", 1)
+        self.lock_free_reads: bool = isinstance(bloom, SimpleBloomFilter)
+
+    def _stripes(self, indices: Iterable[int]) -> List[int]:
+        return sorted({(index // self.stripe_slots) % self.num_stripes for index in indices})
+
+    def _stripes_many(self, indices: np.ndarray) -> List[int]:
+        return np.unique((indices // self.stripe_slots) % self.num_stripes).tolist()
+
+    def _acquire(self, stripes: List[int]):
+        for stripe in stripes:
+            self.locks[stripe].acquire()
+
+    def _release(self, stripes: List[int]):
+        for stripe in reversed(stripes):
+            self.locks[stripe].release()
+
+    @contextlib.contextmanager
+    def _locked(self, stripes: List[int]):
+        self._acquire(stripes)
+        try:
+            yield
+        finally:
+            self._release(stripes)
+
+    # The single item methods skip the context manager, its overhead is comparable to the work itself.
+    def add(self, item: Key):
+        indices = self.bloom.indices(item)
+        stripes = self._stripes(indices)
+        self._acquire(stripes)
+        try:
+            self.bloom.add_indices(indices)
+        finally:
+            self._release(stripes)
+
+    def remove(self, item: Key):
+        indices = self.bloom.indices(item)
+        stripes = self._stripes(indices)
+        self._acquire(stripes)
+        try:
+            self.bloom.remove_indices(indices, item)
+        finally:
+            self._release(stripes)
+
+    def query(self, item: Key) -> bool:
+        indices = self.bloom.indices(item)
+        if self.lock_free_reads:
+            return self.bloom.query_indices(indices)
+        stripes = self._stripes(indices)
+        self._acquire(stripes)
+        try:
+            return self.bloom.query_indices(indices)
+        finally:
+            self._release(stripes)
+
+    # Hashing happens outside the locks, a batch then holds the locks of every stripe it touches
+    # while it is applied, so a counting filter batch is still checked as a whole before it is written.
+    def add_many(self, items: Iterable[Key]):
+        indices = self.bloom.indices_many(items)
+        with self._locked(self._stripes_many(indices)):
+            self.bloom.add_index_array(indices)
+
+    def remove_many(self, items: Iterable[Key]):
+        indices = self.bloom.indices_many(items)
+        with self._locked(self._stripes_many(indices)):
+            self.bloom.remove_index_array(indices)
+
+    def query_many(self, items: Iterable[Key]) -> np.ndarray:
+        indices = self.bloom.indices_many(items)
+        if self.lock_free_reads:
+            return self.bloom.query_index_array(indices)
+        with self._locked(self._stripes_many(indices)):
+            return self.bloom.query_index_array(indices)
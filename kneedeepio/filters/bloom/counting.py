@@ -2,61 +2,317 @@
 
 ### IMPORTS ###
 import logging
-import xxhash
+import math
+import numpy as np
 
-from typing import List
+from typing import Iterable, List, Tuple, Union
 
-from .exceptions import TooFewCountsException, TooManyCountsException
+from .hashing import HASH_STRATEGY_SEEDED, Key, KeyEncoder, check_hash_strategy, encode_key
+from .hashing import HashedFilter
+from .serialization import FILTER_TYPE_COUNTING, FilterHeader, SerializableFilter, register_filter_type
+from .storage import allocate_vector, check_vector, map_vector, vector_array
+from .exceptions import BloomFilterException, TooFewCountsException, TooManyCountsException
+from .metrics import InstrumentedFilter
+from .replication import DELTA_MODE_OVERWRITE, ReplicatedFilter
 
 ### GLOBALS ###
+# Supported counter widths, 4 bit counters are packed two to a byte low nibble first and
+# 16 bit counters are stored little endian.
+COUNTER_BITS = (4, 8, 16)
+DEFAULT_COUNTER_BITS = 8
 
 ### FUNCTIONS ###
+def counter_bytes(size: int, counter_bits: int) -> int:
+    # Number of bytes needed to hold size counters of the given width
+    return (size * counter_bits + 7) // 8
+
+def read_counters(vector: Union[bytearray, memoryview], indices: np.ndarray, counter_bits: int) -> np.ndarray:
+    if counter_bits == 4:
+        shifts = (indices & 1) << 2
+        return (vector_array(vector)[indices >> 1] >> shifts) & 0xF
+    return vector_array(vector, dtype = "<u2" if counter_bits == 16 else np.uint8)[indices]
+
+def add_counters(target: np.ndarray, source: np.ndarray, counter_bits: int) -> Tuple[np.ndarray, int]:
+    # Saturating sum of two whole counter vectors viewed as uint8, returning the summed vector
+    # and the number of counters that hit the maximum
+    max_count = (1 << counter_bits) - 1
+    if counter_bits == 4:
+        low = (target & 0xF) + (source & 0xF)
+        high = (target >> 4) + (source >> 4)
+        overflow = np.count_nonzero(low > max_count) + np.count_nonzero(high > max_count)
+        summed = np.minimum(low, max_count) | (np.minimum(high, max_count) << 4)
+        return summed.astype(np.uint8), overflow
+    dtype = "<u2" if counter_bits == 16 else np.uint8
+    summed = target.view(dtype).astype(np.uint32) + source.view(dtype)
+    overflow = np.count_nonzero(summed > max_count)
+    return np.minimum(summed, max_count).astype(dtype).view(np.uint8), overflow
+
+def write_counters(vector: Union[bytearray, memoryview], indices: np.ndarray, values: np.ndarray, counter_bits: int):
+    # The indices must be unique
+    if counter_bits == 4:
+        packed = vector_array(vector, writable = True)
+        # Low and high nibbles are written separately so two counters sharing a byte don't clobber each other
+        for parity in (0, 1):
+            selected = (indices & 1) == parity
+            byte_indices = indices[selected] >> 1
+            shift = parity << 2
+            kept = packed[byte_indices] & (0xF0 >> shift)
+            packed[byte_indices] = kept | (values[selected] << shift).astype(np.uint8)
+        return
+    counters = vector_array(vector, writable = True, dtype = "<u2" if counter_bits == 16 else np.uint8)
+    counters[indices] = values
 
 ### CLASSES ###
-class CountingBloomFilter:
+@register_filter_type(FILTER_TYPE_COUNTING)
+class CountingBloomFilter(SerializableFilter, HashedFilter, InstrumentedFilter, ReplicatedFilter):
     """
     This is a counting bloom filter based on the article https://codeconfessions.substack.com/p/bloom-filters-and-beyond
+
+    Counters are counter_bits wide, 4, 8 or 16.  By default adding to a full counter or removing from an empty
+    one raises, or is skipped when ignore_errors is set.  Saturating counters instead stick at their maximum once
+    reached: later adds are absorbed silently and removes no longer decrement them, as the true count is lost.
+    Skipped and absorbed updates are counted as saturations and underflows while metrics are enabled.
+
+    count gives how many times an item was added as the smallest of its counters, as in a count-min sketch.  It
+    never undercounts while no counter saturates and only added items are removed.  Each add raises num_hashes of
+    the size counters, so with N adds in total a counter holds k * N / size of other items' adds on average, and
+    the estimate overshoots by more than e * k * N / size with probability at most e ** -k, k being the number of
+    seeds.  count_error gives that bound for the current counters.  Conservative updates only raise the item's
+    smallest counters, which keeps the overshoot well below the bound for skewed streams, but then an item can't be
+    removed without undercounting the others sharing its counters, so remove raises.
+
+    Deltas overwrite the replica's counters, so they must be applied in version order.
     """
-    def __init__(self, size: int = 4096, seeds: List[int] = None, ignore_errors: bool = False):
+    DELTA_MODE = DELTA_MODE_OVERWRITE
+
+    def __init__(self, size: int = 4096, seeds: List[int] = None, ignore_errors: bool = False,
+                 hash_strategy: str = HASH_STRATEGY_SEEDED, bit_vector: Union[bytearray, memoryview] = None,
+                 counter_bits: int = DEFAULT_COUNTER_BITS, saturate: bool = False, key_encoder: KeyEncoder = None,
+                 conservative: bool = False):
         self.logger = logging.getLogger(type(self).__name__)
 
+        check_hash_strategy(hash_strategy)
+        if counter_bits not in COUNTER_BITS:
+            raise ValueError("Unsupported counter width {}, expected one of {}".format(counter_bits, COUNTER_BITS))
         self.size: int = size
-        self.seeds: List[int] = seeds if not None else [3, 5, 7]
+        self.seeds: List[int] = seeds if seeds is not None else [3, 5, 7]
+        self.hash_strategy: str = hash_strategy
+        # Not saved with the filter, set it again after loading
+        self.key_encoder: KeyEncoder = key_encoder if key_encoder is not None else encode_key
         self.ignore_errors: bool = ignore_errors
+        self.counter_bits: int = counter_bits
+        self.saturate: bool = saturate
+        self.conservative: bool = conservative
+        self.max_count: int = (1 << counter_bits) - 1
 
-        # ByteArray containing counters for Counting Bloom Filter
-        # NOTE: This implementation is limited to 255 items per location.
-        self.bit_vector = bytearray(([0] * self.size))
+        # ByteArray containing counters for Counting Bloom Filter, or a caller supplied buffer such as a mapped file
+        num_bytes: int = counter_bytes(size, counter_bits)
+        if bit_vector is None:
+            bit_vector = allocate_vector(num_bytes)
+        check_vector(bit_vector, num_bytes)
+        self.bit_vector = bit_vector
 
-    def _hash(self, data: str, seed: int) -> int:
-        hasher = xxhash.xxh64(seed = seed)
-        hasher.update(data)
-        result = hasher.intdigest()
-        return result % self.size
+    @classmethod
+    def open_mmap(cls, path: str, size: int = 4096, seeds: List[int] = None, writable: bool = False, **kwargs):
+        # Back the counters with a shared mapping of the file, which is created when writable.  Any other
+        # constructor arguments are passed through.
+        num_bytes = counter_bytes(size, kwargs.get("counter_bits", DEFAULT_COUNTER_BITS))
+        bit_vector = map_vector(path, num_bytes, writable = writable)
+        return cls(size = size, seeds = seeds, bit_vector = bit_vector, **kwargs)
 
-    def add(self, item: str):
-        for seed in self.seeds:
-            index = self._hash(item, seed = seed)
-            if self.bit_vector[index] >= 255:
-                if not self.ignore_errors:
-                    raise TooManyCountsException("Index {} already at 255 for item {}".format(index, item))
-                self.logger.warning("Index %d already at 255 for item %s", index, item)
+    def serialization_header(self) -> FilterHeader:
+        return self.header_for(counter_bits = self.counter_bits, extra = [int(self.saturate), int(self.conservative)])
+
+    @classmethod
+    def from_header(cls, header: FilterHeader, bit_vector: Union[bytearray, memoryview]):
+        return cls(size = header.size, seeds = header.seeds, hash_strategy = header.hash_strategy,
+                   bit_vector = bit_vector, counter_bits = header.counter_bits,
+                   saturate = bool(header.extra and header.extra[0]),
+                   conservative = bool(len(header.extra) > 1 and header.extra[1]))
+
+    def _get_counter(self, index: int) -> int:
+        if self.counter_bits == 8:
+            return self.bit_vector[index]
+        if self.counter_bits == 4:
+            return (self.bit_vector[index >> 1] >> ((index & 1) << 2)) & 0xF
+        return self.bit_vector[index << 1] | (self.bit_vector[(index << 1) + 1] << 8)
+
+    def _set_counter(self, index: int, value: int):
+        if self.counter_bits == 8:
+            self.bit_vector[index] = value
+        elif self.counter_bits == 4:
+            shift = (index & 1) << 2
+            self.bit_vector[index >> 1] = (self.bit_vector[index >> 1] & (0xF0 >> shift)) | (value << shift)
+        else:
+            self.bit_vector[index << 1] = value & 0xFF
+            self.bit_vector[(index << 1) + 1] = value >> 8
+
+    def add(self, item: Key):
+        self.add_indices(self.indices(item), item)
+
+    def remove(self, item: Key):
+        self.remove_indices(self.indices(item), item)
+
+    def query(self, item: Key) -> bool:
+        return self.query_indices(self.indices(item))
+
+    def add_many(self, items: Iterable[Key]):
+        self.add_index_array(self.indices_many(items))
+
+    def remove_many(self, items: Iterable[Key]):
+        self.remove_index_array(self.indices_many(items))
+
+    def query_many(self, items: Iterable[Key]) -> np.ndarray:
+        return self.query_index_array(self.indices_many(items))
+
+    def count(self, item: Key) -> int:
+        return self.count_indices(self.indices(item))
+
+    def count_many(self, items: Iterable[Key]) -> np.ndarray:
+        return self.count_index_array(self.indices_many(items))
+
+    def count_error(self) -> float:
+        # Amount by which count overshoots with probability at most e ** -num_hashes, e times the mean counter
+        counters = read_counters(self.bit_vector, np.arange(self.size), self.counter_bits)
+        return math.e * float(counters.sum()) / self.size
+
+    # The methods below work on indices already computed by indices or indices_many, for callers
+    # that hash once and apply the result elsewhere.  The item is only used in error messages.
+    def add_indices(self, indices: List[int], item: Key = None):
+        if self.conservative:
+            self._add_indices_conservative(indices, item)
+            return
+        for index in indices:
+            value = self._get_counter(index)
+            if value >= self.max_count:
+                if not self.saturate and not self.ignore_errors:
+                    raise TooManyCountsException("Index {} already at {} for item {}".format(index, value, item))
+                self._record("saturations")
                 continue
-            self.bit_vector[index] += 1
+            self._set_counter(index, value + 1)
+
+    def _add_indices_conservative(self, indices: List[int], item: Key = None):
+        # Raises the smallest counters by one, leaving those already above them
+        values = [self._get_counter(index) for index in indices]
+        target = min(values) + 1
+        if target > self.max_count:
+            if not self.saturate and not self.ignore_errors:
+                raise TooManyCountsException("Counters already at {} for item {}".format(self.max_count, item))
+            self._record("saturations")
+            return
+        for index, value in zip(indices, values):
+            if value < target:
+                self._set_counter(index, target)
+
+    def _check_removable(self):
+        if self.conservative:
+            raise BloomFilterException("Items can't be removed from a filter with conservative updates")
 
-    def remove(self, item: str):
-        for seed in self.seeds:
-            index = self._hash(item, seed = seed)
-            if self.bit_vector[index] <= 0:
+    def remove_indices(self, indices: List[int], item: Key = None):
+        self._check_removable()
+        for index in indices:
+            value = self._get_counter(index)
+            if self.saturate and value >= self.max_count:
+                continue
+            if value <= 0:
                 if not self.ignore_errors:
                     raise TooFewCountsException("Index {} already at 0 for item {}".format(index, item))
-                self.logger.warning("Index %d already at 0 for item %s", index, item)
+                self._record("underflows")
                 continue
-            self.bit_vector[index] -= 1
+            self._set_counter(index, value - 1)
 
-    def query(self, item: str) -> bool:
-        for seed in self.seeds:
-            index = self._hash(item, seed = seed)
-            if self.bit_vector[index] == 0:
+    def query_indices(self, indices: List[int]) -> bool:
+        for index in indices:
+            if self._get_counter(index) == 0:
                 return False
         return True
+
+    def count_indices(self, indices: List[int]) -> int:
+        return min(self._get_counter(index) for index in indices)
+
+    # NOTE: The batched methods check every counter before writing any of them, so unlike the
+    #       single item methods a raised exception leaves the filter unmodified.
+    def add_index_array(self, indices: np.ndarray):
+        if self.conservative:
+            self._add_index_array_conservative(indices)
+            return
+        touched, increments = np.unique(indices, return_counts = True)
+        updated = read_counters(self.bit_vector, touched, self.counter_bits).astype(np.int64) + increments
+        self._write_added(touched, updated)
+
+    def _write_added(self, touched: np.ndarray, updated: np.ndarray):
+        # Writes back counters raised by an add, once any overflow has been checked
+        overflow = updated > self.max_count
+        if overflow.any():
+            if not self.saturate and not self.ignore_errors:
+                raise TooManyCountsException("Index {} would exceed {}".format(touched[overflow][0], self.max_count))
+            self._record("saturations", int((updated[overflow] - self.max_count).sum()))
+        write_counters(self.bit_vector, touched, np.minimum(updated, self.max_count), self.counter_bits)
+
+    def _add_index_array_conservative(self, indices: np.ndarray):
+        # Applies the items in order on a copy of the touched counters, exactly as a loop of single adds
+        # would, in a single pass over the batch
+        touched, positions = np.unique(indices, return_inverse = True)
+        counters = read_counters(self.bit_vector, touched, self.counter_bits).tolist()
+        saturations = 0
+        for number, row in enumerate(positions.reshape(indices.shape).tolist()):
+            target = min(counters[position] for position in row) + 1
+            if target > self.max_count:
+                if not self.saturate and not self.ignore_errors:
+                    raise TooManyCountsException("Counters already at {} for item {} of the batch".format(
+                        self.max_count, number))
+                saturations += 1
+                continue
+            for position in row:
+                if counters[position] < target:
+                    counters[position] = target
+        if saturations:
+            self._record("saturations", saturations)
+        write_counters(self.bit_vector, touched, np.array(counters, dtype = np.int64), self.counter_bits)
+
+    def remove_index_array(self, indices: np.ndarray):
+        self._check_removable()
+        touched, decrements = np.unique(indices, return_counts = True)
+        current = read_counters(self.bit_vector, touched, self.counter_bits).astype(np.int64)
+        if self.saturate:
+            decrements[current >= self.max_count] = 0
+        updated = current - decrements
+        underflow = updated < 0
+        if underflow.any():
+            if not self.ignore_errors:
+                raise TooFewCountsException("Index {} would drop below 0".format(touched[underflow][0]))
+            self._record("underflows", int(-updated[underflow].sum()))
+            updated = np.maximum(updated, 0)
+        write_counters(self.bit_vector, touched, updated, self.counter_bits)
+
+    def query_index_array(self, indices: np.ndarray) -> np.ndarray:
+        counters = read_counters(self.bit_vector, indices.ravel(), self.counter_bits)
+        return (counters != 0).reshape(indices.shape).all(axis = 1)
+
+    def count_index_array(self, indices: np.ndarray) -> np.ndarray:
+        counters = read_counters(self.bit_vector, indices.ravel(), self.counter_bits)
+        return counters.reshape(indices.shape).min(axis = 1).astype(np.int64)
+
+    def popcount(self) -> int:
+        # Number of non zero counters
+        if self.counter_bits == 4:
+            packed = vector_array(self.bit_vector)
+            return int(np.count_nonzero(packed & 0xF) + np.count_nonzero(packed >> 4))
+        counters = vector_array(self.bit_vector, dtype = "<u2" if self.counter_bits == 16 else np.uint8)
+        return int(np.count_nonzero(counters))
+
+    def byte_offsets(self, indices: np.ndarray) -> np.ndarray:
+        # 16 bit counters start on an even byte, so both their bytes are in the same page
+        return (indices * self.counter_bits) >> 3
+
+    def merge_vector(self, vector: Union[bytearray, memoryview]):
+        # Add in the counters of a filter with the same configuration, saturating at max_count.
+        # Overflow is treated as in add_index_array and checked before anything is written.
+        check_vector(vector, len(self.bit_vector))
+        target = vector_array(self.bit_vector, writable = True)
+        summed, overflow = add_counters(target, vector_array(vector), self.counter_bits)
+        if overflow:
+            if not self.saturate and not self.ignore_errors:
+                raise TooManyCountsException("{} counters would exceed {}".format(overflow, self.max_count))
+            self._record("saturations", overflow)
+        target[:] = summed
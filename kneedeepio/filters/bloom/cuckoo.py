@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import math
+import random
+import struct
+import numpy as np
+import xxhash
+
+from typing import Iterable, List, Tuple, Union
+
+from .exceptions import FilterFullException, TooFewCountsException
+from .hashing import HASH_STRATEGY_DOUBLE, MASK_64, Key, KeyEncoder, digest_128_many, encode_key
+from .serialization import FILTER_TYPE_CUCKOO, FilterHeader, SerializableFilter, register_filter_type
+from .storage import allocate_vector, check_vector, vector_array
+
+### GLOBALS ###
+FINGERPRINT_BITS = (8, 16)
+DEFAULT_FINGERPRINT_BITS = 8
+DEFAULT_BUCKET_SIZE = 4
+# Relocations tried before an add gives up
+DEFAULT_MAX_KICKS = 500
+# Fraction of the slots that can be filled before adds start to fail, for 4 slot buckets
+MAX_LOAD_FACTOR = 0.95
+
+# Odd 64 bit multiplier (from MurmurHash2) mixing a fingerprint into the offset of its other bucket
+FINGERPRINT_MIX = 0xC6A4A7935BD1E995
+
+### FUNCTIONS ###
+def fingerprint_dtype(fingerprint_bits: int):
+    return "<u2" if fingerprint_bits == 16 else np.uint8
+
+def cuckoo_size(capacity: int, bucket_size: int = DEFAULT_BUCKET_SIZE) -> int:
+    # Number of slots needed to hold capacity items, with a power of two number of buckets
+    num_buckets = max(1, math.ceil(capacity / (bucket_size * MAX_LOAD_FACTOR)))
+    return (1 << (num_buckets - 1).bit_length()) * bucket_size
+
+### CLASSES ###
+@register_filter_type(FILTER_TYPE_CUCKOO)
+class CuckooFilter(SerializableFilter):
+    """
+    This is a cuckoo filter based on the paper "Cuckoo Filter: Practically Better Than Bloom" by Fan et al.
+
+    Each item is stored as a fingerprint_bits wide fingerprint in one of two buckets of bucket_size slots, the
+    second bucket being the first XOR a hash of the fingerprint, so a query reads at most two buckets and a
+    remove clears exactly one copy.  size is the number of slots and is rounded up to a power of two number of
+    buckets; the false positive rate is at most 2 * bucket_size / 2 ** fingerprint_bits, and adds may fail once
+    around 95% of the slots are full.  An add that can't find room after max_kicks relocations raises
+    FilterFullException and leaves the filter as it was.  Removing an item that was never added can remove
+    another item sharing its fingerprint and buckets, so only remove what was added.
+    """
+    # Kept for compatibility with code inspecting the other filters
+    hash_strategy: str = HASH_STRATEGY_DOUBLE
+
+    def __init__(self, size: int = 4096, seed: int = 0, fingerprint_bits: int = DEFAULT_FINGERPRINT_BITS,
+                 bucket_size: int = DEFAULT_BUCKET_SIZE, max_kicks: int = DEFAULT_MAX_KICKS,
+                 ignore_errors: bool = False, bit_vector: Union[bytearray, memoryview] = None,
+                 key_encoder: KeyEncoder = None):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        if fingerprint_bits not in FINGERPRINT_BITS:
+            raise ValueError("Unsupported fingerprint width {}, expected one of {}".format(
+                fingerprint_bits, FINGERPRINT_BITS))
+        self.seed: int = seed
+        self.fingerprint_bits: int = fingerprint_bits
+        self.bucket_size: int = bucket_size
+        self.max_kicks: int = max_kicks
+        self.ignore_errors: bool = ignore_errors
+        self.num_buckets: int = 1 << (max(1, -(-size // bucket_size)) - 1).bit_length()
+        self.size: int = self.num_buckets * bucket_size
+        self.bucket_mask: int = self.num_buckets - 1
+        self.bucket_struct = struct.Struct("<{}{}".format(bucket_size, "H" if fingerprint_bits == 16 else "B"))
+        # Not saved with the filter, set it again after loading
+        self.key_encoder: KeyEncoder = key_encoder if key_encoder is not None else encode_key
+        # Picks the victims of relocations, seeded so that runs are repeatable
+        self.random = random.Random(seed)
+
+        # Fingerprints bucket after bucket, zero marks an empty slot
+        num_bytes: int = self.size * fingerprint_bits // 8
+        if bit_vector is None:
+            bit_vector = allocate_vector(num_bytes)
+        check_vector(bit_vector, num_bytes)
+        self.bit_vector = bit_vector
+
+    @classmethod
+    def for_capacity(cls, capacity: int, **kwargs) -> "CuckooFilter":
+        # Sized to hold capacity items
+        return cls(size = cuckoo_size(capacity, kwargs.get("bucket_size", DEFAULT_BUCKET_SIZE)), **kwargs)
+
+    def serialization_header(self) -> FilterHeader:
+        return self.header_for(counter_bits = self.fingerprint_bits, seeds = [self.seed],
+                               extra = [self.bucket_size, self.max_kicks])
+
+    @classmethod
+    def from_header(cls, header: FilterHeader, bit_vector: Union[bytearray, memoryview]):
+        return cls(size = header.size, seed = header.seeds[0], fingerprint_bits = header.counter_bits,
+                   bucket_size = header.extra[0], max_kicks = header.extra[1], bit_vector = bit_vector)
+
+    def false_positive_rate(self) -> float:
+        # Upper bound, reached when every slot is full
+        return min(1.0, 2 * self.bucket_size / (1 << self.fingerprint_bits))
+
+    def __len__(self) -> int:
+        # Number of fingerprints stored
+        return int(np.count_nonzero(self._slots()))
+
+    def _slots(self, writable: bool = False) -> np.ndarray:
+        slots = vector_array(self.bit_vector, writable = writable, dtype = fingerprint_dtype(self.fingerprint_bits))
+        return slots.reshape(self.num_buckets, self.bucket_size)
+
+    def _alternate(self, bucket: int, fingerprint: int) -> int:
+        return bucket ^ ((((fingerprint * FINGERPRINT_MIX) & MASK_64) >> 32) & self.bucket_mask)
+
+    def _locate(self, item: Key) -> Tuple[int, int, int]:
+        # The item's fingerprint, never zero, and its two buckets
+        digest = xxhash.xxh3_128_intdigest(self.key_encoder(item), self.seed)
+        fingerprint = ((digest >> 64) & ((1 << self.fingerprint_bits) - 1)) or 1
+        bucket = (digest & MASK_64) & self.bucket_mask
+        return fingerprint, bucket, self._alternate(bucket, fingerprint)
+
+    def _locate_many(self, items: Iterable[Key]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        digests = digest_128_many(items, self.seed, self.key_encoder)
+        fingerprints = digests[:, 1] & np.uint64((1 << self.fingerprint_bits) - 1)
+        fingerprints[fingerprints == 0] = 1
+        buckets = digests[:, 0] & np.uint64(self.bucket_mask)
+        mixed = (fingerprints * np.uint64(FINGERPRINT_MIX)) >> np.uint64(32)
+        alternates = buckets ^ (mixed & np.uint64(self.bucket_mask))
+        fingerprints = fingerprints.astype(fingerprint_dtype(self.fingerprint_bits))
+        return fingerprints, buckets.astype(np.intp), alternates.astype(np.intp)
+
+    # The single item paths read and write bit_vector directly, which is faster than numpy for a few slots
+    def _read_bucket(self, bucket: int) -> List[int]:
+        return list(self.bucket_struct.unpack_from(self.bit_vector, bucket * self.bucket_struct.size))
+
+    def _write_slot(self, bucket: int, slot: int, fingerprint: int):
+        index = bucket * self.bucket_size + slot
+        if self.fingerprint_bits == 8:
+            self.bit_vector[index] = fingerprint
+        else:
+            self.bit_vector[index << 1] = fingerprint & 0xFF
+            self.bit_vector[(index << 1) + 1] = fingerprint >> 8
+
+    def _insert(self, fingerprint: int, first: int, second: int, item: Key = None) -> bool:
+        # Places one fingerprint, relocating others if both buckets are full.  Every relocation is
+        # undone if no room turns up, so a failed insert changes nothing.
+        for bucket in (first, second):
+            contents = self._read_bucket(bucket)
+            if 0 in contents:
+                self._write_slot(bucket, contents.index(0), fingerprint)
+                return True
+        bucket = self.random.choice((first, second))
+        moves = []
+        for _ in range(self.max_kicks):
+            slot = self.random.randrange(self.bucket_size)
+            victim = self._read_bucket(bucket)[slot]
+            self._write_slot(bucket, slot, fingerprint)
+            moves.append((bucket, slot, victim))
+            fingerprint = victim
+            bucket = self._alternate(bucket, fingerprint)
+            contents = self._read_bucket(bucket)
+            if 0 in contents:
+                self._write_slot(bucket, contents.index(0), fingerprint)
+                return True
+        for bucket, slot, victim in reversed(moves):
+            self._write_slot(bucket, slot, victim)
+        if not self.ignore_errors:
+            raise FilterFullException("No room for item {} after {} relocations, {} of {} slots used".format(
+                item, self.max_kicks, len(self), self.size))
+        return False
+
+    def _delete(self, fingerprint: int, first: int, second: int, item: Key = None) -> bool:
+        for bucket in (first, second):
+            contents = self._read_bucket(bucket)
+            if fingerprint in contents:
+                self._write_slot(bucket, contents.index(fingerprint), 0)
+                return True
+        if not self.ignore_errors:
+            raise TooFewCountsException("Item {} is not in the filter".format(item))
+        return False
+
+    def add(self, item: Key) -> bool:
+        # Returns False if the filter is full and ignore_errors is set
+        fingerprint, first, second = self._locate(item)
+        return self._insert(fingerprint, first, second, item)
+
+    def remove(self, item: Key) -> bool:
+        # Returns False if the item wasn't found and ignore_errors is set
+        fingerprint, first, second = self._locate(item)
+        return self._delete(fingerprint, first, second, item)
+
+    def query(self, item: Key) -> bool:
+        fingerprint, first, second = self._locate(item)
+        return fingerprint in self._read_bucket(first) or fingerprint in self._read_bucket(second)
+
+    def add_many(self, items: Iterable[Key]) -> np.ndarray:
+        # Returns whether each item was added.  Items are first dropped into empty slots in rounds,
+        # taking one item per bucket per round, and only the rest go through relocation one at a time.
+        # If an item in that last step doesn't fit and FilterFullException is raised, every item placed in the
+        # rounds stays added, wherever it comes in the batch, as do the relocated items before the failed one;
+        # the relocated items after it are not tried.  With ignore_errors set nothing is raised and the result
+        # says which items were added.
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        fingerprints, firsts, seconds = self._locate_many(items)
+        slots = self._slots(writable = True)
+        pending = np.arange(len(fingerprints))
+        for buckets in (firsts, seconds):
+            while len(pending):
+                free = np.count_nonzero(slots[buckets[pending]] == 0, axis = 1) > 0
+                candidates = pending[free]
+                if candidates.size == 0:
+                    break
+                _, first_seen = np.unique(buckets[candidates], return_index = True)
+                chosen = candidates[first_seen]
+                target = buckets[chosen]
+                slots[target, np.argmax(slots[target] == 0, axis = 1)] = fingerprints[chosen]
+                pending = np.setdiff1d(pending, chosen, assume_unique = True)
+        added = np.ones(len(fingerprints), dtype = bool)
+        for index in pending.tolist():
+            added[index] = self._insert(int(fingerprints[index]), int(firsts[index]), int(seconds[index]),
+                                        items[index])
+        return added
+
+    def remove_many(self, items: Iterable[Key]) -> np.ndarray:
+        # Returns whether each item was found and removed
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        fingerprints, firsts, seconds = self._locate_many(items)
+        removed = np.zeros(len(fingerprints), dtype = bool)
+        for index, (fingerprint, first, second) in enumerate(zip(fingerprints.tolist(), firsts.tolist(),
+                                                                 seconds.tolist())):
+            removed[index] = self._delete(fingerprint, first, second, items[index])
+        return removed
+
+    def query_many(self, items: Iterable[Key]) -> np.ndarray:
+        fingerprints, firsts, seconds = self._locate_many(items)
+        slots = self._slots()
+        wanted = fingerprints[:, None]
+        return ((slots[firsts] == wanted) | (slots[seconds] == wanted)).any(axis = 1)
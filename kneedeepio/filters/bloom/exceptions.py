@@ -15,3 +15,23 @@ class TooManyCountsException(BloomFilterException):
 
 class TooFewCountsException(BloomFilterException):
     pass
+
+class IncompatibleFiltersException(BloomFilterException):
+    pass
+
+class SerializationException(BloomFilterException):
+    pass
+
+class FilterFullException(BloomFilterException):
+    pass
+
+class MissingDeltaException(BloomFilterException):
+    # Raised applying a delta that starts after the replica's version
+    pass
+
+class ProtocolException(BloomFilterException):
+    pass
+
+class RemoteException(BloomFilterException):
+    # Raised by the filter client with the message of an error response
+    pass
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import math
+import numpy as np
+import xxhash
+
+from typing import Iterable, List, Tuple, Union
+
+from .exceptions import BloomFilterException
+from .hashing import HASH_STRATEGY_DOUBLE, MASK_64, Key, KeyEncoder, digest_128_many, encode_key
+from .serialization import FILTER_TYPE_FUSE, FilterHeader, SerializableFilter, register_filter_type
+from .storage import allocate_vector, check_vector, vector_array
+
+### GLOBALS ###
+FINGERPRINT_BITS = (8, 16)
+DEFAULT_FINGERPRINT_BITS = 8
+# Seeds tried in turn until the key set can be peeled, failures are rare past the first
+DEFAULT_MAX_ATTEMPTS = 16
+# Longest segment, from the paper
+MAX_SEGMENT_LENGTH = 1 << 18
+
+MASK_32 = (1 << 32) - 1
+
+### FUNCTIONS ###
+def fuse_parameters(num_items: int) -> Tuple[int, int, int]:
+    # Segment length, segment count times segment length, and total slots for a 3-wise binary
+    # fuse filter holding num_items, per "Binary Fuse Filters: Fast and Smaller Than Xor Filters"
+    # by Graf and Lemire
+    num_items = max(num_items, 2)
+    segment_length = min(1 << int(math.log(num_items) / math.log(3.33) + 2.25), MAX_SEGMENT_LENGTH)
+    size_factor = max(1.125, 0.875 + 0.25 * math.log(1000000) / math.log(num_items))
+    capacity = round(num_items * size_factor)
+    segment_count = max(1, (capacity + segment_length - 1) // segment_length - 2)
+    return segment_length, segment_count * segment_length, (segment_count + 2) * segment_length
+
+def fingerprint_dtype(fingerprint_bits: int):
+    return "<u2" if fingerprint_bits == 16 else np.uint8
+
+### CLASSES ###
+@register_filter_type(FILTER_TYPE_FUSE)
+class BinaryFuseFilter(SerializableFilter):
+    """
+    This is a static 3-wise binary fuse filter based on the paper "Binary Fuse Filters: Fast and Smaller Than
+    Xor Filters" by Graf and Lemire.  It is built once from the full key set with build and can't be changed
+    afterwards.  A query reads exactly three slots and compares the XOR of them to the key's fingerprint, giving a
+    false positive rate of 2 ** -fingerprint_bits in about 1.13 * fingerprint_bits bits per key, against 1.44 *
+    log2(1 / fp rate) bits per key for a bloom filter.  Saved filters can be mapped with load like the others.
+    """
+    def __init__(self, size: int, segment_length: int, segment_count_length: int, seed: int = 0,
+                 fingerprint_bits: int = DEFAULT_FINGERPRINT_BITS, num_items: int = 0,
+                 bit_vector: Union[bytearray, memoryview] = None, key_encoder: KeyEncoder = None):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        if fingerprint_bits not in FINGERPRINT_BITS:
+            raise ValueError("Unsupported fingerprint width {}, expected one of {}".format(
+                fingerprint_bits, FINGERPRINT_BITS))
+        self.size: int = size
+        self.segment_length: int = segment_length
+        self.segment_count_length: int = segment_count_length
+        self.seed: int = seed
+        self.fingerprint_bits: int = fingerprint_bits
+        self.num_items: int = num_items
+        # Kept for compatibility with code inspecting the other filters
+        self.hash_strategy: str = HASH_STRATEGY_DOUBLE
+        # Not saved with the filter, set it again after loading
+        self.key_encoder: KeyEncoder = key_encoder if key_encoder is not None else encode_key
+
+        # One fingerprint wide slot per position
+        num_bytes: int = size * fingerprint_bits // 8
+        if bit_vector is None:
+            bit_vector = allocate_vector(num_bytes)
+        check_vector(bit_vector, num_bytes)
+        self.bit_vector = bit_vector
+
+    @classmethod
+    def build(cls, items: Iterable[Key], fingerprint_bits: int = DEFAULT_FINGERPRINT_BITS, seed: int = 0,
+              max_attempts: int = DEFAULT_MAX_ATTEMPTS, key_encoder: KeyEncoder = None) -> "BinaryFuseFilter":
+        # Builds the filter holding items, duplicates are allowed
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        segment_length, segment_count_length, size = fuse_parameters(len(items))
+        for attempt in range(max_attempts):
+            bloom = cls(size = size, segment_length = segment_length, segment_count_length = segment_count_length,
+                        seed = seed + attempt, fingerprint_bits = fingerprint_bits, key_encoder = key_encoder)
+            hashes = np.sort(digest_128_many(items, bloom.seed, bloom.key_encoder)[:, 0])
+            # Duplicate keys would never peel, sorting is much cheaper than np.unique here
+            unique = np.ones(len(hashes), dtype = bool)
+            unique[1:] = hashes[1:] != hashes[:-1]
+            hashes = hashes[unique]
+            bloom.num_items = len(hashes)
+            if bloom._construct(hashes):
+                return bloom
+            bloom.logger.debug("Seed %d didn't peel, retrying", bloom.seed)
+        raise BloomFilterException("Couldn't build a filter of {} items in {} attempts".format(
+            len(items), max_attempts))
+
+    def serialization_header(self) -> FilterHeader:
+        return self.header_for(counter_bits = self.fingerprint_bits, seeds = [self.seed],
+                               extra = [self.segment_length, self.segment_count_length, self.num_items])
+
+    @classmethod
+    def from_header(cls, header: FilterHeader, bit_vector: Union[bytearray, memoryview]):
+        return cls(size = header.size, segment_length = header.extra[0], segment_count_length = header.extra[1],
+                   seed = header.seeds[0], fingerprint_bits = header.counter_bits, num_items = header.extra[2],
+                   bit_vector = bit_vector)
+
+    def false_positive_rate(self) -> float:
+        return 1 / (1 << self.fingerprint_bits)
+
+    def __len__(self) -> int:
+        return self.num_items
+
+    def _positions(self, digest: int) -> List[int]:
+        first = (digest * self.segment_count_length) >> 64
+        second = (first + self.segment_length) ^ ((digest >> 18) & (self.segment_length - 1))
+        third = (first + 2 * self.segment_length) ^ (digest & (self.segment_length - 1))
+        return [first, second, third]
+
+    def _positions_many(self, digests: np.ndarray) -> np.ndarray:
+        # The high 64 bits of digests * segment_count_length, which is below 2 ** 32, without 128 bit integers
+        length = np.uint64(self.segment_count_length)
+        high = (digests >> np.uint64(32)) * length + (((digests & np.uint64(MASK_32)) * length) >> np.uint64(32))
+        first = high >> np.uint64(32)
+        mask = np.uint64(self.segment_length - 1)
+        segment = np.uint64(self.segment_length)
+        second = (first + segment) ^ ((digests >> np.uint64(18)) & mask)
+        third = (first + np.uint64(2) * segment) ^ (digests & mask)
+        return np.stack([first, second, third], axis = 1).astype(np.intp)
+
+    def _fingerprint(self, digest: int) -> int:
+        return (digest ^ (digest >> 32)) & ((1 << self.fingerprint_bits) - 1)
+
+    def _fingerprints_many(self, digests: np.ndarray) -> np.ndarray:
+        mixed = (digests ^ (digests >> np.uint64(32))) & np.uint64((1 << self.fingerprint_bits) - 1)
+        return mixed.astype(fingerprint_dtype(self.fingerprint_bits))
+
+    def _peel(self, positions: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+        # Peels the 3-hypergraph of keys and slots, returning the keys peeled in each round with the slot each
+        # was peeled from, or None if some keys can't be peeled.  Each round peels every key that is alone in
+        # one of its slots at once.
+        num_keys = len(positions)
+        counts = np.bincount(positions.ravel(), minlength = self.size).astype(np.int32)
+        # XOR of the indices of the keys in each slot, the key itself once only one is left
+        key_xor = np.zeros(self.size, dtype = np.int64)
+        np.bitwise_xor.at(key_xor, positions.ravel(), np.repeat(np.arange(num_keys, dtype = np.int64), 3))
+        rounds = []
+        peeled = 0
+        frontier = np.flatnonzero(counts == 1)
+        while frontier.size:
+            slots = frontier[counts[frontier] == 1]
+            keys, first_seen = np.unique(key_xor[slots], return_index = True)
+            if keys.size == 0:
+                break
+            rounds.append((keys, slots[first_seen]))
+            peeled += keys.size
+            touched = positions[keys].ravel()
+            np.subtract.at(counts, touched, 1)
+            np.bitwise_xor.at(key_xor, touched, np.repeat(keys, 3))
+            # Duplicates are harmless, keys are made unique above
+            frontier = touched
+        return rounds if peeled == num_keys else None
+
+    def _construct(self, hashes: np.ndarray) -> bool:
+        # Assigns the slots in reverse peeling order, so each key's slot is written after those of every key
+        # sharing its other slots.  A key peeled in a round doesn't touch the slot any other key of the round
+        # was peeled from, so a round's slots are assigned together.
+        positions = self._positions_many(hashes)
+        rounds = self._peel(positions)
+        if rounds is None:
+            return False
+        fingerprints = self._fingerprints_many(hashes)
+        slots_array = vector_array(self.bit_vector, writable = True, dtype = fingerprint_dtype(self.fingerprint_bits))
+        for keys, slots in reversed(rounds):
+            key_positions = positions[keys]
+            slots_array[slots] = (fingerprints[keys] ^ slots_array[key_positions[:, 0]]
+                                  ^ slots_array[key_positions[:, 1]] ^ slots_array[key_positions[:, 2]])
+        return True
+
+    def query(self, item: Key) -> bool:
+        digest = xxhash.xxh3_128_intdigest(self.key_encoder(item), self.seed) & MASK_64
+        first, second, third = self._positions(digest)
+        if self.fingerprint_bits == 8:
+            found = self.bit_vector[first] ^ self.bit_vector[second] ^ self.bit_vector[third]
+        else:
+            found = 0
+            for position in (first, second, third):
+                found ^= self.bit_vector[position << 1] | (self.bit_vector[(position << 1) + 1] << 8)
+        return found == self._fingerprint(digest)
+
+    def query_many(self, items: Iterable[Key]) -> np.ndarray:
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        digests = digest_128_many(items, self.seed, self.key_encoder)[:, 0]
+        positions = self._positions_many(digests)
+        slots = vector_array(self.bit_vector, dtype = fingerprint_dtype(self.fingerprint_bits))
+        found = slots[positions[:, 0]] ^ slots[positions[:, 1]] ^ slots[positions[:, 2]]
+        return found == self._fingerprints_many(digests)
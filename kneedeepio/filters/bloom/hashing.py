@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import struct
+import numpy as np
+import xxhash
+
+from typing import Any, Callable, Iterable, List, Sequence, Tuple, Union
+
+from .exceptions import IncompatibleFiltersException
+
+### GLOBALS ###
+# One xxh64 pass per seed, each seed giving one index.
+HASH_STRATEGY_SEEDED = "seeded"
+# One xxh3_128 pass seeded with the first seed, every index derived from it with
+# Kirsch-Mitzenmacher double hashing: index_i = (h1 + i * h2) mod 2^64 mod size.
+HASH_STRATEGY_DOUBLE = "double"
+HASH_STRATEGIES = (HASH_STRATEGY_SEEDED, HASH_STRATEGY_DOUBLE)
+
+MASK_64 = (1 << 64) - 1
+
+# Integer keys are hashed as this many little endian bytes
+INT_KEY_BYTES = 8
+
+# A key is anything the filter's key encoder accepts, by default one of these
+Key = Union[str, bytes, bytearray, memoryview, int]
+# Turns a key into the bytes that are hashed
+KeyEncoder = Callable[[Any], Union[bytes, bytearray, memoryview]]
+
+### FUNCTIONS ###
+def check_hash_strategy(hash_strategy: str):
+    if hash_strategy not in HASH_STRATEGIES:
+        raise ValueError("Unknown hash strategy {}, expected one of {}".format(hash_strategy, HASH_STRATEGIES))
+
+def encode_key(item: Key) -> Union[bytes, bytearray, memoryview]:
+    # The default key encoder.  str is hashed as UTF-8, so hashes match those of earlier versions, bytes-like
+    # objects as they are without copying, and integers as INT_KEY_BYTES little endian bytes, two's complement
+    # when negative.
+    if isinstance(item, str):
+        return item.encode("utf-8")
+    if isinstance(item, (bytes, bytearray, memoryview)):
+        return item
+    if isinstance(item, (int, np.integer)):
+        return int(item).to_bytes(INT_KEY_BYTES, "little", signed = item < 0)
+    raise TypeError("Can't hash a key of type {}, give the filter a key_encoder".format(type(item).__name__))
+
+def encode_keys(items: Iterable[Key], key_encoder: KeyEncoder = encode_key) -> Sequence:
+    # Encodes a batch of keys, giving the same bytes as key_encoder on each.  With the default encoder
+    # batches of a single key type skip the per key dispatch and integer arrays are sliced out of one buffer.
+    if not isinstance(items, (list, tuple, np.ndarray)):
+        items = list(items)
+    if key_encoder is encode_key:
+        if isinstance(items, np.ndarray) and items.dtype.kind in "iu":
+            dtype = "<i8" if items.dtype.kind == "i" else "<u8"
+            data = memoryview(np.ascontiguousarray(items.ravel(), dtype = dtype)).cast("B")
+            return [data[start:start + INT_KEY_BYTES] for start in range(0, len(data), INT_KEY_BYTES)]
+        kinds = set(map(type, items))
+        if kinds == {str}:
+            return list(map(str.encode, items))
+        if kinds <= {bytes, bytearray, memoryview}:
+            return items
+    return [key_encoder(item) for item in items]
+
+def struct_key_encoder(key_format: str) -> KeyEncoder:
+    # Key encoder for tuples of fixed width fields, such as "<QI" for a 64 bit and a 32 bit integer
+    return StructKeyEncoder(key_format)
+
+def digest_128_keys(keys: Sequence, seed: int) -> np.ndarray:
+    # xxh3_128 digests of already encoded keys as an array of shape (keys, 2) holding the low and high halves
+    digests = np.frombuffer(b"".join([xxhash.xxh3_128_digest(key, seed) for key in keys]), dtype = ">u8")
+    # The canonical digest is big endian with the high half first
+    return digests.reshape(len(keys), 2)[:, ::-1].astype(np.uint64)
+
+def digest_128_many(items: Iterable[Key], seed: int, key_encoder: KeyEncoder = encode_key) -> np.ndarray:
+    return digest_128_keys(encode_keys(items, key_encoder), seed)
+
+def hash_indices(item: Key, size: int, seeds: List[int], hash_strategy: str = HASH_STRATEGY_SEEDED,
+                 key_encoder: KeyEncoder = encode_key) -> List[int]:
+    # Calculate the filter indices for a single item, or take them from a Probe
+    if isinstance(item, Probe):
+        return item.indices_for(size, seeds, hash_strategy)
+    key = key_encoder(item)
+    if hash_strategy == HASH_STRATEGY_DOUBLE:
+        digest = xxhash.xxh3_128_intdigest(key, seeds[0])
+        combined = digest & MASK_64
+        step = digest >> 64
+        indices = []
+        for _ in seeds:
+            indices.append(combined % size)
+            combined = (combined + step) & MASK_64
+        return indices
+    return [xxhash.xxh64_intdigest(key, seed) % size for seed in seeds]
+
+def hash_indices_many(items: Iterable[Key], size: int, seeds: List[int], hash_strategy: str = HASH_STRATEGY_SEEDED,
+                      key_encoder: KeyEncoder = encode_key) -> np.ndarray:
+    # Calculate the filter indices for a batch of items as an array of shape (items, seeds)
+    keys = encode_keys(items, key_encoder)
+    if hash_strategy == HASH_STRATEGY_DOUBLE:
+        digests = digest_128_keys(keys, seeds[0])
+        steps = np.arange(len(seeds), dtype = np.uint64)
+        # uint64 arithmetic wraps, matching the mod 2^64 of the single item path.
+        digests = digests[:, 0:1] + steps * digests[:, 1:2]
+    else:
+        digests = np.fromiter(
+            (xxhash.xxh64_intdigest(key, seed) for key in keys for seed in seeds),
+            dtype = np.uint64,
+            count = len(keys) * len(seeds)
+        )
+    indices = digests % np.uint64(size)
+    return indices.astype(np.intp).reshape(len(keys), len(seeds))
+
+def prehashed_indices(digest: int, size: int, num_hashes: int) -> List[int]:
+    # Filter indices for a 64 bit hash the caller already has, by double hashing with the hash rotated by
+    # 32 bits, made odd, as the step.  The filter's seeds and hash strategy don't apply.
+    digest &= MASK_64
+    step = (((digest << 32) | (digest >> 32)) & MASK_64) | 1
+    indices = []
+    for _ in range(num_hashes):
+        indices.append(digest % size)
+        digest = (digest + step) & MASK_64
+    return indices
+
+def prehashed_indices_many(digests: Iterable[int], size: int, num_hashes: int) -> np.ndarray:
+    # prehashed_indices for a batch of 64 bit hashes, as an array of shape (hashes, num_hashes)
+    digests = np.asarray(digests).astype(np.uint64).ravel()
+    step = ((digests << np.uint64(32)) | (digests >> np.uint64(32))) | np.uint64(1)
+    combined = digests[:, None] + np.arange(num_hashes, dtype = np.uint64) * step[:, None]
+    return (combined % np.uint64(size)).astype(np.intp)
+
+def compute_indices(item: Key, size: int, seeds: List[int], hash_strategy: str = HASH_STRATEGY_SEEDED,
+                    key_encoder: KeyEncoder = encode_key) -> "Probe":
+    # Hashes the item once for every filter of this size, seeds and hash strategy
+    return Probe(size, seeds, hash_strategy, hash_indices(item, size, seeds, hash_strategy, key_encoder))
+
+### CLASSES ###
+class Probe:
+    """
+    The indices of one item in filters of one size, set of seeds and hash strategy.  A probe can be passed
+    in place of the item to add, query or remove of any such filter, which then skips hashing.  Probes don't
+    record the key encoder, so filters must encode keys the same way as the one the probe was made for.
+    """
+    __slots__ = ("size", "seeds", "hash_strategy", "indices")
+
+    def __init__(self, size: int, seeds: List[int], hash_strategy: str, indices: List[int]):
+        self.size: int = size
+        self.seeds: Tuple[int, ...] = tuple(seeds)
+        self.hash_strategy: str = hash_strategy
+        self.indices: List[int] = indices
+
+    def __repr__(self) -> str:
+        return "Probe({})".format(self.indices)
+
+    def indices_for(self, size: int, seeds: List[int], hash_strategy: str) -> List[int]:
+        if size != self.size or hash_strategy != self.hash_strategy or tuple(seeds) != self.seeds:
+            raise IncompatibleFiltersException(
+                "Probe is for size {}, seeds {} and hash strategy {}, not {}, {} and {}".format(
+                    self.size, list(self.seeds), self.hash_strategy, size, seeds, hash_strategy))
+        return self.indices
+
+class HashedFilter:
+    """
+    Mixin giving a filter of size slots, seeds and a hash strategy the methods turning items, or 64 bit hashes
+    of them, into its indices, for the index level methods of the filter.
+    """
+    size: int
+    seeds: List[int]
+    hash_strategy: str
+    key_encoder: KeyEncoder
+
+    def indices(self, item: Key) -> List[int]:
+        return hash_indices(item, self.size, self.seeds, self.hash_strategy, self.key_encoder)
+
+    def indices_many(self, items: Iterable[Key]) -> np.ndarray:
+        return hash_indices_many(items, self.size, self.seeds, self.hash_strategy, self.key_encoder)
+
+    def probe(self, item: Key) -> Probe:
+        # Hashes the item once, to pass in place of it to this or any other filter of the same size, seeds and
+        # hash strategy
+        return compute_indices(item, self.size, self.seeds, self.hash_strategy, self.key_encoder)
+
+    # For callers that already have a 64 bit hash of each item, the indices are derived from it instead
+    # of hashing the item again.  Pass them to the index methods.
+    def prehashed_indices(self, digest: int) -> List[int]:
+        return prehashed_indices(digest, self.size, len(self.seeds))
+
+    def prehashed_indices_many(self, digests: Iterable[int]) -> np.ndarray:
+        return prehashed_indices_many(digests, self.size, len(self.seeds))
+
+class StructKeyEncoder:
+    """
+    Key encoder packing tuples of fixed width fields with a struct format.  Unlike a closure it pickles, by its
+    format, so filters using it can be built by worker processes however they are started.
+    """
+    def __init__(self, key_format: str):
+        self.key_format: str = key_format
+        self.packer = struct.Struct(key_format)
+
+    def __call__(self, item: tuple) -> bytes:
+        return self.packer.pack(*item)
+
+    def __reduce__(self):
+        return (type(self), (self.key_format,))
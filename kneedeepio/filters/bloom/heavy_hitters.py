@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import heapq
+import itertools
+import logging
+import numpy as np
+
+from typing import Dict, Iterable, List, Tuple
+
+from .counting import CountingBloomFilter
+from .hashing import Key
+
+### GLOBALS ###
+# Stale heap entries allowed, as a multiple of num_items, before the heap is rebuilt
+HEAP_SLACK = 4
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class HeavyHitters:
+    """
+    This is a top-k heavy hitters tracker kept alongside a CountingBloomFilter, based on the count-min sketch
+    heap of "An Improved Data Stream Summary: The Count-Min Sketch and its Applications" by Cormode and
+    Muthukrishnan.  Every add goes to the filter and the item's count estimate is compared to the smallest
+    tracked one, so only num_items items are held however many distinct items are added.  The counts are those
+    of the filter, with its error bounds, as of the item's last add.  Items must be hashable.
+    """
+    def __init__(self, bloom: CountingBloomFilter, num_items: int = 10):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        if num_items <= 0:
+            raise ValueError("Number of items must be positive")
+        self.bloom: CountingBloomFilter = bloom
+        self.num_items: int = num_items
+        self.counts: Dict[Key, int] = {}
+        # Min heap of (count, sequence, item), entries no longer matching counts are dropped lazily
+        self.heap: List[Tuple[int, int, Key]] = []
+        self.sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def __contains__(self, item: Key) -> bool:
+        return item in self.counts
+
+    def _push(self, item: Key, count: int):
+        self.counts[item] = count
+        heapq.heappush(self.heap, (count, next(self.sequence), item))
+        if len(self.heap) > HEAP_SLACK * self.num_items:
+            self.heap = [(value, next(self.sequence), key) for key, value in self.counts.items()]
+            heapq.heapify(self.heap)
+
+    def _smallest(self) -> Tuple[int, Key]:
+        while self.counts.get(self.heap[0][2]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0], self.heap[0][2]
+
+    def offer(self, item: Key, count: int):
+        # Tracks item with its count if it is among the largest
+        if item in self.counts or len(self.counts) < self.num_items:
+            self._push(item, count)
+            return
+        smallest, evicted = self._smallest()
+        if count > smallest:
+            del self.counts[evicted]
+            self._push(item, count)
+
+    def add(self, item: Key) -> int:
+        # Returns the item's count estimate after adding it
+        self.bloom.add(item)
+        count = self.bloom.count(item)
+        self.offer(item, count)
+        return count
+
+    def add_many(self, items: Iterable[Key]) -> np.ndarray:
+        # Returns the count estimate of every item once the whole batch is added
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        self.bloom.add_many(items)
+        counts = self.bloom.count_many(items)
+        keys = items.tolist() if isinstance(items, np.ndarray) else items
+        for item, count in dict(zip(keys, counts.tolist())).items():
+            self.offer(item, count)
+        return counts
+
+    def top(self, num_items: int = None) -> List[Tuple[Key, int]]:
+        # The tracked items and their counts, largest first
+        ranked = sorted(self.counts.items(), key = lambda entry: entry[1], reverse = True)
+        return ranked[:num_items] if num_items is not None else ranked
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import bz2
+import csv
+import gzip
+import io
+import logging
+import lzma
+import os
+import sys
+import time
+
+from typing import Callable, Iterable, Iterator, List, NamedTuple, TextIO, Tuple, Union
+
+from .counting import CountingBloomFilter
+from .cuckoo import CuckooFilter
+from .fuse import BinaryFuseFilter
+from .hashing import HASH_STRATEGY_DOUBLE
+from .parallel import iter_chunks, parallel_build
+from .simple import SimpleBloomFilter
+from .utils import optimal_number_of_hashes, optimal_size_of_filter
+
+### GLOBALS ###
+# Items handed to add_many at a time
+DEFAULT_CHUNK_SIZE = 100000
+# Bytes of input read to estimate the number of lines in a file
+DEFAULT_SAMPLE_BYTES = 4 * 1024 * 1024
+# Text read buffer, large reads keep the per line cost down
+READ_BUFFER_BYTES = 1024 * 1024
+
+# Decompressors by file extension
+OPENERS = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open,
+}
+
+FILTER_TYPES = ("simple", "counting", "cuckoo", "fuse")
+# Filter types parallel_build can merge, which workers > 1 needs
+PARALLEL_TYPES = ("simple", "counting")
+
+### FUNCTIONS ###
+def open_input(path: str) -> TextIO:
+    # Opens path as text, decompressing by extension.  "-" reads standard input.
+    if path == "-":
+        return io.TextIOWrapper(sys.stdin.buffer, encoding = "utf-8", newline = "")
+    opener = OPENERS.get(os.path.splitext(path)[1].lower())
+    if opener is not None:
+        return opener(path, "rt", encoding = "utf-8", newline = "")
+    return open(path, "r", encoding = "utf-8", newline = "", buffering = READ_BUFFER_BYTES)
+
+def iter_lines(fileobj: TextIO, skip_empty: bool = True) -> Iterator[str]:
+    # Lines without their line endings, split out of large blocks which is about twice as fast as
+    # iterating over the file
+    remainder = ""
+    while True:
+        block = fileobj.read(READ_BUFFER_BYTES)
+        if not block:
+            break
+        block = remainder + block
+        lines = block.split("\n")
+        remainder = lines.pop()
+        if "\r" in block:
+            lines = [line.rstrip("\r") for line in lines]
+        if skip_empty:
+            yield from filter(None, lines)
+        else:
+            yield from lines
+    # Text after the last line ending, if any, is a last line
+    remainder = remainder.rstrip("\r")
+    if remainder:
+        yield remainder
+
+def iter_csv_column(fileobj: TextIO, column: Union[int, str], delimiter: str = ",",
+                    has_header: bool = True) -> Iterator[str]:
+    # Values of one column, chosen by index or, with a header row, by name
+    reader = csv.reader(fileobj, delimiter = delimiter)
+    header = next(reader, None) if has_header else None
+    if isinstance(column, str):
+        if header is None or column not in header:
+            raise ValueError("Column {} not found in header {}".format(column, header))
+        column = header.index(column)
+    for row in reader:
+        if column < len(row):
+            yield row[column]
+
+def iter_items(paths: Iterable[str], column: Union[int, str] = None, delimiter: str = ",",
+               has_header: bool = True) -> Iterator[str]:
+    # Every line, or every value of column, of every file in turn
+    for path in paths:
+        with open_input(path) as fileobj:
+            if column is None:
+                yield from iter_lines(fileobj)
+            else:
+                yield from iter_csv_column(fileobj, column, delimiter, has_header)
+
+def estimate_line_count(path: str, sample_bytes: int = DEFAULT_SAMPLE_BYTES) -> int:
+    # Estimates the lines in a file from the lines in its first sample_bytes, measured in bytes on disk
+    # so that compressed files scale by their compression ratio
+    total_bytes = os.path.getsize(path)
+    opener = OPENERS.get(os.path.splitext(path)[1].lower())
+    with open(path, "rb") as raw:
+        stream = opener(raw, "rb") if opener is not None else raw
+        lines = 0
+        last = b"\n"
+        while raw.tell() < sample_bytes:
+            chunk = stream.read(READ_BUFFER_BYTES)
+            if not chunk:
+                # The whole file fit in the sample, count a last line without a line ending too
+                return lines + (last != b"\n")
+            lines += chunk.count(b"\n")
+            last = chunk[-1:]
+        return max(1, round(lines * total_bytes / raw.tell()))
+
+def size_filter(fp_rate: float, num_items: int) -> Tuple[int, List[int]]:
+    # Size and seeds of a bloom filter holding num_items at fp_rate
+    size = max(8, optimal_size_of_filter(fp_rate, max(1, num_items)))
+    num_hashes = optimal_number_of_hashes(size, max(1, num_items))
+    return size, list(range(num_hashes))
+
+def make_filter(filter_type: str, fp_rate: float, num_items: int, hash_strategy: str = HASH_STRATEGY_DOUBLE):
+    # An empty filter sized for num_items at fp_rate.  Static filters are built from their items
+    # by build_filter instead.
+    if filter_type == "cuckoo":
+        # A query compares against two buckets of four fingerprints
+        return CuckooFilter.for_capacity(num_items, fingerprint_bits = 8 if fp_rate >= 8 / 256 else 16)
+    size, seeds = size_filter(fp_rate, num_items)
+    if filter_type == "counting":
+        return CountingBloomFilter(size = size, seeds = seeds, hash_strategy = hash_strategy)
+    if filter_type == "simple":
+        return SimpleBloomFilter(size = size, seeds = seeds, hash_strategy = hash_strategy)
+    raise ValueError("Unknown filter type {}, expected one of {}".format(filter_type, FILTER_TYPES))
+
+def ingest(bloom, items: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1,
+           progress: Callable[[int, float], None] = None) -> "IngestReport":
+    # Adds items to bloom chunk_size at a time and reports the throughput.  progress, if given, is
+    # called with the items added and seconds elapsed after each chunk.  More than one worker hands
+    # the chunks to parallel_build, which supports simple and counting filters.
+    start = time.perf_counter()
+    if workers > 1:
+        total = parallel_build(bloom, items, max_workers = workers, chunk_size = chunk_size)
+    else:
+        total = 0
+        for chunk in iter_chunks(items, chunk_size):
+            bloom.add_many(chunk)
+            total += len(chunk)
+            if progress is not None:
+                progress(total, time.perf_counter() - start)
+    return IngestReport(total, time.perf_counter() - start)
+
+def build_filter(items: Iterable[str], filter_type: str = "simple", fp_rate: float = 0.01, num_items: int = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1,
+                 progress: Callable[[int, float], None] = None):
+    # Builds a filter of filter_type holding items, sized for num_items at fp_rate, and returns it with
+    # the ingest report.  A fuse filter holds all of the items in memory while it is built.
+    if workers > 1 and filter_type not in PARALLEL_TYPES:
+        raise ValueError("A {} filter can't be built with more than one worker, only {} can".format(
+            filter_type, " and ".join(PARALLEL_TYPES)))
+    if filter_type == "fuse":
+        start = time.perf_counter()
+        items = list(items)
+        bloom = BinaryFuseFilter.build(items, fingerprint_bits = 8 if fp_rate >= 1 / 256 else 16)
+        return bloom, IngestReport(len(items), time.perf_counter() - start)
+    if num_items is None:
+        raise ValueError("num_items is needed to size a {} filter".format(filter_type))
+    bloom = make_filter(filter_type, fp_rate, num_items)
+    report = ingest(bloom, items, chunk_size = chunk_size, workers = workers, progress = progress)
+    if report.items > num_items:
+        logging.getLogger(__name__).warning("Added %d items to a filter sized for %d, the FP rate will be higher",
+                                            report.items, num_items)
+    return bloom, report
+
+### CLASSES ###
+class IngestReport(NamedTuple):
+    items: int
+    seconds: float
+
+    @property
+    def items_per_second(self) -> float:
+        return self.items / self.seconds if self.seconds > 0 else 0.0
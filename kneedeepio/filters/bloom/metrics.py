@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import functools
+import math
+import time
+
+from typing import Callable, Iterable, List
+
+from .utils import estimate_num_items, false_positive_rate
+
+### GLOBALS ###
+# Methods wrapped by enable_metrics, grouped by what they count
+COUNTED_ADDS = ("add", "add_many")
+COUNTED_REMOVES = ("remove", "remove_many")
+COUNTED_QUERIES = ("query", "query_many")
+
+### FUNCTIONS ###
+def _timed(method: Callable, name: str, timing_hook: Callable[[str, float], None]) -> Callable:
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timing_hook(name, time.perf_counter() - start)
+    return timed
+
+def _counted_single(method: Callable, metrics: "FilterMetrics", field: str) -> Callable:
+    @functools.wraps(method)
+    def counted(item, *args, **kwargs):
+        setattr(metrics, field, getattr(metrics, field) + 1)
+        return method(item, *args, **kwargs)
+    return counted
+
+def _counted_many(method: Callable, metrics: "FilterMetrics", field: str) -> Callable:
+    @functools.wraps(method)
+    def counted(items: Iterable, *args, **kwargs):
+        if not isinstance(items, (list, tuple)):
+            items = list(items)
+        setattr(metrics, field, getattr(metrics, field) + len(items))
+        return method(items, *args, **kwargs)
+    return counted
+
+def _counted_query(method: Callable, metrics: "FilterMetrics") -> Callable:
+    @functools.wraps(method)
+    def counted(item, *args, **kwargs):
+        result = method(item, *args, **kwargs)
+        metrics.queries += 1
+        if result:
+            metrics.positives += 1
+        else:
+            metrics.negatives += 1
+        return result
+    return counted
+
+def _counted_query_many(method: Callable, metrics: "FilterMetrics") -> Callable:
+    @functools.wraps(method)
+    def counted(items: Iterable, *args, **kwargs):
+        result = method(items, *args, **kwargs)
+        positives = int(result.sum())
+        metrics.queries += len(result)
+        metrics.positives += positives
+        metrics.negatives += len(result) - positives
+        return result
+    return counted
+
+### CLASSES ###
+class FilterMetrics:
+    """
+    Running counts of the operations on one filter, updated while metrics are enabled on it.  Saturations are
+    adds that found a counter already at its maximum and underflows are removes that found one at zero, both
+    counted per counter rather than per item.
+    """
+    FIELDS = ("adds", "removes", "queries", "positives", "negatives", "saturations", "underflows")
+
+    def __init__(self, timing_hook: Callable[[str, float], None] = None):
+        self.timing_hook = timing_hook
+        self.adds: int = 0
+        self.removes: int = 0
+        self.queries: int = 0
+        self.positives: int = 0
+        self.negatives: int = 0
+        self.saturations: int = 0
+        self.underflows: int = 0
+
+    def reset(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+class InstrumentedFilter:
+    """
+    Mixin adding opt-in metrics to a filter.  enable_metrics wraps the public add, remove and query methods of
+    this instance only, so a filter with metrics disabled runs the plain class methods with no extra work.  Code
+    working on precomputed indices, such as ConcurrentBloomFilter, bypasses the wrappers and isn't counted.
+    """
+    size: int
+    seeds: List[int]
+    # Replaced per instance by enable_metrics
+    metrics: FilterMetrics = None
+
+    def popcount(self) -> int:
+        # Number of set bits, or non zero counters
+        raise NotImplementedError
+
+    def enable_metrics(self, timing_hook: Callable[[str, float], None] = None) -> FilterMetrics:
+        # timing_hook, if given, is called with the method name and the call's duration in seconds
+        self.disable_metrics()
+        metrics = FilterMetrics(timing_hook)
+        for name in COUNTED_ADDS + COUNTED_REMOVES + COUNTED_QUERIES:
+            method = getattr(self, name, None)
+            if method is None:
+                continue
+            if timing_hook is not None:
+                method = _timed(method, name, timing_hook)
+            if name == "query":
+                method = _counted_query(method, metrics)
+            elif name == "query_many":
+                method = _counted_query_many(method, metrics)
+            else:
+                field = "adds" if name in COUNTED_ADDS else "removes"
+                wrap = _counted_many if name.endswith("_many") else _counted_single
+                method = wrap(method, metrics, field)
+            setattr(self, name, method)
+        self.metrics = metrics
+        return metrics
+
+    def disable_metrics(self):
+        # Drop the instance wrappers so lookups fall back to the class methods
+        for name in COUNTED_ADDS + COUNTED_REMOVES + COUNTED_QUERIES + ("metrics",):
+            self.__dict__.pop(name, None)
+
+    def _record(self, field: str, count: int = 1):
+        # For the rare events counted from inside the filter, such as saturations
+        if self.metrics is not None:
+            setattr(self.metrics, field, getattr(self.metrics, field) + count)
+
+    def stats(self) -> dict:
+        # Snapshot of how full the filter is and its false positive rate at that fill, plus the
+        # operation counts while metrics are enabled
+        num_hashes = len(self.seeds)
+        slots_set = self.popcount()
+        estimated_items = estimate_num_items(self.size, num_hashes, slots_set)
+        if math.isinf(estimated_items):
+            fp_rate = 1.0
+        else:
+            fp_rate = false_positive_rate(self.size, num_hashes, estimated_items)
+        stats = {
+            "size": self.size,
+            "num_hashes": num_hashes,
+            "slots_set": slots_set,
+            "fill_ratio": slots_set / self.size,
+            "estimated_items": estimated_items,
+            "estimated_fp_rate": fp_rate,
+        }
+        if self.metrics is not None:
+            stats.update(self.metrics.as_dict())
+        return stats
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import concurrent.futures
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import queue
+
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Iterator, List, Tuple
+
+from .serialization import FILTER_TYPES, FilterHeader, SerializableFilter
+
+### GLOBALS ###
+DEFAULT_CHUNK_SIZE = 100000
+
+# State of a worker process, set up once by _init_worker
+_WORKER_MEMORY = None
+_WORKER_FILTER = None
+
+### FUNCTIONS ###
+def _init_worker(header: FilterHeader, segments: multiprocessing.Queue, ignore_errors: bool, key_encoder):
+    # Each worker claims one segment and builds its filter directly inside it
+    global _WORKER_MEMORY, _WORKER_FILTER  # pylint: disable=global-statement
+    # Workers share the parent's resource tracker, so attaching here doesn't take ownership
+    _WORKER_MEMORY = SharedMemory(name = segments.get())
+    _WORKER_FILTER = FILTER_TYPES[header.filter_type].from_header(header, _WORKER_MEMORY.buf[:header.payload_length])
+    if ignore_errors is not None:
+        _WORKER_FILTER.ignore_errors = ignore_errors
+    # The key encoder isn't part of the header
+    if key_encoder is not None:
+        _WORKER_FILTER.key_encoder = key_encoder
+
+def _add_chunk(chunk: List[str]) -> int:
+    _WORKER_FILTER.add_many(chunk)
+    return len(chunk)
+
+def iter_chunks(items: Iterable[str], chunk_size: int) -> Iterator[List[str]]:
+    iterator = iter(items)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def check_picklable(key_encoder):
+    # Raises ValueError unless the key encoder can be sent to worker processes, whatever their start method
+    try:
+        pickle.dumps(key_encoder)
+    except (pickle.PicklingError, TypeError, AttributeError) as error:
+        raise ValueError("The filter's key encoder {!r} can't be sent to worker processes, use a module level "
+                         "function or a picklable callable: {}".format(key_encoder, error)) from error
+
+def check_mergeable(bloom: SerializableFilter):
+    # Raises TypeError unless the workers' filters can be merged into bloom
+    if not hasattr(bloom, "merge_vector"):
+        raise TypeError("Can't build a {} in parallel, it has no merge_vector".format(type(bloom).__name__))
+
+def _create_segments(num_segments: int, num_bytes: int) -> Tuple[List[SharedMemory], multiprocessing.Queue]:
+    # Shared memory segments for the workers, with a queue of their names for the workers to claim them from
+    segments = []
+    try:
+        for _ in range(num_segments):
+            segments.append(SharedMemory(create = True, size = max(1, num_bytes)))
+        available = multiprocessing.Queue()
+    except BaseException:
+        _release_segments(segments)
+        raise
+    for segment in segments:
+        available.put(segment.name)
+    return segments, available
+
+def _release_segments(segments: List[SharedMemory]):
+    for segment in segments:
+        segment.close()
+        segment.unlink()
+
+def _submit_chunks(executor: concurrent.futures.Executor, items: Iterable[str], chunk_size: int,
+                   max_in_flight: int) -> int:
+    # Sends the items to the workers a chunk at a time, returning how many were added
+    total = 0
+    pending = set()
+    for chunk in iter_chunks(items, chunk_size):
+        if len(pending) >= max_in_flight:
+            done, pending = concurrent.futures.wait(pending, return_when = concurrent.futures.FIRST_COMPLETED)
+            total += sum(future.result() for future in done)
+        pending.add(executor.submit(_add_chunk, chunk))
+    return total + sum(future.result() for future in concurrent.futures.as_completed(pending))
+
+def _claimed_segments(segments: List[SharedMemory], available: multiprocessing.Queue) -> List[SharedMemory]:
+    # Segments no worker claimed are still in the queue, and still empty
+    unclaimed = set()
+    while True:
+        try:
+            unclaimed.add(available.get_nowait())
+        except queue.Empty:
+            break
+    available.close()
+    return [segment for segment in segments if segment.name not in unclaimed]
+
+def parallel_build(bloom: SerializableFilter, items: Iterable[str], max_workers: int = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    # Adds items to bloom using a pool of worker processes and returns the number of items added.
+    #
+    # Every worker fills a filter with the configuration of bloom, held in a shared memory segment
+    # created here, so the vectors never pass through pickle.  Once the input is exhausted each
+    # segment is merged into bloom with merge_vector, a bitwise OR for plain filters and a saturating
+    # add for counting filters, which is one pass over the vector per worker.  Only chunks of items
+    # are sent to the workers, and at most two chunks per worker are in flight at a time.  The
+    # filter's key encoder is sent to the workers so must pickle, which lambdas and closures don't.
+    max_workers = max_workers or os.cpu_count() or 1
+    check_mergeable(bloom)
+    check_picklable(getattr(bloom, "key_encoder", None))
+    header = bloom.serialization_header()
+    segments, available = _create_segments(max_workers, header.payload_length)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers = max_workers,
+                initializer = _init_worker,
+                initargs = (header, available, getattr(bloom, "ignore_errors", None),
+                            getattr(bloom, "key_encoder", None))) as executor:
+            total = _submit_chunks(executor, items, chunk_size, 2 * max_workers)
+        claimed = _claimed_segments(segments, available)
+        for segment in claimed:
+            with segment.buf[:header.payload_length] as vector:
+                bloom.merge_vector(vector)
+        logging.getLogger(__name__).debug("Added %d items using %d workers", total, len(claimed))
+        return total
+    finally:
+        _release_segments(segments)
+
+### CLASSES ###
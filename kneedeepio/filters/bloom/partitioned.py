@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import asyncio
+import itertools
+import logging
+import numpy as np
+import xxhash
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .client import FilterClient
+from .hashing import Key, KeyEncoder, encode_key, encode_keys
+
+### GLOBALS ###
+# Points each shard gets on the ring, more spread the keys more evenly between shards
+DEFAULT_RING_POINTS = 128
+# Ring positions use their own seed, so the keys of a shard aren't biased in the shard's own hashes
+RING_SEED = 0x52494E47
+# Keys streamed to a new shard at a time
+DEFAULT_BATCH_SIZE = 10000
+
+### FUNCTIONS ###
+def ring_positions(keys: Sequence) -> np.ndarray:
+    # Positions on the ring of already encoded keys
+    return np.fromiter((xxhash.xxh3_64_intdigest(key, RING_SEED) for key in keys), dtype = np.uint64,
+                       count = len(keys))
+
+def _take(items: Sequence, positions: np.ndarray) -> Sequence:
+    if isinstance(items, np.ndarray):
+        return items[positions]
+    return [items[position] for position in positions.tolist()]
+
+### CLASSES ###
+class HashRing:
+    """
+    This is a consistent hash ring based on "Consistent Hashing and Random Trees" by Karger et al.  Every shard
+    name is hashed to num_points points on a 64 bit ring and a key belongs to the shard of the first point at or
+    after the key's position, wrapping around.  Adding a shard only moves the keys falling just before its points,
+    about 1 / len(ring) of them, all to the new shard.
+    """
+    def __init__(self, names: Iterable[str] = (), num_points: int = DEFAULT_RING_POINTS):
+        self.names: List[str] = list(names)
+        self.num_points: int = num_points
+        points = [
+            (xxhash.xxh3_64_intdigest("{}#{}".format(name, point).encode("utf-8"), RING_SEED), owner)
+            for owner, name in enumerate(self.names) for point in range(num_points)
+        ]
+        points.sort()
+        self.points: np.ndarray = np.array([point for point, _ in points], dtype = np.uint64)
+        self.point_owners: np.ndarray = np.array([owner for _, owner in points], dtype = np.intp)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def with_shard(self, name: str) -> "HashRing":
+        if name in self.names:
+            raise ValueError("Shard {} is already on the ring".format(name))
+        return HashRing(self.names + [name], self.num_points)
+
+    def owners(self, positions: np.ndarray) -> np.ndarray:
+        # Index in names of the shard owning each ring position
+        if not self.names:
+            raise ValueError("The ring has no shards")
+        points = np.searchsorted(self.points, positions, side = "left") % len(self.points)
+        return self.point_owners[points]
+
+class Shard:
+    """
+    Transport to one shard of a PartitionedFilter.  Subclasses send batches of items to a filter, wherever it
+    is, and may be called concurrently.
+    """
+    async def add_many(self, items: Sequence[Key]):
+        raise NotImplementedError
+
+    async def query_many(self, items: Sequence[Key]) -> np.ndarray:
+        raise NotImplementedError
+
+class LocalShard(Shard):
+    """
+    A shard held in this process.  Batches run in the event loop's default executor, so the shards of a
+    partitioned call work in parallel wherever the filter releases the GIL.  The filter's batched methods
+    aren't safe to run concurrently, so calls to one shard take turns.
+    """
+    def __init__(self, bloom):
+        self.bloom = bloom
+        self.lock = asyncio.Lock()
+
+    async def add_many(self, items: Sequence[Key]):
+        async with self.lock:
+            await asyncio.get_running_loop().run_in_executor(None, self.bloom.add_many, items)
+
+    async def query_many(self, items: Sequence[Key]) -> np.ndarray:
+        async with self.lock:
+            return await asyncio.get_running_loop().run_in_executor(None, self.bloom.query_many, items)
+
+class RemoteShard(Shard):
+    """
+    A shard held by a FilterServer, as the filter called name.  The server takes str items only.
+    """
+    def __init__(self, client: FilterClient, name: str):
+        self.client = client
+        self.name = name
+
+    async def add_many(self, items: Sequence[Key]):
+        await self.client.add_many(self.name, items)
+
+    async def query_many(self, items: Sequence[Key]) -> np.ndarray:
+        return await self.client.query_many(self.name, items)
+
+class PartitionedFilter:
+    """
+    This is a filter split across shards by a consistent hash ring, so it can grow past one machine's memory.
+    Every method is a coroutine.  Batched calls group the items by shard and send the groups concurrently, the
+    shards being any Shard transport, such as LocalShard or RemoteShard.  The shards should all be sized for
+    their share of the items, each shard's false positive rate being the rate for the keys routed to it.
+
+    add_shard streams the keys whose range moves to the new shard into it before the ring switches over, so
+    queries never miss during the move.  The shards the keys moved from keep their bits, which only adds to
+    their false positives until they are rebuilt.
+    """
+    def __init__(self, shards: Dict[str, Shard] = None, num_points: int = DEFAULT_RING_POINTS,
+                 key_encoder: KeyEncoder = None):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        self.shards: Dict[str, Shard] = dict(shards) if shards else {}
+        self.ring: HashRing = HashRing(self.shards, num_points)
+        # The ring being moved to by add_shard, adds go to the shards of both until it is done
+        self.next_ring: HashRing = None
+        # Used for routing only, shards encode items with their own
+        self.key_encoder: KeyEncoder = key_encoder if key_encoder is not None else encode_key
+
+    def __len__(self) -> int:
+        # Number of shards
+        return len(self.shards)
+
+    def _owners(self, items: Sequence[Key], ring: HashRing) -> np.ndarray:
+        return ring.owners(ring_positions(encode_keys(items, self.key_encoder)))
+
+    def route(self, items: Iterable[Key]) -> Dict[str, np.ndarray]:
+        # Positions in items of the items each shard holds
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        groups = self._grouped(self._owners(items, self.ring))
+        return {self.ring.names[owner]: positions for owner, positions in groups}
+
+    @staticmethod
+    def _grouped(owners: np.ndarray) -> List[Tuple[int, np.ndarray]]:
+        # Owner and item positions of every shard owning any of the items
+        order = np.argsort(owners, kind = "stable")
+        starts = np.flatnonzero(np.diff(owners[order], prepend = -1))
+        groups = np.split(order, starts[1:]) if len(starts) else []
+        return [(int(owners[order[start]]), positions) for start, positions in zip(starts, groups)]
+
+    async def _add_grouped(self, items: Sequence[Key], owners: np.ndarray, ring: HashRing):
+        await asyncio.gather(*[
+            self.shards[ring.names[owner]].add_many(_take(items, positions))
+            for owner, positions in self._grouped(owners)
+        ])
+
+    async def add(self, item: Key):
+        await self.add_many([item])
+
+    async def query(self, item: Key) -> bool:
+        return bool((await self.query_many([item]))[0])
+
+    async def add_many(self, items: Iterable[Key]):
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        if len(items) == 0:
+            return
+        keys = encode_keys(items, self.key_encoder)
+        positions = ring_positions(keys)
+        owners = self.ring.owners(positions)
+        if self.next_ring is None:
+            await self._add_grouped(items, owners, self.ring)
+            return
+        # Mid move, items moving to the new shard also go there
+        next_owners = self.next_ring.owners(positions)
+        moving = np.flatnonzero(next_owners == len(self.ring))
+        await asyncio.gather(self._add_grouped(items, owners, self.ring),
+                             self._add_grouped(_take(items, moving), next_owners[moving], self.next_ring))
+
+    async def query_many(self, items: Iterable[Key]) -> np.ndarray:
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        found = np.zeros(len(items), dtype = bool)
+        if len(items) == 0:
+            return found
+        groups = self._grouped(self._owners(items, self.ring))
+        results = await asyncio.gather(*[
+            self.shards[self.ring.names[owner]].query_many(_take(items, positions)) for owner, positions in groups
+        ])
+        for (_, positions), result in zip(groups, results):
+            found[positions] = result
+        return found
+
+    async def add_shard(self, name: str, shard: Shard, keys: Iterable[Key] = (),
+                        batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        # Adds a shard, filling it from keys, which must hold every key added so far that moves to the new
+        # shard and may hold any others, such as all the keys from the source of truth.  Returns how many
+        # keys were moved.
+        if self.next_ring is not None:
+            raise ValueError("Shard {} is still being added".format(self.next_ring.names[-1]))
+        next_ring = self.ring.with_shard(name)
+        if len(self.ring) == 0:
+            self.shards[name] = shard
+            self.ring = next_ring
+            return 0
+        self.shards[name] = shard
+        self.next_ring = next_ring
+        moved = 0
+        try:
+            keys = iter(keys)
+            while True:
+                batch = list(itertools.islice(keys, batch_size))
+                if not batch:
+                    break
+                moving = np.flatnonzero(self._owners(batch, next_ring) == len(self.ring))
+                if len(moving):
+                    await shard.add_many(_take(batch, moving))
+                    moved += len(moving)
+        except BaseException:
+            del self.shards[name]
+            raise
+        finally:
+            self.next_ring = None
+        self.ring = next_ring
+        self.logger.debug("Added shard %s with %d keys", name, moved)
+        return moved
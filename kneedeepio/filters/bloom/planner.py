@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import math
+import time
+
+from typing import Iterable, List, NamedTuple, Sequence
+
+from .blocked import BLOCK_BITS, BlockedBloomFilter
+from .counting import COUNTER_BITS, CountingBloomFilter, counter_bytes
+from .cuckoo import DEFAULT_BUCKET_SIZE, FINGERPRINT_BITS, CuckooFilter, cuckoo_size
+from .exceptions import FilterFullException
+from .hashing import HASH_STRATEGIES, HASH_STRATEGY_DOUBLE
+from .simple import SimpleBloomFilter
+from .utils import false_positive_rate, optimal_number_of_hashes, optimal_size_of_filter, size_for_hashes
+
+### GLOBALS ###
+PLANNED_TYPES = ("simple", "blocked", "counting", "cuckoo")
+# Filter types that can remove items
+REMOVABLE_TYPES = ("counting", "cuckoo")
+
+OBJECTIVE_SPEED = "speed"
+OBJECTIVE_MEMORY = "memory"
+
+# Items the candidates are measured with.  Larger capacities are measured on filters scaled down to this many
+# items at the same fill, so the timings miss the cache misses of filters larger than the caches.
+DEFAULT_SAMPLE_CAPACITY = 20000
+# Absent keys queried to measure the false positive rate, enough for about this many false positives
+EXPECTED_FALSE_POSITIVES = 50
+MIN_PROBES = 10000
+MAX_PROBES = 200000
+# Keys timed one at a time for the single query latency, taking the fastest of the rounds to cut out noise
+SINGLE_QUERIES = 2000
+TIMING_ROUNDS = 3
+# Measured false positive rates up to this multiple of the target pass, allowing for sampling noise
+FP_SLACK = 1.5
+# Blocked filters lose some accuracy to uneven blocks, so are also tried this much larger than a plain filter
+BLOCKED_SIZE_FACTORS = (1.0, 1.25)
+
+### FUNCTIONS ###
+def _hash_counts(capacity: int, fp_rate: float) -> List[int]:
+    # The optimal number of hashes and cheaper ones, which trade memory for fewer hash passes
+    optimal = optimal_number_of_hashes(optimal_size_of_filter(fp_rate, capacity), capacity)
+    return sorted({max(1, round(optimal / 4)), max(1, round(optimal / 2)), max(1, optimal - 1), optimal})
+
+def _simple_candidates(size: int, seeds: List[int], fp_rate: float) -> List["Candidate"]:
+    return [
+        Candidate(SimpleBloomFilter, {"size": size, "seeds": seeds, "hash_strategy": hash_strategy}, size,
+                  (size + 7) // 8, fp_rate)
+        for hash_strategy in HASH_STRATEGIES
+    ]
+
+def _counting_candidates(size: int, seeds: List[int], fp_rate: float, counter_bits: Iterable[int]) -> List["Candidate"]:
+    # The counter width doesn't change the false positive rate, only the memory and how far counts go
+    return [
+        Candidate(CountingBloomFilter,
+                  {"size": size, "seeds": seeds, "hash_strategy": HASH_STRATEGY_DOUBLE, "counter_bits": bits}, size,
+                  counter_bytes(size, bits), fp_rate)
+        for bits in counter_bits
+    ]
+
+def _blocked_candidates(size: int, seeds: List[int], capacity: int) -> List["Candidate"]:
+    # Blocked filters are less accurate than the formula predicts, the measurement decides which size passes
+    found = []
+    for factor in BLOCKED_SIZE_FACTORS:
+        blocked_size = math.ceil(size * factor / BLOCK_BITS) * BLOCK_BITS
+        found.append(Candidate(BlockedBloomFilter, {"size": blocked_size, "seeds": seeds}, blocked_size,
+                               blocked_size // 8, false_positive_rate(blocked_size, len(seeds), capacity)))
+    return found
+
+def _cuckoo_candidates(capacity: int, fp_rate: float) -> List["Candidate"]:
+    slots = cuckoo_size(capacity)
+    found = []
+    for bits in FINGERPRINT_BITS:
+        predicted = 2 * DEFAULT_BUCKET_SIZE / 2 ** bits
+        if predicted <= fp_rate * FP_SLACK:
+            found.append(Candidate(CuckooFilter, {"size": slots, "fingerprint_bits": bits}, slots, slots * bits // 8,
+                                   predicted))
+    return found
+
+def candidates(capacity: int, fp_rate: float, filter_types: Iterable[str] = ("simple", "blocked", "cuckoo"),
+               counter_bits: Iterable[int] = COUNTER_BITS) -> List["Candidate"]:
+    # Configurations expected to reach fp_rate at capacity items, before measuring them
+    found = []
+    for num_hashes in _hash_counts(capacity, fp_rate):
+        size = size_for_hashes(fp_rate, capacity, num_hashes)
+        seeds = list(range(num_hashes))
+        if "simple" in filter_types:
+            found.extend(_simple_candidates(size, seeds, fp_rate))
+        if "counting" in filter_types:
+            found.extend(_counting_candidates(size, seeds, fp_rate, counter_bits))
+        if "blocked" in filter_types:
+            found.extend(_blocked_candidates(size, seeds, capacity))
+    if "cuckoo" in filter_types:
+        found.extend(_cuckoo_candidates(capacity, fp_rate))
+    return found
+
+def _per_item_ns(func, items: Sequence) -> float:
+    start = time.perf_counter()
+    func(items)
+    return (time.perf_counter() - start) / max(1, len(items)) * 1e9
+
+def _single_ns(func, items: Sequence) -> float:
+    fastest = math.inf
+    for _ in range(TIMING_ROUNDS):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        fastest = min(fastest, time.perf_counter() - start)
+    return fastest / max(1, len(items)) * 1e9
+
+def measure(candidate: "Candidate", capacity: int, sample_capacity: int = DEFAULT_SAMPLE_CAPACITY,
+            num_probes: int = MIN_PROBES) -> "FilterPlan":
+    # Fills a filter of the candidate's configuration, scaled down to about sample_capacity items, then times
+    # adds and queries on it and counts the false positives among num_probes absent keys
+    scale = min(1.0, sample_capacity / capacity)
+    kwargs = dict(candidate.kwargs, size = max(8, math.ceil(candidate.slots * scale)))
+    bloom = candidate.filter_class(**kwargs)
+    # Scaled sizes are rounded by some filter types, the items follow so the fill stays the same
+    num_items = max(1, round(capacity * bloom.size / candidate.slots))
+    present = ["key-{}".format(index) for index in range(num_items)]
+    absent = ["absent-{}".format(index) for index in range(num_probes)]
+    add_ns = _per_item_ns(bloom.add_many, present)
+    batch_query_ns = _per_item_ns(bloom.query_many, absent)
+    measured_fp_rate = float(bloom.query_many(absent).mean())
+    singles = present[:SINGLE_QUERIES // 2] + absent[:SINGLE_QUERIES // 2]
+    query_ns = _single_ns(bloom.query, singles)
+    return FilterPlan(candidate.filter_class, candidate.kwargs, candidate.memory_bytes, candidate.predicted_fp_rate,
+                      measured_fp_rate, add_ns, query_ns, batch_query_ns)
+
+def evaluate(capacity: int, fp_rate: float, removable: bool = False, filter_types: Iterable[str] = None,
+             sample_capacity: int = DEFAULT_SAMPLE_CAPACITY, num_probes: int = None) -> List["FilterPlan"]:
+    # Every candidate configuration with its measurements, in the order they were generated
+    if filter_types is None:
+        filter_types = REMOVABLE_TYPES if removable else ("simple", "blocked", "cuckoo")
+    elif removable:
+        filter_types = [filter_type for filter_type in filter_types if filter_type in REMOVABLE_TYPES]
+    unknown = set(filter_types) - set(PLANNED_TYPES)
+    if unknown:
+        raise ValueError("Unknown filter types {}, expected some of {}".format(sorted(unknown), PLANNED_TYPES))
+    if num_probes is None:
+        num_probes = min(MAX_PROBES, max(MIN_PROBES, math.ceil(EXPECTED_FALSE_POSITIVES / fp_rate)))
+    plans = []
+    for candidate in candidates(capacity, fp_rate, filter_types):
+        try:
+            plans.append(measure(candidate, capacity, sample_capacity, num_probes))
+        except FilterFullException:
+            logging.getLogger(__name__).debug("Skipped %s, it filled up", candidate)
+    return plans
+
+def qualifying(plans: List["FilterPlan"], fp_rate: float, max_memory_bytes: int = None,
+               max_query_ns: float = None) -> List["FilterPlan"]:
+    # The plans meeting fp_rate, measured and predicted, and the budgets
+    return [
+        plan for plan in plans
+        if max(plan.measured_fp_rate, plan.predicted_fp_rate) <= fp_rate * FP_SLACK
+        and (max_memory_bytes is None or plan.memory_bytes <= max_memory_bytes)
+        and (max_query_ns is None or plan.query_ns <= max_query_ns)
+    ]
+
+def best_plan(plans: List["FilterPlan"], objective: str) -> "FilterPlan":
+    # The fastest plan to query, or the smallest with OBJECTIVE_MEMORY, the other breaking ties
+    if objective == OBJECTIVE_MEMORY:
+        return min(plans, key = lambda plan: (plan.memory_bytes, plan.query_ns))
+    return min(plans, key = lambda plan: (plan.query_ns, plan.memory_bytes))
+
+def plan_filter(capacity: int, fp_rate: float, max_memory_bytes: int = None, max_query_ns: float = None,
+                objective: str = None, removable: bool = False, filter_types: Iterable[str] = None,
+                sample_capacity: int = DEFAULT_SAMPLE_CAPACITY, num_probes: int = None) -> "FilterPlan":
+    # The measured configuration meeting fp_rate and the budgets that is fastest to query, or smallest with
+    # OBJECTIVE_MEMORY.  The objective defaults to memory when a latency budget is given, and to speed
+    # otherwise.  max_query_ns applies to single item queries.  Raises ValueError if nothing qualifies.
+    if objective is None:
+        objective = OBJECTIVE_MEMORY if max_query_ns is not None else OBJECTIVE_SPEED
+    if objective not in (OBJECTIVE_SPEED, OBJECTIVE_MEMORY):
+        raise ValueError("Unknown objective {}".format(objective))
+    plans = evaluate(capacity, fp_rate, removable, filter_types, sample_capacity, num_probes)
+    qualified = qualifying(plans, fp_rate, max_memory_bytes, max_query_ns)
+    if not qualified:
+        raise ValueError("None of {} configurations meets a false positive rate of {} within the budget".format(
+            len(plans), fp_rate))
+    return best_plan(qualified, objective)
+
+### CLASSES ###
+class Candidate(NamedTuple):
+    filter_class: type
+    kwargs: dict
+    # Slots of the full size filter, as the filter counts them
+    slots: int
+    memory_bytes: int
+    predicted_fp_rate: float
+
+class FilterPlan(NamedTuple):
+    """
+    A filter configuration with its predicted memory and false positive rate at capacity, and the rates
+    measured for it on this host.  Times are nanoseconds per item: add_ns and batch_query_ns for batched calls,
+    query_ns for single item queries.  build gives an empty filter of the configuration.
+    """
+    filter_class: type
+    kwargs: dict
+    memory_bytes: int
+    predicted_fp_rate: float
+    measured_fp_rate: float
+    add_ns: float
+    query_ns: float
+    batch_query_ns: float
+
+    def build(self):
+        return self.filter_class(**self.kwargs)
+
+    def describe(self) -> str:
+        # One line summary for logs and the command line
+        return "{} {} {:.0f} KB, fp {:.2e} measured {:.2e}, add {:.0f} ns, query {:.0f} ns, batch {:.0f} ns".format(
+            self.filter_class.__name__, self.kwargs, self.memory_bytes / 1024, self.predicted_fp_rate,
+            self.measured_fp_rate, self.add_ns, self.query_ns, self.batch_query_ns)
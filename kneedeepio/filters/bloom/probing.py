@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import numpy as np
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from .hashing import Key, hash_indices_many
+
+### GLOBALS ###
+
+### FUNCTIONS ###
+def query_matrix(filters: Sequence, items: Iterable[Key]) -> np.ndarray:
+    # Membership of every item in every filter, as a bool array of shape (items, filters).  Filters working on
+    # indices, SimpleBloomFilter and CountingBloomFilter, hash the batch once for each size, set of seeds, hash
+    # strategy and key encoder they share.  Other filters answer with their own query_many.
+    if not isinstance(items, (list, tuple, np.ndarray)):
+        items = list(items)
+    matrix = np.zeros((len(items), len(filters)), dtype = bool)
+    groups: Dict[Tuple, List[int]] = {}
+    for column, bloom in enumerate(filters):
+        if hasattr(bloom, "query_index_array"):
+            config = (bloom.size, tuple(bloom.seeds), bloom.hash_strategy, bloom.key_encoder)
+            groups.setdefault(config, []).append(column)
+        else:
+            matrix[:, column] = bloom.query_many(items)
+    for (size, seeds, hash_strategy, key_encoder), columns in groups.items():
+        indices = hash_indices_many(items, size, list(seeds), hash_strategy, key_encoder)
+        for column in columns:
+            matrix[:, column] = filters[column].query_index_array(indices)
+    return matrix
+
+### CLASSES ###
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+# Wire format shared by the filter server and client.  All integers are little endian.
+#
+#   request:  request_id u32, opcode u8, name_length u8, payload_length u32, name, payload
+#   response: request_id u32, status u8, payload_length u32, payload
+#
+# A client may send any number of requests without waiting, responses carry the request_id
+# they answer.  Batches of items are encoded as a count u32, then count u32 byte lengths, then
+# the UTF-8 bytes of every item back to back.  Query results are a count u32 followed by one
+# bit per item, least significant bit first.  CREATE options and STATS results are JSON, and
+# the payload of an error response is the UTF-8 message.
+
+### IMPORTS ###
+import asyncio
+import json
+import struct
+import numpy as np
+
+from typing import Iterable, List, Tuple, Union
+
+from .exceptions import ProtocolException
+
+### GLOBALS ###
+REQUEST_STRUCT = struct.Struct("<IBBI")
+RESPONSE_STRUCT = struct.Struct("<IBI")
+COUNT_STRUCT = struct.Struct("<I")
+
+OP_CREATE = 1
+OP_DROP = 2
+OP_ADD = 3
+OP_QUERY = 4
+OP_REMOVE = 5
+OP_STATS = 6
+OP_LIST = 7
+
+STATUS_OK = 0
+STATUS_ERROR = 1
+
+# Longest filter name, bounded by the u8 length field
+MAX_NAME_BYTES = 255
+# Largest payload accepted, guarding against a corrupt length allocating without bound
+MAX_PAYLOAD_BYTES = 1 << 30
+
+### FUNCTIONS ###
+def pack_request(request_id: int, opcode: int, name: str, payload: bytes = b"") -> bytes:
+    encoded_name = name.encode("utf-8")
+    if len(encoded_name) > MAX_NAME_BYTES:
+        raise ValueError("Filter name is {} bytes, at most {} allowed".format(len(encoded_name), MAX_NAME_BYTES))
+    return REQUEST_STRUCT.pack(request_id, opcode, len(encoded_name), len(payload)) + encoded_name + payload
+
+def pack_response(request_id: int, status: int, payload: bytes = b"") -> bytes:
+    return RESPONSE_STRUCT.pack(request_id, status, len(payload)) + payload
+
+async def read_request(reader: asyncio.StreamReader) -> Tuple[int, int, str, bytes]:
+    # Raises asyncio.IncompleteReadError once the peer closes the connection
+    request_id, opcode, name_length, payload_length = REQUEST_STRUCT.unpack(
+        await reader.readexactly(REQUEST_STRUCT.size))
+    if payload_length > MAX_PAYLOAD_BYTES:
+        raise ProtocolException("Payload of {} bytes exceeds {}".format(payload_length, MAX_PAYLOAD_BYTES))
+    body = await reader.readexactly(name_length + payload_length)
+    try:
+        name = body[:name_length].decode("utf-8")
+    except UnicodeDecodeError as error:
+        raise ProtocolException("Filter name is not valid UTF-8: {}".format(error)) from error
+    return request_id, opcode, name, body[name_length:]
+
+async def read_response(reader: asyncio.StreamReader) -> Tuple[int, int, bytes]:
+    request_id, status, payload_length = RESPONSE_STRUCT.unpack(await reader.readexactly(RESPONSE_STRUCT.size))
+    if payload_length > MAX_PAYLOAD_BYTES:
+        raise ProtocolException("Payload of {} bytes exceeds {}".format(payload_length, MAX_PAYLOAD_BYTES))
+    return request_id, status, await reader.readexactly(payload_length)
+
+def encode_items(items: Iterable[str]) -> bytes:
+    encoded = [item.encode("utf-8") for item in items]
+    lengths = np.fromiter((len(item) for item in encoded), dtype = "<u4", count = len(encoded))
+    return COUNT_STRUCT.pack(len(encoded)) + lengths.tobytes() + b"".join(encoded)
+
+def decode_items(payload: Union[bytes, memoryview]) -> List[str]:
+    (count,) = COUNT_STRUCT.unpack_from(payload)
+    lengths_end = COUNT_STRUCT.size + 4 * count
+    if len(payload) < lengths_end:
+        raise ProtocolException("Batch of {} items truncated".format(count))
+    offsets = np.zeros(count + 1, dtype = np.int64)
+    np.cumsum(np.frombuffer(payload, dtype = "<u4", count = count, offset = COUNT_STRUCT.size), out = offsets[1:])
+    offsets += lengths_end
+    if offsets[-1] != len(payload):
+        raise ProtocolException("Batch is {} bytes, expected {}".format(len(payload), offsets[-1]))
+    data = bytes(payload)
+    bounds = offsets.tolist()
+    return [data[start:end].decode("utf-8") for start, end in zip(bounds[:-1], bounds[1:])]
+
+def encode_results(results: np.ndarray) -> bytes:
+    return COUNT_STRUCT.pack(len(results)) + np.packbits(results.astype(bool), bitorder = "little").tobytes()
+
+def decode_results(payload: Union[bytes, memoryview]) -> np.ndarray:
+    (count,) = COUNT_STRUCT.unpack_from(payload)
+    packed = np.frombuffer(payload, dtype = np.uint8, offset = COUNT_STRUCT.size)
+    return np.unpackbits(packed, count = count, bitorder = "little").astype(bool)
+
+def encode_json(value) -> bytes:
+    return json.dumps(value).encode("utf-8")
+
+def decode_json(payload: Union[bytes, memoryview]):
+    return json.loads(bytes(payload).decode("utf-8"))
+
+### CLASSES ###
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+# Delta format carrying the pages of a vector changed since a version, all integers little endian:
+#
+#   magic          4s   b"KDBD"
+#   mode           u8   DELTA_MODE_* code, how the pages are applied
+#   padding        3x
+#   page_bytes     u32
+#   since_version  i64  version the replica must be at, or newer, FULL_DELTA for every page
+#   version        i64  version of the filter the pages were taken from
+#   num_pages      u64
+#   header         the filter header of the serialization format, to check the replica matches
+#   pages          u64 * num_pages  page numbers in increasing order
+#   data           the pages one after the other, the last page of the vector may be shorter
+
+### IMPORTS ###
+import functools
+import struct
+import numpy as np
+
+from typing import Callable, NamedTuple, Union
+
+from .exceptions import IncompatibleFiltersException, MissingDeltaException, SerializationException
+from .serialization import FilterHeader, pack_header, unpack_header
+from .storage import vector_array
+
+### GLOBALS ###
+DELTA_MAGIC = b"KDBD"
+DELTA_STRUCT = struct.Struct("<4sBxxxIqqQ")
+
+# Pages are ORed into the replica's, so reapplying or overlapping deltas never clears a bit.  Deltas are still
+# checked against the replica's version: older ones are skipped and one starting past it is a gap.
+DELTA_MODE_OR = 0
+# Pages replace the replica's, so deltas must be applied in version order
+DELTA_MODE_OVERWRITE = 1
+
+DEFAULT_PAGE_BYTES = 4096
+# since_version giving every page, to bring up a new replica
+FULL_DELTA = -1
+
+# Methods wrapped by enable_tracking, by how they find the pages they wrote
+TRACKED_INDEX_WRITES = ("add_indices", "remove_indices", "add_index_array", "remove_index_array")
+TRACKED_VECTOR_WRITES = ("merge_vector",)
+TRACKED_WHOLE_WRITES = ("intersection_update",)
+
+### FUNCTIONS ###
+def _tracked_indices(method: Callable, bloom: "ReplicatedFilter") -> Callable:
+    @functools.wraps(method)
+    def tracked(indices, *args, **kwargs):
+        try:
+            return method(indices, *args, **kwargs)
+        finally:
+            # Also after a raise, as the single item methods may have written some of the indices
+            bloom.dirty.mark(bloom.byte_offsets(np.asarray(indices, dtype = np.int64).ravel()))
+    return tracked
+
+def _tracked_vector(method: Callable, bloom: "ReplicatedFilter") -> Callable:
+    @functools.wraps(method)
+    def tracked(vector, *args, **kwargs):
+        try:
+            return method(vector, *args, **kwargs)
+        finally:
+            # ORing or adding in zero bytes leaves the target as it was
+            bloom.dirty.mark(np.flatnonzero(vector_array(vector)))
+    return tracked
+
+def _tracked_whole(method: Callable, bloom: "ReplicatedFilter") -> Callable:
+    @functools.wraps(method)
+    def tracked(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        finally:
+            bloom.dirty.mark_all()
+    return tracked
+
+def read_delta(buffer) -> "Delta":
+    view = memoryview(buffer).cast("B")
+    if len(view) < DELTA_STRUCT.size:
+        raise SerializationException("Buffer too short for a delta")
+    magic, mode, page_bytes, since_version, version, num_pages = DELTA_STRUCT.unpack_from(view)
+    if magic != DELTA_MAGIC:
+        raise SerializationException("Bad magic {!r}".format(magic))
+    if mode not in (DELTA_MODE_OR, DELTA_MODE_OVERWRITE):
+        raise SerializationException("Unknown delta mode {}".format(mode))
+    header, header_length = unpack_header(view[DELTA_STRUCT.size:])
+    start = DELTA_STRUCT.size + header_length
+    end = start + 8 * num_pages
+    if len(view) < end:
+        raise SerializationException("Buffer too short for {} page numbers".format(num_pages))
+    pages = np.frombuffer(view[start:end], dtype = "<u8").astype(np.int64)
+    num_bytes = len(page_offsets(pages, page_bytes, header.payload_length))
+    if len(view) != end + num_bytes:
+        raise SerializationException("Buffer is {} bytes, expected {}".format(len(view), end + num_bytes))
+    return Delta(mode, page_bytes, since_version, version, header, pages, np.frombuffer(view[end:], dtype = np.uint8))
+
+def page_offsets(pages: np.ndarray, page_bytes: int, num_bytes: int) -> np.ndarray:
+    # Offsets of every byte of the given pages, in order, the last page of the vector ending at num_bytes
+    if len(pages) and pages[-1] * page_bytes >= num_bytes:
+        raise SerializationException("Page {} beyond the vector".format(pages[-1]))
+    offsets = (pages[:, None] * page_bytes + np.arange(page_bytes)).ravel()
+    return offsets[:np.searchsorted(offsets, num_bytes)] if len(pages) else offsets
+
+### CLASSES ###
+class Delta(NamedTuple):
+    mode: int
+    page_bytes: int
+    since_version: int
+    version: int
+    header: FilterHeader
+    pages: np.ndarray
+    data: np.ndarray
+
+class DirtyPages:
+    """
+    Which pages of a vector changed, and when.  Each tracked write raises version by one and stamps the pages it
+    touched with it, so the pages changed since any earlier version can be found for any number of replicas, each
+    at its own version, for 8 bytes a page.
+    """
+    def __init__(self, num_bytes: int, page_bytes: int = DEFAULT_PAGE_BYTES):
+        if page_bytes <= 0 or page_bytes % 8:
+            raise ValueError("Page size must be a positive multiple of 8 bytes")
+        self.num_bytes: int = num_bytes
+        self.page_bytes: int = page_bytes
+        self.version: int = 0
+        self.page_versions: np.ndarray = np.zeros(-(-num_bytes // page_bytes), dtype = np.int64)
+
+    def __len__(self) -> int:
+        return len(self.page_versions)
+
+    def mark(self, byte_offsets: np.ndarray):
+        self.version += 1
+        self.page_versions[byte_offsets // self.page_bytes] = self.version
+
+    def mark_all(self):
+        self.version += 1
+        self.page_versions.fill(self.version)
+
+    def stamp(self, pages: np.ndarray, version: int):
+        # Takes the version of the filter a delta came from
+        self.version = version
+        self.page_versions[pages] = version
+
+    def pages_since(self, version: int) -> np.ndarray:
+        return np.flatnonzero(self.page_versions > version)
+
+class ReplicatedFilter:
+    """
+    Mixin adding opt-in dirty page tracking to a filter, so replicas can catch up from the pages changed since
+    they last synced instead of the whole vector.  enable_tracking wraps the index level write methods of this
+    instance only, as enable_metrics does, so an untracked filter runs the plain class methods.  Writes straight
+    to bit_vector aren't seen.
+
+    export_delta gives the pages changed since a version and apply_delta applies them to a replica, which then
+    takes the version of the filter they came from.  Replicas should only be written to by apply_delta.  OR
+    deltas can't clear bits, so bits cleared by intersection_update stay set on replicas.
+    """
+    DELTA_MODE: int = DELTA_MODE_OR
+    bit_vector: Union[bytearray, memoryview]
+    # Replaced per instance by enable_tracking
+    dirty: DirtyPages = None
+
+    def serialization_header(self) -> FilterHeader:
+        raise NotImplementedError
+
+    def byte_offsets(self, indices: np.ndarray) -> np.ndarray:
+        # Offsets in bit_vector of the bytes holding the slots at indices
+        raise NotImplementedError
+
+    def enable_tracking(self, page_bytes: int = DEFAULT_PAGE_BYTES) -> DirtyPages:
+        self.disable_tracking()
+        self.dirty = DirtyPages(len(self.bit_vector), page_bytes)
+        for names, wrap in [(TRACKED_INDEX_WRITES, _tracked_indices), (TRACKED_VECTOR_WRITES, _tracked_vector),
+                            (TRACKED_WHOLE_WRITES, _tracked_whole)]:
+            for name in names:
+                method = getattr(self, name, None)
+                if method is not None:
+                    setattr(self, name, wrap(method, self))
+        return self.dirty
+
+    def disable_tracking(self):
+        # Drop the instance wrappers so lookups fall back to the class methods
+        for name in TRACKED_INDEX_WRITES + TRACKED_VECTOR_WRITES + TRACKED_WHOLE_WRITES + ("dirty",):
+            self.__dict__.pop(name, None)
+
+    def export_delta(self, since_version: int = FULL_DELTA) -> bytes:
+        # The pages changed after since_version, by default every page
+        if self.dirty is None:
+            raise ValueError("Tracking isn't enabled, call enable_tracking first")
+        pages = self.dirty.pages_since(since_version)
+        vector = vector_array(self.bit_vector)
+        if len(pages) == len(self.dirty):
+            data = vector.tobytes()
+        else:
+            data = vector[page_offsets(pages, self.dirty.page_bytes, len(vector))].tobytes()
+        return b"".join([
+            DELTA_STRUCT.pack(DELTA_MAGIC, self.DELTA_MODE, self.dirty.page_bytes, since_version,
+                              self.dirty.version, len(pages)),
+            pack_header(self.serialization_header()),
+            pages.astype("<u8").tobytes(),
+            data,
+        ])
+
+    def apply_delta(self, buffer) -> bool:
+        # Returns False if the replica already has a newer version than the delta.  Raises
+        # MissingDeltaException if the delta starts after the replica's version, as pages changed in
+        # between would be missing, in which case the replica needs a full delta.
+        delta = read_delta(buffer)
+        header = self.serialization_header()
+        if delta.header[:5] != header[:5] or delta.header.payload_length != header.payload_length:
+            raise IncompatibleFiltersException("Delta is for a different filter: {} and {}".format(
+                delta.header, header))
+        if delta.mode != self.DELTA_MODE:
+            raise IncompatibleFiltersException("Delta mode {} doesn't match {}".format(delta.mode, self.DELTA_MODE))
+        if self.dirty is None:
+            self.enable_tracking(delta.page_bytes)
+        elif self.dirty.page_bytes != delta.page_bytes:
+            raise IncompatibleFiltersException("Delta pages are {} bytes, tracked pages {}".format(
+                delta.page_bytes, self.dirty.page_bytes))
+        if delta.version < self.dirty.version:
+            return False
+        if delta.since_version > self.dirty.version:
+            raise MissingDeltaException("Delta starts at version {}, replica is at {}".format(
+                delta.since_version, self.dirty.version))
+        target = vector_array(self.bit_vector, writable = True)
+        if len(delta.pages) == len(self.dirty):
+            offsets = slice(None)
+        else:
+            offsets = page_offsets(delta.pages, delta.page_bytes, len(target))
+        if delta.mode == DELTA_MODE_OR:
+            target[offsets] |= delta.data
+        else:
+            target[offsets] = delta.data
+        self.dirty.stamp(delta.pages, delta.version)
+        return True
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import numpy as np
+
+from typing import Iterable, List
+
+from .hashing import HASH_STRATEGY_SEEDED, Key, KeyEncoder, check_hash_strategy
+from .simple import SimpleBloomFilter
+from .windowed import covered_rows
+from .utils import false_positive_rate, optimal_number_of_hashes, optimal_size_of_filter
+
+### GLOBALS ###
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class ScalableBloomFilter:
+    """
+    This is a scalable bloom filter based on the paper "Scalable Bloom Filters" by Almeida et al.
+
+    Items go into the newest slice until it reaches its capacity, then a new slice is added with
+    growth_factor times the capacity and tightening_ratio times the error rate of the previous one.
+    The slice error rates form a geometric series summing to error_rate, which bounds the overall
+    false positive rate however many slices are added.
+    """
+    def __init__(self, initial_capacity: int = 1000, error_rate: float = 0.001, growth_factor: int = 2,
+                 tightening_ratio: float = 0.5, hash_strategy: str = HASH_STRATEGY_SEEDED,
+                 key_encoder: KeyEncoder = None):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        if initial_capacity <= 0:
+            raise ValueError("Initial capacity must be positive")
+        if not 0 < error_rate < 1:
+            raise ValueError("Error rate must be between 0 and 1")
+        if not 0 < tightening_ratio < 1:
+            raise ValueError("Tightening ratio must be between 0 and 1")
+        check_hash_strategy(hash_strategy)
+        self.initial_capacity: int = initial_capacity
+        self.error_rate: float = error_rate
+        self.growth_factor: int = growth_factor
+        self.tightening_ratio: float = tightening_ratio
+        self.hash_strategy: str = hash_strategy
+        self.key_encoder: KeyEncoder = key_encoder
+
+        # Slices oldest first, with the capacity and number of items added for each
+        self.slices: List[SimpleBloomFilter] = []
+        self.capacities: List[int] = []
+        self.counts: List[int] = []
+        self._add_slice()
+
+    def _add_slice(self):
+        index = len(self.slices)
+        capacity = self.initial_capacity * self.growth_factor ** index
+        slice_error = self.error_rate * (1 - self.tightening_ratio) * self.tightening_ratio ** index
+        size = max(8, optimal_size_of_filter(slice_error, capacity))
+        num_hashes = optimal_number_of_hashes(size, capacity)
+        self.slices.append(SimpleBloomFilter(size = size, seeds = list(range(num_hashes)),
+                                             hash_strategy = self.hash_strategy, key_encoder = self.key_encoder))
+        self.capacities.append(capacity)
+        self.counts.append(0)
+        self.logger.debug("Added slice %d: capacity %d, size %d, hashes %d, memory %d bytes, predicted FP rate %f",
+                          index, capacity, size, num_hashes, self.memory_usage(), self.false_positive_rate())
+
+    def __len__(self) -> int:
+        return sum(self.counts)
+
+    def memory_usage(self) -> int:
+        # Bytes held by the slice vectors
+        return sum(len(bloom.bit_vector) for bloom in self.slices)
+
+    def false_positive_rate(self) -> float:
+        # Predicted false positive rate for the items added so far
+        true_negative_rate = 1.0
+        for bloom, count in zip(self.slices, self.counts):
+            true_negative_rate *= 1 - false_positive_rate(bloom.size, len(bloom.seeds), count)
+        return 1 - true_negative_rate
+
+    def add(self, item: Key) -> bool:
+        # Returns True if the item was already present, in which case nothing is added
+        if self.query(item):
+            return True
+        if self.counts[-1] >= self.capacities[-1]:
+            self._add_slice()
+        self.slices[-1].add(item)
+        self.counts[-1] += 1
+        return False
+
+    def query(self, item: Key) -> bool:
+        for bloom in reversed(self.slices):
+            if bloom.query(item):
+                return True
+        return False
+
+    def add_many(self, items: Iterable[Key]) -> np.ndarray:
+        # Returns which items were already present, as add does for a single item.  An item added earlier in
+        # the batch, or a false positive of the items before it, counts as present, so the result and the
+        # slices are the same as adding the items one at a time.
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        present = self.query_many(items)
+        pending = np.flatnonzero(~present)
+        while len(pending):
+            newest = self.slices[-1]
+            room = self.capacities[-1] - self.counts[-1]
+            indices = newest.indices_many([items[position] for position in pending.tolist()])
+            # Rows covered by the slice or the rows before them would be found by query, the rest are added
+            covered = covered_rows(indices, newest.bit_vector)
+            new = np.flatnonzero(~covered)
+            end = len(pending) if len(new) <= room else new[room]
+            newest.add_index_array(indices[new[new < end]])
+            self.counts[-1] += int(np.count_nonzero(new < end))
+            present[pending[:end][covered[:end]]] = True
+            if end == len(pending):
+                break
+            # The slice is full, so the items after the first that didn't fit are checked against it as it ends
+            pending = pending[end:]
+            later = newest.query_index_array(indices[end + 1:])
+            present[pending[1:][later]] = True
+            pending = np.concatenate([pending[:1], pending[1:][~later]])
+            self._add_slice()
+        return present
+
+    def query_many(self, items: Iterable[Key]) -> np.ndarray:
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        result = np.zeros(len(items), dtype = bool)
+        pending = np.arange(len(items))
+        for bloom in reversed(self.slices):
+            if len(pending) == 0:
+                break
+            found = bloom.query_many([items[index] for index in pending])
+            result[pending[found]] = True
+            pending = pending[~found]
+        return result
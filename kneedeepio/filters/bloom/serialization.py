@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+# Binary format shared by every filter type, all integers little endian:
+#
+#   magic          4s   b"KDBF"
+#   version        u8   FORMAT_VERSION
+#   filter_type    u8   FILTER_TYPE_* code of the filter class
+#   hash_strategy  u8   index into HASH_STRATEGY_CODES
+#   counter_bits   u8   bits per slot in the vector, 1 for plain bloom filters
+#   num_seeds      u32
+#   num_extra      u32  filter specific parameters following the seeds
+#   size           u64  number of slots
+#   payload_length u64  length of the raw vector in bytes
+#   seeds          u64 * num_seeds
+#   extra          u64 * num_extra
+#   payload        raw vector, starting on an 8 byte boundary
+#
+# The payload is the filter's bit_vector exactly as held in memory, so it can be wrapped
+# by a memoryview or mapped from a file without being parsed or copied.
+
+### IMPORTS ###
+import struct
+
+from typing import BinaryIO, Dict, List, NamedTuple, Tuple, Union
+
+from .exceptions import SerializationException
+from .hashing import HASH_STRATEGY_DOUBLE, HASH_STRATEGY_SEEDED
+from .storage import close_vector, flush_vector, map_vector
+
+### GLOBALS ###
+MAGIC = b"KDBF"
+FORMAT_VERSION = 1
+
+FILTER_TYPE_SIMPLE = 1
+FILTER_TYPE_COUNTING = 2
+FILTER_TYPE_BLOCKED = 3
+FILTER_TYPE_CUCKOO = 4
+FILTER_TYPE_FUSE = 5
+FILTER_TYPE_STORE = 6
+
+HASH_STRATEGY_CODES = [HASH_STRATEGY_SEEDED, HASH_STRATEGY_DOUBLE]
+
+HEADER_STRUCT = struct.Struct("<4sBBBBIIQQ")
+
+# Size of the pieces used when streaming the payload to or from a file
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Filter classes by type code, filled in by register_filter_type
+FILTER_TYPES: Dict[int, type] = {}
+
+### FUNCTIONS ###
+def register_filter_type(filter_type: int):
+    def decorator(cls):
+        cls.FILTER_TYPE = filter_type
+        FILTER_TYPES[filter_type] = cls
+        return cls
+    return decorator
+
+def pack_header(header: "FilterHeader") -> bytes:
+    params = list(header.seeds) + list(header.extra)
+    return HEADER_STRUCT.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        header.filter_type,
+        HASH_STRATEGY_CODES.index(header.hash_strategy),
+        header.counter_bits,
+        len(header.seeds),
+        len(header.extra),
+        header.size,
+        header.payload_length
+    ) + struct.pack("<{}Q".format(len(params)), *params)
+
+def _unpack_fixed(buffer: Union[bytes, memoryview]) -> Tuple:
+    if len(buffer) < HEADER_STRUCT.size:
+        raise SerializationException("Buffer too short for a filter header")
+    fields = HEADER_STRUCT.unpack_from(buffer)
+    magic, version, filter_type, strategy_code = fields[0:4]
+    if magic != MAGIC:
+        raise SerializationException("Bad magic {!r}".format(magic))
+    if version != FORMAT_VERSION:
+        raise SerializationException("Unsupported format version {}".format(version))
+    if filter_type not in FILTER_TYPES:
+        raise SerializationException("Unknown filter type {}".format(filter_type))
+    if strategy_code >= len(HASH_STRATEGY_CODES):
+        raise SerializationException("Unknown hash strategy code {}".format(strategy_code))
+    return fields
+
+def unpack_header(buffer: Union[bytes, memoryview]) -> Tuple["FilterHeader", int]:
+    # Returns the header and the offset of the payload within the buffer
+    _, _, filter_type, strategy_code, counter_bits, num_seeds, num_extra, size, payload_length = _unpack_fixed(buffer)
+    offset = HEADER_STRUCT.size + 8 * (num_seeds + num_extra)
+    if len(buffer) < offset:
+        raise SerializationException("Buffer too short for {} header parameters".format(num_seeds + num_extra))
+    params = list(struct.unpack_from("<{}Q".format(num_seeds + num_extra), buffer, HEADER_STRUCT.size))
+    header = FilterHeader(
+        filter_type = filter_type,
+        hash_strategy = HASH_STRATEGY_CODES[strategy_code],
+        counter_bits = counter_bits,
+        size = size,
+        seeds = params[:num_seeds],
+        extra = params[num_seeds:],
+        payload_length = payload_length
+    )
+    return header, offset
+
+def _read_exactly(fileobj: BinaryIO, length: int) -> bytes:
+    data = fileobj.read(length)
+    if len(data) != length:
+        raise SerializationException("Unexpected end of stream")
+    return data
+
+def read_header(fileobj: BinaryIO) -> Tuple["FilterHeader", int]:
+    fixed = _read_exactly(fileobj, HEADER_STRUCT.size)
+    num_params = sum(_unpack_fixed(fixed)[5:7])
+    return unpack_header(fixed + _read_exactly(fileobj, 8 * num_params))
+
+def _filter_class(header: "FilterHeader", expected: type = None) -> type:
+    cls = FILTER_TYPES[header.filter_type]
+    if expected is not None and not issubclass(cls, expected):
+        raise SerializationException("Buffer holds a {}, not a {}".format(cls.__name__, expected.__name__))
+    return cls
+
+def to_bytes(bloom) -> bytes:
+    return pack_header(bloom.serialization_header()) + bytes(bloom.bit_vector)
+
+def write_to(bloom, fileobj: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    fileobj.write(pack_header(bloom.serialization_header()))
+    with memoryview(bloom.bit_vector) as payload:
+        for start in range(0, len(payload), chunk_size):
+            fileobj.write(payload[start:start + chunk_size])
+
+def from_buffer(buffer, expected: type = None):
+    # Wrap the payload of buffer without copying it.  The filter is writable only if the
+    # buffer is, and shares its memory with it.
+    view = memoryview(buffer).cast("B")
+    header, offset = unpack_header(view)
+    if len(view) != offset + header.payload_length:
+        raise SerializationException(
+            "Buffer is {} bytes, expected {}".format(len(view), offset + header.payload_length))
+    return _filter_class(header, expected).from_header(header, view[offset:])
+
+def read_from(fileobj: BinaryIO, expected: type = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    header, _ = read_header(fileobj)
+    cls = _filter_class(header, expected)
+    bit_vector = bytearray(header.payload_length)
+    with memoryview(bit_vector) as payload:
+        for start in range(0, len(payload), chunk_size):
+            chunk = payload[start:start + chunk_size]
+            if fileobj.readinto(chunk) != len(chunk):
+                raise SerializationException("Unexpected end of stream")
+    return cls.from_header(header, bit_vector)
+
+def save(bloom, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    with open(path, "wb") as filter_file:
+        write_to(bloom, filter_file, chunk_size = chunk_size)
+
+def load(path: str, writable: bool = False, expected: type = None):
+    # Map the payload of a saved filter straight from the file, only the header is read
+    with open(path, "rb") as filter_file:
+        header, offset = read_header(filter_file)
+    cls = _filter_class(header, expected)
+    return cls.from_header(header, map_vector(path, header.payload_length, writable = writable, offset = offset))
+
+### CLASSES ###
+class FilterHeader(NamedTuple):
+    filter_type: int
+    hash_strategy: str
+    counter_bits: int
+    size: int
+    seeds: List[int]
+    extra: List[int]
+    payload_length: int
+
+class SerializableFilter:
+    # Mixin giving a filter the shared binary format and file backed storage.  Subclasses are
+    # registered with register_filter_type, keep their vector in bit_vector and provide
+    # serialization_header and from_header.
+    FILTER_TYPE: int = 0
+    bit_vector: Union[bytearray, memoryview]
+    size: int
+    seeds: List[int]
+    hash_strategy: str
+
+    def serialization_header(self) -> FilterHeader:
+        raise NotImplementedError
+
+    def header_for(self, counter_bits: int = 1, seeds: List[int] = None, extra: List[int] = ()) -> FilterHeader:
+        # Header of this filter's type, size, hash strategy and vector, for serialization_header, with the
+        # filter's own seeds unless others are given
+        return FilterHeader(
+            filter_type = self.FILTER_TYPE,
+            hash_strategy = self.hash_strategy,
+            counter_bits = counter_bits,
+            size = self.size,
+            seeds = self.seeds if seeds is None else seeds,
+            extra = list(extra),
+            payload_length = len(self.bit_vector)
+        )
+
+    @classmethod
+    def from_header(cls, header: FilterHeader, bit_vector):
+        raise NotImplementedError
+
+    def to_bytes(self) -> bytes:
+        return to_bytes(self)
+
+    def write_to(self, fileobj: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        write_to(self, fileobj, chunk_size = chunk_size)
+
+    def save(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        save(self, path, chunk_size = chunk_size)
+
+    @classmethod
+    def from_buffer(cls, buffer):
+        return from_buffer(buffer, expected = cls)
+
+    @classmethod
+    def read_from(cls, fileobj: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        return read_from(fileobj, expected = cls, chunk_size = chunk_size)
+
+    @classmethod
+    def load(cls, path: str, writable: bool = False):
+        return load(path, writable = writable, expected = cls)
+
+    def flush(self):
+        flush_vector(self.bit_vector)
+
+    def close(self):
+        close_vector(self.bit_vector)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
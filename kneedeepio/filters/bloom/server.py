@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+
+# Serves named filters to other processes over a Unix or TCP socket, see protocol.py for the
+# wire format.  Run with: python -m kneedeepio.filters.bloom.server --unix /tmp/bloom.sock
+
+### IMPORTS ###
+import argparse
+import asyncio
+import logging
+import struct
+
+from typing import Dict, Union
+
+from . import protocol
+from .counting import CountingBloomFilter
+from .exceptions import BloomFilterException, ProtocolException
+from .serialization import load
+from .simple import SimpleBloomFilter
+
+### GLOBALS ###
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7878
+
+FILTER_CLASSES = {
+    "simple": SimpleBloomFilter,
+    "counting": CountingBloomFilter,
+}
+# Constructor arguments a CREATE request may set, per filter type
+CREATE_OPTIONS = {
+    "simple": ("size", "seeds", "hash_strategy"),
+    "counting": ("size", "seeds", "hash_strategy", "ignore_errors", "counter_bits", "saturate"),
+}
+
+# Errors reported back to the client, anything else is a bug and drops the connection
+REQUEST_ERRORS = (BloomFilterException, KeyError, TypeError, ValueError, struct.error)
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class FilterServer:
+    """
+    Hosts named SimpleBloomFilter and CountingBloomFilter instances for clients speaking the protocol in
+    protocol.py.  Requests on a connection are handled in the order they arrive and each is answered as soon
+    as it is done, so a client can pipeline as many as it likes.  All filters live in this one event loop, so
+    requests from different connections never interleave within a filter.
+    """
+    def __init__(self):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        self.filters: Dict[str, Union[SimpleBloomFilter, CountingBloomFilter]] = {}
+        self.handlers = {
+            protocol.OP_CREATE: self._handle_create,
+            protocol.OP_DROP: self._handle_drop,
+            protocol.OP_LIST: self._handle_list,
+            protocol.OP_ADD: self._handle_add,
+            protocol.OP_QUERY: self._handle_query,
+            protocol.OP_REMOVE: self._handle_remove,
+            protocol.OP_STATS: self._handle_stats,
+        }
+
+    def add_filter(self, name: str, bloom: Union[SimpleBloomFilter, CountingBloomFilter]):
+        if not isinstance(bloom, tuple(FILTER_CLASSES.values())):
+            raise TypeError("Can't serve a {}".format(type(bloom).__name__))
+        if name in self.filters:
+            raise KeyError("Filter {} already exists".format(name))
+        self.filters[name] = bloom
+
+    def create(self, name: str, options: dict):
+        options = dict(options)
+        filter_type = options.pop("type", "simple")
+        if filter_type not in FILTER_CLASSES:
+            raise ValueError("Unknown filter type {}, expected one of {}".format(filter_type, list(FILTER_CLASSES)))
+        unknown = set(options) - set(CREATE_OPTIONS[filter_type])
+        if unknown:
+            raise ValueError("Unknown options for a {} filter: {}".format(filter_type, sorted(unknown)))
+        self.add_filter(name, FILTER_CLASSES[filter_type](**options))
+        self.logger.info("Created %s filter %s", filter_type, name)
+
+    def drop(self, name: str):
+        # Flushes a filter backed by a mapped file before releasing it
+        bloom = self.filters.pop(name)
+        bloom.flush()
+        bloom.close()
+        self.logger.info("Dropped filter %s", name)
+
+    def close(self):
+        # Flushes and releases filters backed by mapped files
+        for name in list(self.filters):
+            self.drop(name)
+
+    def _filter(self, name: str) -> Union[SimpleBloomFilter, CountingBloomFilter]:
+        bloom = self.filters.get(name)
+        if bloom is None:
+            raise KeyError("No filter named {}".format(name))
+        return bloom
+
+    # Request handlers, each takes the filter name and request payload and returns the response payload
+    def _handle_create(self, name: str, payload: bytes) -> bytes:
+        self.create(name, protocol.decode_json(payload))
+        return b""
+
+    def _handle_drop(self, name: str, _payload: bytes) -> bytes:
+        self._filter(name)
+        self.drop(name)
+        return b""
+
+    def _handle_list(self, _name: str, _payload: bytes) -> bytes:
+        return protocol.encode_json(sorted(self.filters))
+
+    def _handle_add(self, name: str, payload: bytes) -> bytes:
+        self._filter(name).add_many(protocol.decode_items(payload))
+        return b""
+
+    def _handle_query(self, name: str, payload: bytes) -> bytes:
+        return protocol.encode_results(self._filter(name).query_many(protocol.decode_items(payload)))
+
+    def _handle_remove(self, name: str, payload: bytes) -> bytes:
+        bloom = self._filter(name)
+        if not isinstance(bloom, CountingBloomFilter):
+            raise TypeError("Filter {} doesn't support remove".format(name))
+        bloom.remove_many(protocol.decode_items(payload))
+        return b""
+
+    def _handle_stats(self, name: str, _payload: bytes) -> bytes:
+        return protocol.encode_json(self._filter(name).stats())
+
+    def handle(self, opcode: int, name: str, payload: bytes) -> bytes:
+        # Applies one request and returns the payload of its response
+        handler = self.handlers.get(opcode)
+        if handler is None:
+            raise ProtocolException("Unknown opcode {}".format(opcode))
+        return handler(name, payload)
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        peer = writer.get_extra_info("peername") or "unix socket"
+        self.logger.debug("Connection from %s", peer)
+        try:
+            while True:
+                try:
+                    request_id, opcode, name, payload = await protocol.read_request(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                try:
+                    response = protocol.pack_response(request_id, protocol.STATUS_OK,
+                                                      self.handle(opcode, name, payload))
+                except REQUEST_ERRORS as error:
+                    self.logger.debug("Request %d failed: %s", request_id, error)
+                    response = protocol.pack_response(request_id, protocol.STATUS_ERROR,
+                                                      str(error).encode("utf-8"))
+                writer.write(response)
+                # Only waits when the client stops reading and the send buffer fills up
+                await writer.drain()
+        except (ConnectionError, ProtocolException) as error:
+            self.logger.warning("Dropping connection from %s: %s", peer, error)
+        finally:
+            writer.close()
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    path: str = None) -> asyncio.AbstractServer:
+        # Listens on the Unix socket at path if given, otherwise on host and port
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, path = path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host = host, port = port)
+        self.logger.info("Listening on %s", path or "{}:{}".format(host, port))
+        return server
+
+### MAIN ###
+async def serve(args: argparse.Namespace):
+    server = FilterServer()
+    try:
+        # Inside the try so that filters already loaded are closed if a later one fails to load
+        for spec in args.load:
+            name, _, path = spec.partition("=")
+            server.add_filter(name, load(path, writable = args.writable))
+        listener = await server.start(host = args.host, port = args.port, path = args.unix)
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+def main():
+    parser = argparse.ArgumentParser(description = "Serve bloom filters over a local socket")
+    parser.add_argument("--unix", metavar = "PATH", help = "listen on a Unix socket instead of TCP")
+    parser.add_argument("--host", default = DEFAULT_HOST)
+    parser.add_argument("--port", type = int, default = DEFAULT_PORT)
+    parser.add_argument("--load", metavar = "NAME=PATH", action = "append", default = [],
+                        help = "serve a filter saved with save(), mapped rather than read into memory")
+    parser.add_argument("--writable", action = "store_true", help = "map loaded filters writable")
+    parser.add_argument("--log-level", default = "INFO")
+    args = parser.parse_args()
+
+    logging.basicConfig(level = args.log_level.upper())
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -2,47 +2,176 @@
 
 ### IMPORTS ###
 import logging
-import xxhash
+import numpy as np
 
-from typing import List
+from typing import Iterable, List, Union
+
+from .hashing import HASH_STRATEGY_SEEDED, Key, KeyEncoder, check_hash_strategy, encode_key
+from .hashing import HashedFilter
+from .serialization import FILTER_TYPE_SIMPLE, FilterHeader, SerializableFilter, register_filter_type
+from .exceptions import IncompatibleFiltersException
+from .metrics import InstrumentedFilter
+from .replication import ReplicatedFilter
+from .storage import POPCOUNT_CHUNK_BYTES, allocate_vector, check_vector, map_vector, popcount, vector_array
+from .utils import estimate_num_items
 
 ### GLOBALS ###
 
 ### FUNCTIONS ###
+def estimate_union_size(first: "SimpleBloomFilter", second: "SimpleBloomFilter") -> float:
+    # Estimate the number of distinct items added to either filter
+    first.check_compatible(second)
+    first_vector = vector_array(first.bit_vector)
+    second_vector = vector_array(second.bit_vector)
+    bits_set = 0
+    for start in range(0, len(first_vector), POPCOUNT_CHUNK_BYTES):
+        end = start + POPCOUNT_CHUNK_BYTES
+        bits_set += popcount(first_vector[start:end] | second_vector[start:end])
+    return estimate_num_items(first.size, len(first.seeds), bits_set)
+
+def estimate_intersection_size(first: "SimpleBloomFilter", second: "SimpleBloomFilter") -> float:
+    # Estimate the number of distinct items added to both filters by inclusion-exclusion, which
+    # is more accurate than the fill of the AND of the two vectors
+    estimate = first.approx_len() + second.approx_len() - estimate_union_size(first, second)
+    return max(0.0, estimate)
 
 ### CLASSES ###
-class SimpleBloomFilter:
+@register_filter_type(FILTER_TYPE_SIMPLE)
+class SimpleBloomFilter(SerializableFilter, HashedFilter, InstrumentedFilter, ReplicatedFilter):
     """
     This is a simple bloom filter based on the article https://codeconfessions.substack.com/p/bloom-filters-and-beyond
     """
-    def __init__(self, size: int = 4096, seeds: List[int] = None):
+    def __init__(self, size: int = 4096, seeds: List[int] = None, hash_strategy: str = HASH_STRATEGY_SEEDED,
+                 bit_vector: Union[bytearray, memoryview] = None, key_encoder: KeyEncoder = None):
         self.logger = logging.getLogger(type(self).__name__)
 
+        check_hash_strategy(hash_strategy)
         self.size: int = size
-        self.seeds: List[int] = seeds if not None else [3, 5, 7]
+        self.seeds: List[int] = seeds if seeds is not None else [3, 5, 7]
+        self.hash_strategy: str = hash_strategy
+        # Not saved with the filter, set it again after loading
+        self.key_encoder: KeyEncoder = key_encoder if key_encoder is not None else encode_key
 
-        # ByteArray containing Bits for Bloom Filter
+        # ByteArray containing Bits for Bloom Filter, or a caller supplied buffer such as a mapped file
         num_bytes: int = (size + 7) // 8
-        self.bit_vector = bytearray(([0] * num_bytes))
+        if bit_vector is None:
+            bit_vector = allocate_vector(num_bytes)
+        check_vector(bit_vector, num_bytes)
+        self.bit_vector = bit_vector
+
+    @classmethod
+    def open_mmap(cls, path: str, size: int = 4096, seeds: List[int] = None,
+                  hash_strategy: str = HASH_STRATEGY_SEEDED, writable: bool = False, key_encoder: KeyEncoder = None):
+        # Back the bit vector with a shared mapping of the file, which is created when writable
+        bit_vector = map_vector(path, (size + 7) // 8, writable = writable)
+        return cls(size = size, seeds = seeds, hash_strategy = hash_strategy, bit_vector = bit_vector,
+                   key_encoder = key_encoder)
+
+    def serialization_header(self) -> FilterHeader:
+        return self.header_for()
+
+    @classmethod
+    def from_header(cls, header: FilterHeader, bit_vector: Union[bytearray, memoryview]):
+        return cls(size = header.size, seeds = header.seeds, hash_strategy = header.hash_strategy,
+                   bit_vector = bit_vector)
+
+    def add(self, item: Key):
+        self.add_indices(self.indices(item))
 
-    def _hash(self, data: str, seed: int) -> int:
-        hasher = xxhash.xxh64(seed = seed)
-        hasher.update(data)
-        result = hasher.intdigest()
-        return result % self.size
+    def query(self, item: Key) -> bool:
+        return self.query_indices(self.indices(item))
 
-    def add(self, item: str):
-        for seed in self.seeds:
-            index = self._hash(item, seed = seed)
+    def add_many(self, items: Iterable[Key]):
+        self.add_index_array(self.indices_many(items))
+
+    def query_many(self, items: Iterable[Key]) -> np.ndarray:
+        return self.query_index_array(self.indices_many(items))
+
+    # The methods below work on indices already computed by indices or indices_many, for callers
+    # that hash once and apply the result elsewhere.
+    def add_indices(self, indices: List[int]):
+        for index in indices:
             byte_index, bit_index = divmod(index, 8)
             mask = 1 << bit_index
             self.bit_vector[byte_index] |= mask
 
-    def query(self, item: str) -> bool:
-        for seed in self.seeds:
-            index = self._hash(item, seed = seed)
+    def query_indices(self, indices: List[int]) -> bool:
+        for index in indices:
             byte_index, bit_index = divmod(index, 8)
             mask = 1 << bit_index
             if (self.bit_vector[byte_index] & mask) == 0:
                 return False
         return True
+
+    def add_index_array(self, indices: np.ndarray):
+        indices = indices.ravel()
+        vector = vector_array(self.bit_vector, writable = True)
+        masks = np.left_shift(1, indices & 7).astype(np.uint8)
+        np.bitwise_or.at(vector, indices >> 3, masks)
+
+    def query_index_array(self, indices: np.ndarray) -> np.ndarray:
+        vector = vector_array(self.bit_vector)
+        bits = (vector[indices >> 3] >> (indices & 7)) & 1
+        return bits.astype(bool).all(axis = 1)
+
+    def byte_offsets(self, indices: np.ndarray) -> np.ndarray:
+        return indices >> 3
+
+    def merge_vector(self, vector: Union[bytearray, memoryview]):
+        # OR in the bit vector of a filter with the same configuration, in one pass
+        check_vector(vector, len(self.bit_vector))
+        target = vector_array(self.bit_vector, writable = True)
+        np.bitwise_or(target, vector_array(vector), out = target)
+
+    def popcount(self) -> int:
+        return popcount(vector_array(self.bit_vector))
+
+    def approx_len(self) -> float:
+        # Estimated number of distinct items added, from the fraction of bits set
+        return estimate_num_items(self.size, len(self.seeds), self.popcount())
+
+    def check_compatible(self, other: "SimpleBloomFilter"):
+        if not isinstance(other, SimpleBloomFilter):
+            raise IncompatibleFiltersException("Expected a SimpleBloomFilter, got {}".format(type(other).__name__))
+        if (self.size, list(self.seeds), self.hash_strategy) != (other.size, list(other.seeds), other.hash_strategy):
+            raise IncompatibleFiltersException(
+                "Filters differ in size, seeds or hash strategy: ({}, {}, {}) and ({}, {}, {})".format(
+                    self.size, self.seeds, self.hash_strategy, other.size, other.seeds, other.hash_strategy))
+
+    def copy(self) -> "SimpleBloomFilter":
+        return type(self)(size = self.size, seeds = list(self.seeds), hash_strategy = self.hash_strategy,
+                          bit_vector = bytearray(self.bit_vector), key_encoder = self.key_encoder)
+
+    def union(self, other: "SimpleBloomFilter") -> "SimpleBloomFilter":
+        result = self.copy()
+        result.update(other)
+        return result
+
+    def intersection(self, other: "SimpleBloomFilter") -> "SimpleBloomFilter":
+        result = self.copy()
+        result.intersection_update(other)
+        return result
+
+    def update(self, other: "SimpleBloomFilter"):
+        self.check_compatible(other)
+        self.merge_vector(other.bit_vector)
+
+    def intersection_update(self, other: "SimpleBloomFilter"):
+        # The result may hold false positives neither filter had, as bits set by different items coincide
+        self.check_compatible(other)
+        target = vector_array(self.bit_vector, writable = True)
+        np.bitwise_and(target, vector_array(other.bit_vector), out = target)
+
+    def __or__(self, other: "SimpleBloomFilter") -> "SimpleBloomFilter":
+        return self.union(other)
+
+    def __and__(self, other: "SimpleBloomFilter") -> "SimpleBloomFilter":
+        return self.intersection(other)
+
+    def __ior__(self, other: "SimpleBloomFilter") -> "SimpleBloomFilter":
+        self.update(other)
+        return self
+
+    def __iand__(self, other: "SimpleBloomFilter") -> "SimpleBloomFilter":
+        self.intersection_update(other)
+        return self
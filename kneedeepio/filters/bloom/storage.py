@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import mmap
+import numpy as np
+import os
+
+from typing import Union
+
+### GLOBALS ###
+# Bytes processed at a time when counting bits, bounding the temporary arrays
+POPCOUNT_CHUNK_BYTES = 16 * 1024 * 1024
+
+# Set bits per byte value, used when numpy lacks bitwise_count
+POPCOUNT_TABLE = np.array([bin(value).count("1") for value in range(256)], dtype = np.uint8)
+
+### FUNCTIONS ###
+def allocate_vector(num_bytes: int) -> bytearray:
+    # Zero filled without building an intermediate list of ints
+    return bytearray(num_bytes)
+
+def check_vector(vector: Union[bytearray, memoryview], num_bytes: int):
+    if len(vector) != num_bytes:
+        raise ValueError("Vector is {} bytes, expected {}".format(len(vector), num_bytes))
+
+def vector_array(vector: Union[bytearray, memoryview], writable: bool = False, dtype = np.uint8) -> np.ndarray:
+    # View the vector as an array without copying.  Checked here because ufunc.at
+    # does not refuse to write through a read-only view.
+    array = np.frombuffer(vector, dtype = dtype)
+    if writable and not array.flags.writeable:
+        raise ValueError("Vector is read-only")
+    return array
+
+def popcount(array: np.ndarray) -> int:
+    # Number of set bits in a uint8 array, counted a chunk at a time
+    total = 0
+    for start in range(0, len(array), POPCOUNT_CHUNK_BYTES):
+        chunk = array[start:start + POPCOUNT_CHUNK_BYTES]
+        if hasattr(np, "bitwise_count"):
+            total += int(np.bitwise_count(chunk).sum(dtype = np.int64))
+        else:
+            total += int(POPCOUNT_TABLE[chunk].sum(dtype = np.int64))
+    return total
+
+def map_vector(path: str, num_bytes: int, writable: bool = False, offset: int = 0) -> memoryview:
+    # Map num_bytes of the file at path, starting at offset.  A writable mapping creates
+    # and zero fills a missing or empty file.  The memoryview keeps the mmap alive, use
+    # close_vector to release it.
+    flags = os.O_RDWR | os.O_CREAT if writable else os.O_RDONLY
+    file_descriptor = os.open(path, flags, 0o644)
+    try:
+        file_size = os.fstat(file_descriptor).st_size
+        if writable and file_size == 0:
+            file_size = offset + num_bytes
+            os.ftruncate(file_descriptor, file_size)
+        if file_size != offset + num_bytes:
+            raise ValueError("File {} is {} bytes, expected {}".format(path, file_size, offset + num_bytes))
+        mapped = mmap.mmap(file_descriptor, 0, access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+    finally:
+        os.close(file_descriptor)
+    return memoryview(mapped)[offset:offset + num_bytes]
+
+def is_mapped(vector: Union[bytearray, memoryview]) -> bool:
+    return isinstance(vector, memoryview) and isinstance(vector.obj, mmap.mmap)
+
+def flush_vector(vector: Union[bytearray, memoryview]):
+    if is_mapped(vector) and not vector.readonly:
+        vector.obj.flush()
+
+def close_vector(vector: Union[bytearray, memoryview]):
+    if is_mapped(vector):
+        mapped = vector.obj
+        vector.release()
+        mapped.close()
+
+### CLASSES ###
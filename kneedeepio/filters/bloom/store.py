@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import numpy as np
+
+from typing import Iterable, List, Union
+
+from .hashing import HASH_STRATEGY_SEEDED, Key, KeyEncoder, check_hash_strategy, encode_key, hash_indices
+from .hashing import Probe, compute_indices, hash_indices_many
+from .serialization import FILTER_TYPE_STORE, FilterHeader, SerializableFilter, register_filter_type
+from .simple import SimpleBloomFilter
+from .storage import POPCOUNT_TABLE, allocate_vector, check_vector, map_vector, popcount, vector_array
+
+### GLOBALS ###
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class FilterHandle:
+    """
+    One filter of a FilterStore.  Handles hold nothing but the store and the filter's number, so they are cheap
+    to make on demand and any number of them may refer to the same filter.
+    """
+    __slots__ = ("store", "tenant")
+
+    def __init__(self, store: "FilterStore", tenant: int):
+        self.store = store
+        self.tenant = tenant
+
+    def add(self, item: Key):
+        self.store.add(self.tenant, item)
+
+    def query(self, item: Key) -> bool:
+        return self.store.query(self.tenant, item)
+
+    def add_many(self, items: Iterable[Key]):
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        self.store.add_many(np.full(len(items), self.tenant), items)
+
+    def query_many(self, items: Iterable[Key]) -> np.ndarray:
+        if not isinstance(items, (list, tuple, np.ndarray)):
+            items = list(items)
+        return self.store.query_many(np.full(len(items), self.tenant), items)
+
+    def clear(self):
+        self.store.clear(self.tenant)
+
+    def popcount(self) -> int:
+        return popcount(self.store.filter_vector(self.tenant))
+
+    def as_filter(self) -> SimpleBloomFilter:
+        # A SimpleBloomFilter sharing the store's memory, so writes to either show in both
+        store = self.store
+        start = self.tenant * store.filter_bytes
+        return SimpleBloomFilter(size = store.size, seeds = store.seeds, hash_strategy = store.hash_strategy,
+                                 bit_vector = memoryview(store.bit_vector)[start:start + store.filter_bytes],
+                                 key_encoder = store.key_encoder)
+
+@register_filter_type(FILTER_TYPE_STORE)
+class FilterStore(SerializableFilter):
+    """
+    This is an arena of num_filters SimpleBloomFilters sharing one size, set of seeds and hash strategy, held as
+    consecutive byte aligned slices of a single vector.  Filters are numbered from 0 and are addressed by that
+    number, the tenant, so no object is kept per filter and the store costs its vector plus a few attributes
+    however many filters it holds.  Batched calls take a tenant for every item, so the items of many tenants
+    are hashed and written together.  A filter hashes exactly as a SimpleBloomFilter of the same configuration,
+    and handle(tenant).as_filter() gives one over the filter's slice.  The store saves as a single file that load
+    can map.
+    """
+    def __init__(self, num_filters: int, size: int = 4096, seeds: List[int] = None,
+                 hash_strategy: str = HASH_STRATEGY_SEEDED, bit_vector: Union[bytearray, memoryview] = None,
+                 key_encoder: KeyEncoder = None):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        check_hash_strategy(hash_strategy)
+        if num_filters <= 0:
+            raise ValueError("Number of filters must be positive")
+        self.num_filters: int = num_filters
+        self.size: int = size
+        self.seeds: List[int] = seeds if seeds is not None else [3, 5, 7]
+        self.hash_strategy: str = hash_strategy
+        # Not saved with the store, set it again after loading
+        self.key_encoder: KeyEncoder = key_encoder if key_encoder is not None else encode_key
+        # Each filter starts on a byte boundary, so it can be sliced out as a SimpleBloomFilter vector
+        self.filter_bytes: int = (size + 7) // 8
+
+        num_bytes: int = num_filters * self.filter_bytes
+        if bit_vector is None:
+            bit_vector = allocate_vector(num_bytes)
+        check_vector(bit_vector, num_bytes)
+        self.bit_vector = bit_vector
+
+    @classmethod
+    def open_mmap(cls, path: str, num_filters: int, size: int = 4096, seeds: List[int] = None,
+                  hash_strategy: str = HASH_STRATEGY_SEEDED, writable: bool = False, key_encoder: KeyEncoder = None):
+        # Back the store with a shared mapping of the raw vector file, which is created when writable
+        bit_vector = map_vector(path, num_filters * ((size + 7) // 8), writable = writable)
+        return cls(num_filters = num_filters, size = size, seeds = seeds, hash_strategy = hash_strategy,
+                   bit_vector = bit_vector, key_encoder = key_encoder)
+
+    def serialization_header(self) -> FilterHeader:
+        return self.header_for(extra = [self.num_filters])
+
+    @classmethod
+    def from_header(cls, header: FilterHeader, bit_vector: Union[bytearray, memoryview]):
+        return cls(num_filters = header.extra[0], size = header.size, seeds = header.seeds,
+                   hash_strategy = header.hash_strategy, bit_vector = bit_vector)
+
+    def __len__(self) -> int:
+        return self.num_filters
+
+    def __getitem__(self, tenant: int) -> FilterHandle:
+        return self.handle(tenant)
+
+    def handle(self, tenant: int) -> FilterHandle:
+        self._check_tenant(tenant)
+        return FilterHandle(self, tenant)
+
+    def _check_tenant(self, tenant: int):
+        if not 0 <= tenant < self.num_filters:
+            raise IndexError("Tenant {} out of range for {} filters".format(tenant, self.num_filters))
+
+    def filter_vector(self, tenant: int) -> np.ndarray:
+        # The tenant's slice of the vector, without copying
+        self._check_tenant(tenant)
+        start = tenant * self.filter_bytes
+        return vector_array(self.bit_vector)[start:start + self.filter_bytes]
+
+    def probe(self, item: Key) -> Probe:
+        # Hashes the item once for every tenant, and for SimpleBloomFilters of the same configuration
+        return compute_indices(item, self.size, self.seeds, self.hash_strategy, self.key_encoder)
+
+    def _store_indices(self, tenant: int, item: Key) -> List[int]:
+        self._check_tenant(tenant)
+        base = tenant * self.filter_bytes * 8
+        return [base + index for index in hash_indices(item, self.size, self.seeds, self.hash_strategy,
+                                                       self.key_encoder)]
+
+    def _store_index_array(self, tenants: Iterable[int], items: Iterable[Key]) -> np.ndarray:
+        # Bit positions in the whole vector, of shape (items, seeds)
+        tenants = np.asarray(tenants, dtype = np.intp).ravel()
+        indices = hash_indices_many(items, self.size, self.seeds, self.hash_strategy, self.key_encoder)
+        if len(tenants) != len(indices):
+            raise ValueError("Got {} tenants for {} items".format(len(tenants), len(indices)))
+        if len(tenants) and (tenants.min() < 0 or tenants.max() >= self.num_filters):
+            raise IndexError("Tenants must be in range for {} filters".format(self.num_filters))
+        return indices + (tenants * (self.filter_bytes * 8))[:, None]
+
+    def add(self, tenant: int, item: Key):
+        for index in self._store_indices(tenant, item):
+            self.bit_vector[index >> 3] |= 1 << (index & 7)
+
+    def query(self, tenant: int, item: Key) -> bool:
+        for index in self._store_indices(tenant, item):
+            if not self.bit_vector[index >> 3] & (1 << (index & 7)):
+                return False
+        return True
+
+    def add_many(self, tenants: Iterable[int], items: Iterable[Key]):
+        # Adds items[i] to the filter of tenants[i]
+        indices = self._store_index_array(tenants, items).ravel()
+        vector = vector_array(self.bit_vector, writable = True)
+        np.bitwise_or.at(vector, indices >> 3, np.left_shift(1, indices & 7).astype(np.uint8))
+
+    def query_many(self, tenants: Iterable[int], items: Iterable[Key]) -> np.ndarray:
+        # Whether items[i] is in the filter of tenants[i]
+        indices = self._store_index_array(tenants, items)
+        vector = vector_array(self.bit_vector)
+        return ((vector[indices >> 3] >> (indices & 7)) & 1).astype(bool).all(axis = 1)
+
+    def clear(self, tenant: int):
+        self._check_tenant(tenant)
+        vector = vector_array(self.bit_vector, writable = True)
+        vector[tenant * self.filter_bytes:(tenant + 1) * self.filter_bytes] = 0
+
+    def popcounts(self) -> np.ndarray:
+        # Set bits of every filter
+        vector = vector_array(self.bit_vector).reshape(self.num_filters, self.filter_bytes)
+        if hasattr(np, "bitwise_count"):
+            return np.bitwise_count(vector).sum(axis = 1, dtype = np.int64)
+        return POPCOUNT_TABLE[vector].sum(axis = 1, dtype = np.int64)
@@ -9,17 +9,30 @@ import math
 # Per the section of the article here: https://codeconfessions.substack.com/i/136634414/tuning-a-bloom-filter
 def false_positive_rate(size: int, num_hashes: int, num_items: int) -> float:
     # Calculate the false positive rate of a bloom filter
-    fp_rate = 1 - math.exp(-1 * math.pow(num_hashes * num_items / size, num_hashes))
+    fp_rate = math.pow(1 - math.exp(-1 * num_hashes * num_items / size), num_hashes)
     return fp_rate
 
 def optimal_number_of_hashes(size: int, num_items: int) -> int:
-    # Calculate the optimal number of hashes based on the size and number of items
-    num_hashes = (size / num_items) * math.log(2)
-    return int(num_hashes)
+    # Calculate the optimal number of hashes based on the size and number of items, as the whole number either
+    # side of (size / num_items) * ln 2 with the lower false positive rate, and never less than one
+    num_hashes = max(1, math.floor((size / num_items) * math.log(2)))
+    return min(num_hashes, num_hashes + 1, key = lambda hashes: false_positive_rate(size, hashes, num_items))
 
 def optimal_size_of_filter(fp_rate: float, num_items: int) -> int:
     # Calculate the optimal size of a bloom filter
     bf_size = -1 * (num_items * math.log(fp_rate)) / (math.pow(math.log(2), 2))
     return int(bf_size)
 
+def size_for_hashes(fp_rate: float, num_items: int, num_hashes: int) -> int:
+    # Calculate the smallest size giving fp_rate with a set number of hashes, by solving false_positive_rate
+    return math.ceil(-1 * num_hashes * num_items / math.log(1 - math.pow(fp_rate, 1 / num_hashes)))
+
+# Per Swamidass and Baldi, "Mathematical correction for fingerprint similarity measures"
+def estimate_num_items(size: int, num_hashes: int, bits_set: int) -> float:
+    # Estimate the number of items in a bloom filter from the number of bits set
+    if bits_set >= size:
+        return math.inf
+    num_items = -1 * (size / num_hashes) * math.log(1 - bits_set / size)
+    return num_items
+
 ### CLASSES ###
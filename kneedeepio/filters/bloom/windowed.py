@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import time
+import numpy as np
+
+from typing import Callable, Iterable, List
+
+from .hashing import HASH_STRATEGY_SEEDED, Key, KeyEncoder, Probe
+from .simple import SimpleBloomFilter
+from .storage import vector_array
+from .utils import optimal_number_of_hashes, optimal_size_of_filter
+
+### GLOBALS ###
+DEFAULT_NUM_GENERATIONS = 4
+# Rows add_many looks at in one go beyond twice the room left in the newest generation, when rotating by capacity
+SEGMENT_ROWS = 64
+
+### FUNCTIONS ###
+def covered_rows(indices: np.ndarray, bit_vector) -> np.ndarray:
+    # Marks every row of indices whose bits would all be set when it came to be added one at a time, by the
+    # vector or by the rows before it.  Covered rows add nothing, so the bits before a row are those of the
+    # vector and of every earlier row whether or not it was covered.
+    num_rows, num_hashes = indices.shape
+    flat = indices.ravel()
+    already_set = ((vector_array(bit_vector)[flat >> 3] >> (flat & 7)) & 1).astype(bool)
+    _, first_seen, inverse = np.unique(flat, return_index = True, return_inverse = True)
+    set_earlier = (first_seen // num_hashes)[inverse.ravel()] < np.repeat(np.arange(num_rows), num_hashes)
+    return (already_set | set_earlier).reshape(num_rows, num_hashes).all(axis = 1)
+
+### CLASSES ###
+class RotatingBloomFilter:
+    """
+    This is a sliding window bloom filter built from a ring of num_generations SimpleBloomFilters sharing one size
+    and set of seeds, so an item is hashed once for all of them.  Adds go to the newest generation and queries
+    check every generation.  Rotating clears the oldest generation's vector in place and makes it the newest, so
+    memory stays at num_generations vectors however long the stream runs.
+
+    Rotation happens every window_seconds / (num_generations - 1) seconds, which keeps an item for at least
+    window_seconds after it was last added, and/or whenever the newest generation has had generation_capacity
+    items added.  Adding an item already in an older generation copies it into the newest one, so items that keep
+    recurring stay in the window.
+    """
+    def __init__(self, size: int = 4096, seeds: List[int] = None, num_generations: int = DEFAULT_NUM_GENERATIONS,
+                 window_seconds: float = None, generation_capacity: int = None,
+                 hash_strategy: str = HASH_STRATEGY_SEEDED, clock: Callable[[], float] = time.monotonic,
+                 key_encoder: KeyEncoder = None):
+        self.logger = logging.getLogger(type(self).__name__)
+
+        if num_generations < 2:
+            raise ValueError("At least 2 generations are needed")
+        if window_seconds is None and generation_capacity is None:
+            raise ValueError("One of window_seconds or generation_capacity is needed to trigger rotation")
+        self.num_generations: int = num_generations
+        self.window_seconds: float = window_seconds
+        self.generation_seconds: float = window_seconds / (num_generations - 1) if window_seconds else None
+        self.generation_capacity: int = generation_capacity
+        self.clock = clock
+
+        # Ring of generations, newest is the index of the one being added to
+        self.generations: List[SimpleBloomFilter] = [
+            SimpleBloomFilter(size = size, seeds = seeds, hash_strategy = hash_strategy, key_encoder = key_encoder)
+            for _ in range(num_generations)
+        ]
+        self.counts: List[int] = [0] * num_generations
+        self.newest: int = 0
+        self.started: float = clock()
+
+    @classmethod
+    def for_capacity(cls, generation_capacity: int, error_rate: float = 0.001,
+                     num_generations: int = DEFAULT_NUM_GENERATIONS, **kwargs) -> "RotatingBloomFilter":
+        # Sized so a query against every generation, each holding generation_capacity items, has at most
+        # error_rate false positives.  Rotates at generation_capacity, plus any window_seconds given.
+        size = max(8, optimal_size_of_filter(error_rate / num_generations, generation_capacity))
+        seeds = list(range(optimal_number_of_hashes(size, generation_capacity)))
+        return cls(size = size, seeds = seeds, num_generations = num_generations,
+                   generation_capacity = generation_capacity, **kwargs)
+
+    def __len__(self) -> int:
+        # Items added across the window, an item added in several generations counts once per generation
+        return sum(self.counts)
+
+    def memory_usage(self) -> int:
+        return sum(len(bloom.bit_vector) for bloom in self.generations)
+
+    def _ordered(self) -> List[SimpleBloomFilter]:
+        # Generations newest first, recent items are the most likely to be queried again
+        return [self.generations[(self.newest - age) % self.num_generations] for age in range(self.num_generations)]
+
+    def probe(self, item: Key) -> Probe:
+        # The generations share one configuration, so one probe serves them all
+        return self.generations[self.newest].probe(item)
+
+    def rotate(self):
+        # Clears the oldest generation in place and makes it the newest
+        self.newest = (self.newest + 1) % self.num_generations
+        vector_array(self.generations[self.newest].bit_vector, writable = True).fill(0)
+        self.counts[self.newest] = 0
+        self.started = self.clock()
+
+    def _expire(self):
+        # Rotates once per generation period elapsed, keeping the periods aligned to the first
+        if self.generation_seconds is None:
+            return
+        now = self.clock()
+        elapsed = now - self.started
+        periods = int(elapsed // self.generation_seconds)
+        if periods <= 0:
+            return
+        for _ in range(min(periods, self.num_generations)):
+            self.rotate()
+        self.started = now - elapsed % self.generation_seconds
+        self.logger.debug("Rotated %d generations after %d periods", min(periods, self.num_generations), periods)
+
+    def add(self, item: Key) -> bool:
+        # Returns True if the item was already in the window
+        self._expire()
+        newest = self.generations[self.newest]
+        indices = newest.indices(item)
+        if newest.query_indices(indices):
+            return True
+        present = any(bloom.query_indices(indices) for bloom in self._ordered()[1:])
+        if self.generation_capacity is not None and self.counts[self.newest] >= self.generation_capacity:
+            self.rotate()
+            newest = self.generations[self.newest]
+        newest.add_indices(indices)
+        self.counts[self.newest] += 1
+        return present
+
+    def query(self, item: Key) -> bool:
+        self._expire()
+        indices = self.generations[self.newest].indices(item)
+        return any(bloom.query_indices(indices) for bloom in self._ordered())
+
+    def _query_index_array(self, indices: np.ndarray, generations: List[SimpleBloomFilter]) -> np.ndarray:
+        result = np.zeros(len(indices), dtype = bool)
+        pending = np.arange(len(indices))
+        for bloom in generations:
+            if len(pending) == 0:
+                break
+            found = bloom.query_index_array(indices[pending])
+            result[pending[found]] = True
+            pending = pending[~found]
+        return result
+
+    def add_many(self, items: Iterable[Key]) -> np.ndarray:
+        # Returns which items were already in the window, as add does for a single item.  A repeat of an
+        # item earlier in the same batch, or a false positive of the items before it, counts as present.  The
+        # batch is split where the newest generation fills up, so the result is the same as adding the items
+        # one at a time, except that elapsed time is only checked once per batch.
+        self._expire()
+        indices = self.generations[self.newest].indices_many(items)
+        present = np.zeros(len(indices), dtype = bool)
+        start = 0
+        while start < len(indices):
+            newest = self.generations[self.newest]
+            room = len(indices)
+            segment = indices[start:]
+            if self.generation_capacity is not None:
+                room = max(0, self.generation_capacity - self.counts[self.newest])
+                segment = indices[start:start + 2 * room + SEGMENT_ROWS]
+            in_newest = covered_rows(segment, newest.bit_vector)
+            new = np.flatnonzero(~in_newest)
+            end = len(segment)
+            if len(new) > room:
+                # The row after the last one with room rotates, once the older generations have been checked
+                end = new[room]
+                new = new[:room]
+            newest.add_index_array(segment[new])
+            self.counts[self.newest] += len(new)
+            older = self._query_index_array(segment[:end], self._ordered()[1:])
+            present[start:start + end] = in_newest[:end] | older
+            start += end
+            if end < len(segment):
+                present[start] = self._query_index_array(indices[start:start + 1], self._ordered()[1:])[0]
+                self.rotate()
+                self.generations[self.newest].add_index_array(indices[start:start + 1])
+                self.counts[self.newest] += 1
+                start += 1
+        return present
+
+    def query_many(self, items: Iterable[Key]) -> np.ndarray:
+        self._expire()
+        indices = self.generations[self.newest].indices_many(items)
+        return self._query_index_array(indices, self._ordered())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import unittest
+
+from kneedeepio.filters.bloom import BlockedBloomFilter, from_buffer
+
+### GLOBALS ###
+TEST_VALUES = ["abc", "def", "foo", "bar", "moo", "cow"]
+
+TEST_MISSING_VALUES = [
+    "abcdefghijklmnopqrstuvwxyz",
+    "superunknown"
+]
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestBlockedBloomFilter(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_size_rounded_to_blocks(self):
+        self.logger.debug("test_size_rounded_to_blocks")
+        dut_blocked = BlockedBloomFilter(size = 1000, seeds = [3, 5, 7])
+        self.assertEqual(dut_blocked.num_blocks, 2)
+        self.assertEqual(dut_blocked.size, 1024)
+        self.assertEqual(len(dut_blocked.bit_vector), 128)
+
+    def test_add_sets_bits_in_one_block(self):
+        self.logger.debug("test_add_sets_bits_in_one_block")
+        dut_blocked = BlockedBloomFilter(size = 4096, seeds = [3, 5, 7, 9])
+        dut_blocked.add("abc")
+        touched = [index // 64 for index, value in enumerate(dut_blocked.bit_vector) if value]
+        self.assertEqual(len(set(touched)), 1)
+        self.assertEqual(sum(bin(value).count("1") for value in dut_blocked.bit_vector), 4)
+
+    def test_query_filter(self):
+        self.logger.debug("test_query_filter")
+        dut_blocked = BlockedBloomFilter(size = 4096, seeds = [3, 5, 7])
+        for value in TEST_VALUES:
+            dut_blocked.add(value)
+        self.assertTrue(all(dut_blocked.query(value) for value in TEST_VALUES))
+        self.assertFalse(any(dut_blocked.query(value) for value in TEST_MISSING_VALUES))
+
+    def test_batch_matches_single(self):
+        self.logger.debug("test_batch_matches_single")
+        dut_single = BlockedBloomFilter(size = 8192, seeds = list(range(10)))
+        dut_batch = BlockedBloomFilter(size = 8192, seeds = list(range(10)))
+        values = ["value-{}".format(index) for index in range(500)]
+        for value in values:
+            dut_single.add(value)
+        dut_batch.add_many(values)
+        self.assertEqual(dut_single.bit_vector, dut_batch.bit_vector)
+        probes = values[:50] + ["missing-{}".format(index) for index in range(500)]
+        self.assertEqual(list(dut_batch.query_many(probes)), [dut_single.query(value) for value in probes])
+
+    def test_serialization_round_trip(self):
+        self.logger.debug("test_serialization_round_trip")
+        dut_blocked = BlockedBloomFilter(size = 4096, seeds = [3, 5, 7])
+        dut_blocked.add_many(TEST_VALUES)
+        dut_loaded = from_buffer(dut_blocked.to_bytes())
+        self.assertIsInstance(dut_loaded, BlockedBloomFilter)
+        self.assertEqual(dut_loaded.size, dut_blocked.size)
+        self.assertTrue(dut_loaded.query_many(TEST_VALUES).all())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import unittest
+
+import numpy as np
+
+from kneedeepio.filters.bloom import CompressedBloomFilter, CountingBloomFilter, SimpleBloomFilter
+from kneedeepio.filters.bloom import SerializationException, compress, decompress, from_buffer
+from kneedeepio.filters.bloom.compression import ENCODING_NAMES, ENCODING_POSITIONS, ENCODING_RAW, ENCODING_RUNS
+from kneedeepio.filters.bloom.compression import ENCODING_ZLIB, read_compressed, varint_decode, varint_encode
+from kneedeepio.filters.bloom.serialization import to_bytes
+
+### GLOBALS ###
+FILTER_SIZE = 1 << 18
+CHUNK_BYTES = 1024
+
+### FUNCTIONS ###
+def filled_filter(num_items: int) -> SimpleBloomFilter:
+    bloom = SimpleBloomFilter(size = FILTER_SIZE, seeds = [3, 5, 7])
+    bloom.add_many(["item-{}".format(index) for index in range(num_items)])
+    return bloom
+
+### CLASSES ###
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_varint_round_trip(self):
+        self.logger.debug("test_varint_round_trip")
+        values = np.array([0, 1, 127, 128, 300, 1 << 40, (1 << 64) - 1], dtype = np.uint64)
+        encoded = varint_encode(values)
+        self.assertEqual(encoded[:5], bytes([0, 1, 127, 0x80, 1]))
+        self.assertEqual(varint_decode(encoded).tolist(), values.tolist())
+        self.assertEqual(varint_decode(b"").tolist(), [])
+        with self.assertRaises(SerializationException):
+            varint_decode(encoded[:-1])
+
+    def test_round_trip_every_encoding(self):
+        self.logger.debug("test_round_trip_every_encoding")
+        for num_items in [0, 100, 5000, 60000]:
+            bloom = filled_filter(num_items)
+            for encoding in ENCODING_NAMES:
+                buffer = compress(bloom, encoding = encoding, chunk_bytes = CHUNK_BYTES)
+                dut_bloom = decompress(buffer)
+                self.assertIsInstance(dut_bloom, SimpleBloomFilter)
+                self.assertEqual(to_bytes(dut_bloom), to_bytes(bloom))
+                dut_bloom.add("writable")
+        counting = CountingBloomFilter(size = 1000, seeds = [3, 5, 7])
+        counting.add_many(["abc", "abc", "def"])
+        self.assertEqual(decompress(compress(counting)).count("abc"), 2)
+
+    def test_picks_cheapest(self):
+        self.logger.debug("test_picks_cheapest")
+        raw_bytes = FILTER_SIZE // 8
+        self.assertEqual(read_compressed(compress(filled_filter(0))).encoding, ENCODING_RUNS)
+        self.assertEqual(read_compressed(compress(filled_filter(500))).encoding, ENCODING_POSITIONS)
+        for num_items in [0, 500, 5000, 60000]:
+            bloom = filled_filter(num_items)
+            sizes = {encoding: len(compress(bloom, encoding = encoding)) for encoding in ENCODING_NAMES}
+            chosen = compress(bloom)
+            self.assertEqual(len(chosen), min(sizes.values()))
+            self.assertLessEqual(len(chosen), sizes[ENCODING_RAW])
+        self.assertLess(len(compress(filled_filter(500))), raw_bytes // 10)
+
+    def test_compressed_queries(self):
+        self.logger.debug("test_compressed_queries")
+        bloom = filled_filter(8000)
+        present = ["item-{}".format(index) for index in range(8000)]
+        missing = ["missing-{}".format(index) for index in range(8000)]
+        for encoding in ENCODING_NAMES:
+            dut_bloom = CompressedBloomFilter(compress(bloom, encoding = encoding, chunk_bytes = CHUNK_BYTES),
+                                              cached_chunks = 4)
+            self.assertTrue(dut_bloom.query_many(present).all())
+            self.assertEqual(dut_bloom.query_many(missing).tolist(), bloom.query_many(missing).tolist())
+            self.assertTrue(all(dut_bloom.query(item) for item in present[:200]))
+            self.assertEqual([dut_bloom.query(item) for item in missing[:200]],
+                             [bloom.query(item) for item in missing[:200]])
+            self.assertLessEqual(len(dut_bloom.cache), 4)
+            self.assertEqual(to_bytes(dut_bloom.decompress()), to_bytes(bloom))
+        self.assertGreater(CompressedBloomFilter(compress(filled_filter(500))).compression_ratio(), 10)
+
+    def test_bad_buffers(self):
+        self.logger.debug("test_bad_buffers")
+        bloom = filled_filter(100)
+        buffer = compress(bloom, encoding = ENCODING_ZLIB)
+        with self.assertRaises(SerializationException):
+            decompress(buffer[:-1])
+        with self.assertRaises(SerializationException):
+            decompress(b"KDBF" + buffer[4:])
+        with self.assertRaises(SerializationException):
+            from_buffer(buffer)
+        with self.assertRaises(SerializationException):
+            CompressedBloomFilter(compress(CountingBloomFilter(size = 1000, seeds = [3])))
+        with self.assertRaises(ValueError):
+            compress(bloom, encoding = 9)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import threading
+import unittest
+
+from kneedeepio.filters.bloom import ConcurrentBloomFilter, CountingBloomFilter, SimpleBloomFilter
+from kneedeepio.filters.bloom import BlockedBloomFilter, TooFewCountsException
+
+### GLOBALS ###
+NUM_THREADS = 8
+TEST_VALUES = ["value-{}".format(index) for index in range(4000)]
+
+### FUNCTIONS ###
+def run_threads(target, values):
+    # Split values across threads and run target on each share
+    threads = [threading.Thread(target = target, args = (values[index::NUM_THREADS],)) for index in range(NUM_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+### CLASSES ###
+class TestConcurrentBloomFilter(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_simple_threads_match_sequential(self):
+        self.logger.debug("test_simple_threads_match_sequential")
+        expected = SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7])
+        expected.add_many(TEST_VALUES)
+        dut_single = ConcurrentBloomFilter(SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7]), stripe_bytes = 64)
+        run_threads(lambda values: [dut_single.add(value) for value in values], TEST_VALUES)
+        self.assertEqual(dut_single.bloom.bit_vector, expected.bit_vector)
+        dut_batch = ConcurrentBloomFilter(SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7]), stripe_bytes = 64)
+        run_threads(dut_batch.add_many, TEST_VALUES)
+        self.assertEqual(dut_batch.bloom.bit_vector, expected.bit_vector)
+        self.assertTrue(dut_batch.query_many(TEST_VALUES).all())
+        self.assertTrue(all(dut_batch.query(value) for value in TEST_VALUES[:100]))
+
+    def test_counting_threads_match_sequential(self):
+        self.logger.debug("test_counting_threads_match_sequential")
+        expected = CountingBloomFilter(size = 4096, seeds = [3, 5, 7], counter_bits = 16)
+        expected.add_many(TEST_VALUES)
+        dut_counting = ConcurrentBloomFilter(CountingBloomFilter(size = 4096, seeds = [3, 5, 7], counter_bits = 16),
+                                             num_stripes = 4, stripe_bytes = 64)
+        run_threads(lambda values: [dut_counting.add(value) for value in values], TEST_VALUES[:2000])
+        run_threads(dut_counting.add_many, TEST_VALUES[2000:])
+        self.assertEqual(dut_counting.bloom.bit_vector, expected.bit_vector)
+        self.assertTrue(dut_counting.query_many(TEST_VALUES).all())
+        run_threads(lambda values: [dut_counting.remove(value) for value in values], TEST_VALUES[:2000])
+        run_threads(dut_counting.remove_many, TEST_VALUES[2000:])
+        self.assertFalse(any(dut_counting.bloom.bit_vector))
+        self.assertFalse(dut_counting.query(TEST_VALUES[0]))
+        with self.assertRaises(TooFewCountsException):
+            dut_counting.remove(TEST_VALUES[0])
+
+    def test_unsupported_filter(self):
+        self.logger.debug("test_unsupported_filter")
+        with self.assertRaises(TypeError):
+            ConcurrentBloomFilter(BlockedBloomFilter(size = 4096, seeds = [3, 5, 7]))
@@ -2,10 +2,13 @@
 
 ### IMPORTS ###
 import logging
+import math
+import random
 import unittest
 
-from kneedeepio.filters.bloom import CountingBloomFilter
-from kneedeepio.filters.bloom import TooFewCountsException, TooManyCountsException
+from kneedeepio.filters.bloom import BloomFilterException, CountingBloomFilter
+from kneedeepio.filters.bloom import TooFewCountsException, TooManyCountsException, from_buffer
+from kneedeepio.filters.bloom.serialization import to_bytes
 
 ### GLOBALS ###
 # pylint: disable=C0301
@@ -47,6 +50,11 @@ TEST_MISSING_VALUES = [
 ]
 
 ### FUNCTIONS ###
+def zipf_stream(num_values: int, length: int, seed: int = 0):
+    # Items drawn with probability proportional to 1 / rank
+    rng = random.Random(seed)
+    values = ["key-{}".format(index) for index in range(num_values)]
+    return rng.choices(values, weights = [1 / rank for rank in range(1, num_values + 1)], k = length)
 
 ### CLASSES ###
 class TestSimpleBloomFilter(unittest.TestCase):
@@ -129,3 +137,209 @@ class TestSimpleBloomFilter(unittest.TestCase):
             dut_simple.add(item["values"][0])
             dut_simple.remove(item["values"][0])
             dut_simple.remove(item["values"][0])
+
+    def test_add_many_to_filter(self):
+        self.logger.debug("test_add_many_to_filter")
+        for item in TEST_DATA:
+            dut_simple = CountingBloomFilter(size = item["size"], seeds = item["seeds"])
+            dut_simple.add_many(item["values"])
+            self.logger.debug("DUT Byte Vector (size: %d): %s", item["size"], dut_simple.bit_vector.hex())
+            self.assertEqual(dut_simple.bit_vector, item["byte_vector"])
+
+    def test_query_many_filter(self):
+        self.logger.debug("test_query_many_filter")
+        for item in TEST_DATA:
+            dut_simple = CountingBloomFilter(size = item["size"], seeds = item["seeds"])
+            dut_simple.add_many(iter(item["values"]))
+            self.assertTrue(dut_simple.query_many(item["values"]).all())
+            self.assertFalse(dut_simple.query_many(TEST_MISSING_VALUES).any())
+
+    def test_remove_many_from_filter(self):
+        self.logger.debug("test_remove_many_from_filter")
+        for item in TEST_DATA:
+            dut_simple = CountingBloomFilter(size = item["size"], seeds = item["seeds"])
+            dut_simple.add_many(item["values"])
+            dut_simple.remove_many(item["values"])
+            self.assertEqual(dut_simple.bit_vector, bytearray(([0] * item["size"])))
+
+    def test_add_many_too_many_exception(self):
+        self.logger.debug("test_add_many_too_many_exception")
+        for item in TEST_DATA:
+            dut_simple = CountingBloomFilter(size = item["size"], seeds = item["seeds"])
+            with self.assertRaises(TooManyCountsException):
+                dut_simple.add_many([item["values"][0]] * 256)
+            self.assertEqual(dut_simple.bit_vector, bytearray(([0] * item["size"])))
+
+    def test_add_many_too_many_ignore(self):
+        self.logger.debug("test_add_many_too_many_ignore")
+        for item in TEST_DATA:
+            dut_batch = CountingBloomFilter(size = item["size"], seeds = item["seeds"], ignore_errors = True)
+            dut_scalar = CountingBloomFilter(size = item["size"], seeds = item["seeds"], ignore_errors = True)
+            dut_batch.add_many([item["values"][0]] * 300)
+            for _ in range(300):
+                dut_scalar.add(item["values"][0])
+            self.assertEqual(dut_batch.bit_vector, dut_scalar.bit_vector)
+
+    def test_remove_many_too_many_exception(self):
+        self.logger.debug("test_remove_many_too_many_exception")
+        for item in TEST_DATA:
+            dut_simple = CountingBloomFilter(size = item["size"], seeds = item["seeds"])
+            dut_simple.add(item["values"][0])
+            with self.assertRaises(TooFewCountsException):
+                dut_simple.remove_many([item["values"][0]] * 2)
+            self.assertTrue(dut_simple.query(item["values"][0]))
+
+class TestCountingBloomFilterWidths(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_vector_sizes(self):
+        self.logger.debug("test_vector_sizes")
+        for counter_bits, num_bytes in [(4, 109), (8, 217), (16, 434)]:
+            dut_counting = CountingBloomFilter(size = 217, seeds = [9, 12, 15], counter_bits = counter_bits)
+            self.assertEqual(len(dut_counting.bit_vector), num_bytes)
+        with self.assertRaises(ValueError):
+            CountingBloomFilter(size = 217, seeds = [9, 12, 15], counter_bits = 12)
+
+    def test_widths_match_byte_counters(self):
+        self.logger.debug("test_widths_match_byte_counters")
+        for item in TEST_DATA:
+            reference = CountingBloomFilter(size = item["size"], seeds = item["seeds"])
+            reference.add_many(item["values"])
+            for counter_bits in [4, 16]:
+                dut_single = CountingBloomFilter(size = item["size"], seeds = item["seeds"], counter_bits = counter_bits)
+                dut_batch = CountingBloomFilter(size = item["size"], seeds = item["seeds"], counter_bits = counter_bits)
+                for value in item["values"]:
+                    dut_single.add(value)
+                dut_batch.add_many(item["values"])
+                self.assertEqual(dut_single.bit_vector, dut_batch.bit_vector)
+                counts = [dut_single._get_counter(index) for index in range(item["size"])]  # pylint: disable=protected-access
+                self.assertEqual(counts, list(reference.bit_vector))
+                self.assertTrue(dut_batch.query_many(item["values"]).all())
+                self.assertFalse(dut_batch.query_many(TEST_MISSING_VALUES).any())
+                dut_single.remove_many(item["values"])
+                for value in item["values"]:
+                    dut_batch.remove(value)
+                self.assertFalse(any(dut_single.bit_vector))
+                self.assertFalse(any(dut_batch.bit_vector))
+
+    def test_overflow_limits(self):
+        self.logger.debug("test_overflow_limits")
+        for counter_bits, max_count in [(4, 15), (16, 65535)]:
+            dut_counting = CountingBloomFilter(size = 256, seeds = [3, 5, 7], counter_bits = counter_bits)
+            dut_counting.add_many(["abc"] * max_count)
+            with self.assertRaises(TooManyCountsException):
+                dut_counting.add("abc")
+            with self.assertRaises(TooManyCountsException):
+                dut_counting.add_many(["abc"])
+
+    def test_saturating_counters(self):
+        self.logger.debug("test_saturating_counters")
+        for counter_bits in [4, 8]:
+            dut_single = CountingBloomFilter(size = 256, seeds = [3, 5, 7], counter_bits = counter_bits, saturate = True)
+            dut_batch = CountingBloomFilter(size = 256, seeds = [3, 5, 7], counter_bits = counter_bits, saturate = True)
+            for _ in range(300):
+                dut_single.add("abc")
+            dut_batch.add_many(["abc"] * 300)
+            self.assertEqual(dut_single.bit_vector, dut_batch.bit_vector)
+            # Stuck counters are not decremented
+            for _ in range(400):
+                dut_single.remove("abc")
+            dut_batch.remove_many(["abc"] * 400)
+            self.assertEqual(dut_single.bit_vector, dut_batch.bit_vector)
+            self.assertTrue(dut_single.query("abc"))
+            with self.assertRaises(TooFewCountsException):
+                dut_single.remove("def")
+
+class TestCountingBloomFilterCounts(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_count(self):
+        self.logger.debug("test_count")
+        for counter_bits in [4, 8, 16]:
+            dut_counting = CountingBloomFilter(size = 4096, seeds = [3, 5, 7], counter_bits = counter_bits)
+            dut_counting.add_many(["abc"] * 5 + ["def"] * 2)
+            dut_counting.add("def")
+            self.assertEqual(dut_counting.count("abc"), 5)
+            self.assertEqual(dut_counting.count("def"), 3)
+            self.assertEqual(dut_counting.count("missing"), 0)
+            self.assertEqual(list(dut_counting.count_many(["abc", "def", "missing"])), [5, 3, 0])
+            dut_counting.remove("abc")
+            self.assertEqual(dut_counting.count("abc"), 4)
+
+    def test_count_error_bound(self):
+        self.logger.debug("test_count_error_bound")
+        stream = zipf_stream(2000, 20000)
+        truth = {value: stream.count(value) for value in set(stream)}
+        values = sorted(truth)
+        for conservative in [False, True]:
+            dut_counting = CountingBloomFilter(size = 8192, seeds = [0, 1, 2, 3], counter_bits = 16,
+                                               conservative = conservative)
+            dut_counting.add_many(stream)
+            estimates = dut_counting.count_many(values)
+            errors = [int(estimate) - truth[value] for value, estimate in zip(values, estimates)]
+            # Never under, and over by more than the bound for at most e ** -k of the items
+            self.assertGreaterEqual(min(errors), 0)
+            bound = dut_counting.count_error()
+            self.assertAlmostEqual(bound, math.e * 4 * len(stream) / 8192, delta = 0.01 if not conservative else 10)
+            self.logger.debug("Conservative %s: bound %f, mean error %f", conservative, bound,
+                              sum(errors) / len(errors))
+            self.assertLessEqual(sum(error > bound for error in errors), len(errors) * math.exp(-4))
+        # Conservative updates never count higher than plain ones
+        dut_plain = CountingBloomFilter(size = 1024, seeds = [0, 1, 2], counter_bits = 16)
+        dut_conservative = CountingBloomFilter(size = 1024, seeds = [0, 1, 2], counter_bits = 16, conservative = True)
+        dut_plain.add_many(stream)
+        dut_conservative.add_many(stream)
+        plain = dut_plain.count_many(values)
+        conservative = dut_conservative.count_many(values)
+        self.assertTrue((conservative <= plain).all())
+        self.assertLess(conservative.sum(), plain.sum())
+
+    def test_conservative_single_matches_batch(self):
+        self.logger.debug("test_conservative_single_matches_batch")
+        stream = zipf_stream(300, 3000, seed = 1)
+        for counter_bits in [4, 8, 16]:
+            dut_single = CountingBloomFilter(size = 512, seeds = [0, 1, 2], counter_bits = counter_bits,
+                                             conservative = True, saturate = True)
+            dut_batch = CountingBloomFilter(size = 512, seeds = [0, 1, 2], counter_bits = counter_bits,
+                                            conservative = True, saturate = True)
+            for value in stream:
+                dut_single.add(value)
+            dut_batch.add_many(stream)
+            values = sorted(set(stream))
+            single = dut_single.count_many(values)
+            batch = dut_batch.count_many(values)
+            truth = [min(stream.count(value), dut_single.max_count) for value in values]
+            self.assertTrue((single >= truth).all())
+            self.assertTrue((batch >= truth).all())
+            self.assertEqual(list(single), list(batch))
+            self.assertEqual(bytes(dut_single.bit_vector), bytes(dut_batch.bit_vector))
+
+    def test_conservative_limits(self):
+        self.logger.debug("test_conservative_limits")
+        dut_counting = CountingBloomFilter(size = 256, seeds = [3, 5, 7], counter_bits = 4, conservative = True)
+        dut_counting.add_many(["abc"] * 15)
+        self.assertEqual(dut_counting.count("abc"), 15)
+        with self.assertRaises(TooManyCountsException):
+            dut_counting.add("abc")
+        with self.assertRaises(TooManyCountsException):
+            dut_counting.add_many(["abc", "def"])
+        # A failed batch changes nothing
+        self.assertEqual(dut_counting.count("def"), 0)
+        with self.assertRaises(BloomFilterException):
+            dut_counting.remove("abc")
+        with self.assertRaises(BloomFilterException):
+            dut_counting.remove_many(["abc"])
+
+    def test_conservative_saved(self):
+        self.logger.debug("test_conservative_saved")
+        dut_counting = CountingBloomFilter(size = 256, seeds = [3, 5, 7], conservative = True)
+        dut_counting.add_many(["abc", "abc", "def"])
+        loaded = from_buffer(to_bytes(dut_counting))
+        self.assertTrue(loaded.conservative)
+        self.assertEqual(list(loaded.count_many(["abc", "def"])), [2, 1])
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import unittest
+
+from kneedeepio.filters.bloom import CountingBloomFilter, CuckooFilter, FilterFullException
+from kneedeepio.filters.bloom import TooFewCountsException, from_buffer
+from kneedeepio.filters.bloom.utils import optimal_size_of_filter
+
+### GLOBALS ###
+TEST_VALUES = ["value-{}".format(index) for index in range(5000)]
+MISSING_VALUES = ["missing-{}".format(index) for index in range(20000)]
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestCuckooFilter(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_size_rounded_to_buckets(self):
+        self.logger.debug("test_size_rounded_to_buckets")
+        dut = CuckooFilter(size = 1000)
+        self.assertEqual(dut.num_buckets, 256)
+        self.assertEqual(dut.size, 1024)
+        self.assertEqual(len(dut.bit_vector), 1024)
+        self.assertEqual(len(CuckooFilter(size = 1000, fingerprint_bits = 16).bit_vector), 2048)
+        self.assertGreaterEqual(CuckooFilter.for_capacity(5000).size * 0.95, 5000)
+        with self.assertRaises(ValueError):
+            CuckooFilter(fingerprint_bits = 12)
+
+    def test_add_query_remove(self):
+        self.logger.debug("test_add_query_remove")
+        for fingerprint_bits in [8, 16]:
+            dut = CuckooFilter.for_capacity(len(TEST_VALUES), fingerprint_bits = fingerprint_bits)
+            for value in TEST_VALUES:
+                dut.add(value)
+            self.assertEqual(len(dut), len(TEST_VALUES))
+            self.assertTrue(all(dut.query(value) for value in TEST_VALUES))
+            for value in TEST_VALUES[:100]:
+                dut.remove(value)
+            self.assertEqual(len(dut), len(TEST_VALUES) - 100)
+            self.assertTrue(all(dut.query(value) for value in TEST_VALUES[100:]))
+
+    def test_batch_matches_single(self):
+        self.logger.debug("test_batch_matches_single")
+        for fingerprint_bits in [8, 16]:
+            dut_single = CuckooFilter.for_capacity(len(TEST_VALUES), fingerprint_bits = fingerprint_bits)
+            dut_batch = CuckooFilter.for_capacity(len(TEST_VALUES), fingerprint_bits = fingerprint_bits)
+            for value in TEST_VALUES:
+                dut_single.add(value)
+            self.assertTrue(dut_batch.add_many(iter(TEST_VALUES)).all())
+            self.assertEqual(len(dut_batch), len(TEST_VALUES))
+            probes = TEST_VALUES + MISSING_VALUES[:2000]
+            expected = [dut_single.query(value) for value in probes]
+            self.assertEqual(dut_batch.query_many(probes).tolist(), expected)
+            self.assertEqual([dut_batch.query(value) for value in probes], expected)
+            self.assertTrue(dut_batch.remove_many(TEST_VALUES[:1000]).all())
+            self.assertTrue(dut_batch.query_many(TEST_VALUES[1000:]).all())
+
+    def test_duplicates_removed_one_at_a_time(self):
+        self.logger.debug("test_duplicates_removed_one_at_a_time")
+        dut = CuckooFilter(size = 1024)
+        dut.add_many(["twice", "twice"])
+        dut.remove("twice")
+        self.assertTrue(dut.query("twice"))
+        dut.remove("twice")
+        self.assertFalse(dut.query("twice"))
+        with self.assertRaises(TooFewCountsException):
+            dut.remove("twice")
+        dut.ignore_errors = True
+        self.assertFalse(dut.remove("twice"))
+
+    def test_full_filter_unchanged(self):
+        self.logger.debug("test_full_filter_unchanged")
+        dut = CuckooFilter(size = 1024, max_kicks = 100)
+        added = 0
+        with self.assertRaises(FilterFullException):
+            for value in TEST_VALUES:
+                dut.add(value)
+                added += 1
+        self.logger.debug("Load factor at first failure %f", added / dut.size)
+        self.assertGreater(added, dut.size * 0.85)
+        before = bytes(dut.bit_vector)
+        with self.assertRaises(FilterFullException):
+            dut.add_many(MISSING_VALUES[:1000])
+        dut.ignore_errors = True
+        self.assertFalse(dut.add_many(MISSING_VALUES[:1000]).all())
+        self.assertNotEqual(bytes(dut.bit_vector), before)
+        self.assertTrue(dut.query_many(TEST_VALUES[:added]).all())
+
+    def test_failed_add_rolls_back(self):
+        self.logger.debug("test_failed_add_rolls_back")
+        dut = CuckooFilter(size = 64, max_kicks = 20, ignore_errors = True)
+        dut.add_many(TEST_VALUES[:200])
+        before = bytes(dut.bit_vector)
+        for value in MISSING_VALUES[:50]:
+            if not dut.add(value):
+                self.assertEqual(bytes(dut.bit_vector), before)
+            before = bytes(dut.bit_vector)
+
+    def test_smaller_than_counting_filter(self):
+        self.logger.debug("test_smaller_than_counting_filter")
+        dut = CuckooFilter.for_capacity(len(TEST_VALUES))
+        dut.add_many(TEST_VALUES)
+        fp_rate = dut.query_many(MISSING_VALUES).mean()
+        self.logger.debug("Measured FP rate %f, bound %f", fp_rate, dut.false_positive_rate())
+        self.assertLess(fp_rate, dut.false_positive_rate())
+        counting = CountingBloomFilter(size = optimal_size_of_filter(fp_rate, len(TEST_VALUES)))
+        self.assertLess(len(dut.bit_vector), len(counting.bit_vector))
+
+    def test_serialization_round_trip(self):
+        self.logger.debug("test_serialization_round_trip")
+        dut = CuckooFilter(size = 4096, seed = 9, fingerprint_bits = 16, bucket_size = 2, max_kicks = 50)
+        dut.add_many(TEST_VALUES[:1000])
+        restored = from_buffer(dut.to_bytes())
+        self.assertIsInstance(restored, CuckooFilter)
+        self.assertEqual((restored.size, restored.seed, restored.fingerprint_bits, restored.bucket_size,
+                          restored.max_kicks), (4096, 9, 16, 2, 50))
+        self.assertTrue(restored.query_many(TEST_VALUES[:1000]).all())
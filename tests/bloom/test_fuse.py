@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import os
+import tempfile
+import unittest
+
+from kneedeepio.filters.bloom import BinaryFuseFilter, from_buffer, load
+from kneedeepio.filters.bloom.utils import optimal_size_of_filter
+
+### GLOBALS ###
+TEST_VALUES = ["value-{}".format(index) for index in range(20000)]
+MISSING_VALUES = ["missing-{}".format(index) for index in range(100000)]
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestBinaryFuseFilter(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_no_false_negatives(self):
+        self.logger.debug("test_no_false_negatives")
+        for num_items in [0, 1, 2, 3, 10, 100, 1000, len(TEST_VALUES)]:
+            for fingerprint_bits in [8, 16]:
+                dut = BinaryFuseFilter.build(TEST_VALUES[:num_items], fingerprint_bits = fingerprint_bits)
+                self.assertEqual(len(dut), num_items)
+                self.assertTrue(dut.query_many(TEST_VALUES[:num_items]).all())
+                self.assertTrue(all(dut.query(value) for value in TEST_VALUES[:num_items]))
+
+    def test_batch_matches_single(self):
+        self.logger.debug("test_batch_matches_single")
+        for fingerprint_bits in [8, 16]:
+            dut = BinaryFuseFilter.build(TEST_VALUES, fingerprint_bits = fingerprint_bits)
+            probes = TEST_VALUES[:1000] + MISSING_VALUES[:5000]
+            self.assertEqual(dut.query_many(iter(probes)).tolist(), [dut.query(value) for value in probes])
+
+    def test_false_positive_rate(self):
+        self.logger.debug("test_false_positive_rate")
+        for fingerprint_bits in [8, 16]:
+            dut = BinaryFuseFilter.build(TEST_VALUES, fingerprint_bits = fingerprint_bits)
+            fp_rate = dut.query_many(MISSING_VALUES).mean()
+            self.logger.debug("FP rate %f, expected %f", fp_rate, dut.false_positive_rate())
+            # Allowing for a few false positives more when hardly any are expected
+            self.assertLess(fp_rate, dut.false_positive_rate() * 1.5 + 10 / len(MISSING_VALUES))
+            # Smaller than a bloom filter at the same rate, a plain bloom filter has 8 slots per byte
+            bloom_bytes = optimal_size_of_filter(dut.false_positive_rate(), len(TEST_VALUES)) / 8
+            self.assertLess(len(dut.bit_vector), bloom_bytes * 0.9)
+
+    def test_duplicates(self):
+        self.logger.debug("test_duplicates")
+        dut = BinaryFuseFilter.build(TEST_VALUES[:1000] * 3)
+        self.assertEqual(len(dut), 1000)
+        self.assertTrue(dut.query_many(TEST_VALUES[:1000]).all())
+
+    def test_serialization_round_trip(self):
+        self.logger.debug("test_serialization_round_trip")
+        dut = BinaryFuseFilter.build(TEST_VALUES, fingerprint_bits = 16, seed = 5)
+        restored = from_buffer(dut.to_bytes())
+        self.assertIsInstance(restored, BinaryFuseFilter)
+        self.assertEqual(len(restored), len(TEST_VALUES))
+        self.assertEqual(restored.query_many(MISSING_VALUES).tolist(), dut.query_many(MISSING_VALUES).tolist())
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "fuse.kdbf")
+            dut.save(path)
+            with load(path) as mapped:
+                self.assertTrue(mapped.query_many(TEST_VALUES).all())
+                self.assertTrue(mapped.query(TEST_VALUES[0]))
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import unittest
+import numpy as np
+import xxhash
+
+from kneedeepio.filters.bloom import BinaryFuseFilter, BlockedBloomFilter, CountingBloomFilter, CuckooFilter
+from kneedeepio.filters.bloom import SimpleBloomFilter
+from kneedeepio.filters.bloom import HASH_STRATEGY_DOUBLE, HASH_STRATEGY_SEEDED, encode_key, struct_key_encoder
+from kneedeepio.filters.bloom.hashing import encode_keys, hash_indices, hash_indices_many
+from kneedeepio.filters.bloom.hashing import prehashed_indices, prehashed_indices_many
+
+### GLOBALS ###
+TEST_VALUES = ["abc", "def", "foo", "bar", "https://example.com/" + "x" * 200, ""]
+
+TEST_CONFIGS = [
+    {"size": 256, "seeds": [3, 5, 7]},
+    {"size": 217, "seeds": [9, 12, 15]},
+    {"size": 1 << 20, "seeds": list(range(14))}
+]
+
+TEST_INT_VALUES = [0, 1, 255, 1 << 40, (1 << 63) - 1, -1, -(1 << 63)]
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestHashing(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_batch_matches_single(self):
+        self.logger.debug("test_batch_matches_single")
+        for config in TEST_CONFIGS:
+            for strategy in [HASH_STRATEGY_SEEDED, HASH_STRATEGY_DOUBLE]:
+                batch = hash_indices_many(TEST_VALUES, config["size"], config["seeds"], strategy)
+                self.assertEqual(batch.shape, (len(TEST_VALUES), len(config["seeds"])))
+                for row, value in zip(batch, TEST_VALUES):
+                    self.assertEqual(list(row), hash_indices(value, config["size"], config["seeds"], strategy))
+
+    def test_double_hashing_indices_in_range(self):
+        self.logger.debug("test_double_hashing_indices_in_range")
+        for config in TEST_CONFIGS:
+            for value in TEST_VALUES:
+                indices = hash_indices(value, config["size"], config["seeds"], HASH_STRATEGY_DOUBLE)
+                self.assertEqual(len(indices), len(config["seeds"]))
+                self.assertTrue(all(0 <= index < config["size"] for index in indices))
+
+    def test_unknown_strategy(self):
+        self.logger.debug("test_unknown_strategy")
+        with self.assertRaises(ValueError):
+            SimpleBloomFilter(size = 256, seeds = [3, 5, 7], hash_strategy = "md5")
+        with self.assertRaises(ValueError):
+            CountingBloomFilter(size = 256, seeds = [3, 5, 7], hash_strategy = "md5")
+
+    def test_double_hashing_filters(self):
+        self.logger.debug("test_double_hashing_filters")
+        for config in TEST_CONFIGS:
+            dut_simple = SimpleBloomFilter(hash_strategy = HASH_STRATEGY_DOUBLE, **config)
+            dut_counting = CountingBloomFilter(hash_strategy = HASH_STRATEGY_DOUBLE, **config)
+            self.assertEqual(dut_simple.hash_strategy, HASH_STRATEGY_DOUBLE)
+            for value in TEST_VALUES:
+                dut_simple.add(value)
+                dut_counting.add(value)
+            self.assertTrue(dut_simple.query_many(TEST_VALUES).all())
+            self.assertTrue(dut_counting.query_many(TEST_VALUES).all())
+            for value in TEST_VALUES:
+                dut_counting.remove(value)
+            self.assertFalse(any(dut_counting.bit_vector))
+
+    def test_str_hashes_as_utf8(self):
+        self.logger.debug("test_str_hashes_as_utf8")
+        for strategy in [HASH_STRATEGY_SEEDED, HASH_STRATEGY_DOUBLE]:
+            for value in TEST_VALUES + ["caf\u00e9"]:
+                expected = hash_indices(value, 1 << 20, [3, 5, 7], strategy)
+                encoded = value.encode("utf-8")
+                self.assertEqual(hash_indices(encoded, 1 << 20, [3, 5, 7], strategy), expected)
+                self.assertEqual(hash_indices(bytearray(encoded), 1 << 20, [3, 5, 7], strategy), expected)
+        # Unchanged from hashing the str directly
+        self.assertEqual(hash_indices("abc", 1 << 20, [3], HASH_STRATEGY_SEEDED),
+                         [xxhash.xxh64_intdigest(b"abc", 3) % (1 << 20)])
+
+    def test_memoryview_keys(self):
+        self.logger.debug("test_memoryview_keys")
+        encoded = [value.encode("utf-8") for value in TEST_VALUES]
+        buffer = memoryview(b"".join(encoded))
+        bounds = np.cumsum([0] + [len(value) for value in encoded])
+        views = [buffer[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+        self.assertIs(encode_key(views[0]), views[0])
+        for strategy in [HASH_STRATEGY_SEEDED, HASH_STRATEGY_DOUBLE]:
+            self.assertTrue((hash_indices_many(views, 4096, [3, 5, 7], strategy)
+                             == hash_indices_many(TEST_VALUES, 4096, [3, 5, 7], strategy)).all())
+
+    def test_int_keys(self):
+        self.logger.debug("test_int_keys")
+        self.assertEqual(encode_key(1), b"\x01" + b"\x00" * 7)
+        self.assertEqual(encode_key(-1), b"\xff" * 8)
+        self.assertEqual(encode_key(np.uint64(1 << 63)), (1 << 63).to_bytes(8, "little"))
+        with self.assertRaises(OverflowError):
+            encode_key(1 << 64)
+        self.assertEqual([bytes(key) for key in encode_keys(np.array(TEST_INT_VALUES))],
+                         [encode_key(value) for value in TEST_INT_VALUES])
+        for strategy in [HASH_STRATEGY_SEEDED, HASH_STRATEGY_DOUBLE]:
+            batch = hash_indices_many(np.array(TEST_INT_VALUES), 4096, [3, 5, 7], strategy)
+            for row, value in zip(batch, TEST_INT_VALUES):
+                self.assertEqual(list(row), hash_indices(value, 4096, [3, 5, 7], strategy))
+
+    def test_unsupported_key(self):
+        self.logger.debug("test_unsupported_key")
+        with self.assertRaises(TypeError):
+            hash_indices(1.5, 4096, [3, 5, 7])
+        with self.assertRaises(TypeError):
+            hash_indices_many([("a", 1)], 4096, [3, 5, 7])
+
+    def test_key_encoder(self):
+        self.logger.debug("test_key_encoder")
+        records = [(index, index % 7) for index in range(200)]
+        encoder = struct_key_encoder("<QI")
+        self.assertEqual(encoder((1, 2)), b"\x01" + b"\x00" * 7 + b"\x02" + b"\x00" * 3)
+        filters = [
+            SimpleBloomFilter(size = 4096, key_encoder = encoder),
+            CountingBloomFilter(size = 4096, hash_strategy = HASH_STRATEGY_DOUBLE, key_encoder = encoder),
+            BlockedBloomFilter(size = 4096, key_encoder = encoder),
+            CuckooFilter(size = 512, key_encoder = encoder),
+        ]
+        for dut_filter in filters:
+            dut_filter.add_many(records[:100])
+            dut_filter.add(records[100])
+            self.assertTrue(dut_filter.query_many(records[:101]).all())
+            self.assertTrue(all(dut_filter.query(record) for record in records[:101]))
+            self.assertLess(dut_filter.query_many(records[101:]).mean(), 0.1)
+        dut_fuse = BinaryFuseFilter.build(records[:100], key_encoder = encoder)
+        self.assertTrue(dut_fuse.query_many(records[:100]).all())
+        self.assertTrue(dut_fuse.query(records[0]))
+
+    def test_prehashed_indices(self):
+        self.logger.debug("test_prehashed_indices")
+        digests = [0, 1, (1 << 64) - 1, 0x0123456789ABCDEF, 1 << 32]
+        for config in TEST_CONFIGS:
+            batch = prehashed_indices_many(np.array(digests, dtype = np.uint64), config["size"], len(config["seeds"]))
+            self.assertEqual(batch.shape, (len(digests), len(config["seeds"])))
+            for row, digest in zip(batch, digests):
+                indices = prehashed_indices(digest, config["size"], len(config["seeds"]))
+                self.assertEqual(list(row), indices)
+                self.assertTrue(all(0 <= index < config["size"] for index in indices))
+        # A zero hash still spreads its indices
+        self.assertEqual(len(set(prehashed_indices(0, 1 << 20, 7))), 7)
+        dut_simple = SimpleBloomFilter(size = 1 << 16, seeds = list(range(5)))
+        dut_counting = CountingBloomFilter(size = 1 << 16, seeds = list(range(5)))
+        hashes = np.array([xxhash.xxh3_64_intdigest(value) for value in TEST_VALUES], dtype = np.uint64)
+        dut_simple.add_index_array(dut_simple.prehashed_indices_many(hashes))
+        dut_counting.add_indices(dut_counting.prehashed_indices(int(hashes[0])))
+        self.assertTrue(dut_simple.query_index_array(dut_simple.prehashed_indices_many(hashes)).all())
+        self.assertTrue(dut_counting.query_indices(dut_counting.prehashed_indices(int(hashes[0]))))
+        self.assertFalse(dut_simple.query_index_array(dut_simple.prehashed_indices_many([12345])).any())
+
+    def test_bytes_and_int_filters(self):
+        self.logger.debug("test_bytes_and_int_filters")
+        dut_simple = SimpleBloomFilter(size = 1 << 16, seeds = list(range(5)))
+        ids = np.arange(1000, 2000, dtype = np.int64)
+        dut_simple.add_many(ids)
+        dut_simple.add(b"raw-key")
+        self.assertTrue(dut_simple.query_many(ids).all())
+        self.assertTrue(dut_simple.query(1500))
+        self.assertTrue(dut_simple.query(memoryview(b"a raw-key")[2:]))
+        self.assertLess(dut_simple.query_many(np.arange(5000, 10000)).mean(), 0.05)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import collections
+import logging
+import random
+import unittest
+import numpy as np
+
+from kneedeepio.filters.bloom import CountingBloomFilter, HeavyHitters
+
+### GLOBALS ###
+NUM_VALUES = 5000
+STREAM_LENGTH = 50000
+
+### FUNCTIONS ###
+def zipf_stream(seed: int = 0):
+    # Items drawn with probability proportional to 1 / rank
+    rng = random.Random(seed)
+    values = ["key-{}".format(index) for index in range(NUM_VALUES)]
+    return rng.choices(values, weights = [1 / rank for rank in range(1, NUM_VALUES + 1)], k = STREAM_LENGTH)
+
+### CLASSES ###
+class TestHeavyHitters(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_finds_heaviest(self):
+        self.logger.debug("test_finds_heaviest")
+        stream = zipf_stream()
+        expected = [value for value, _ in collections.Counter(stream).most_common(10)]
+        dut_single = HeavyHitters(CountingBloomFilter(size = 1 << 15, seeds = [0, 1, 2, 3], counter_bits = 16,
+                                                      conservative = True), num_items = 10)
+        dut_batch = HeavyHitters(CountingBloomFilter(size = 1 << 15, seeds = [0, 1, 2, 3], counter_bits = 16,
+                                                     conservative = True), num_items = 10)
+        for value in stream:
+            dut_single.add(value)
+        for start in range(0, len(stream), 5000):
+            dut_batch.add_many(stream[start:start + 5000])
+        for dut_hitters in [dut_single, dut_batch]:
+            self.assertEqual(len(dut_hitters), 10)
+            top = dut_hitters.top()
+            self.assertEqual([value for value, _ in top[:5]], expected[:5])
+            self.assertGreaterEqual(len(set(value for value, _ in top) & set(expected)), 8)
+            self.assertEqual([count for _, count in top], sorted((count for _, count in top), reverse = True))
+            self.assertEqual(len(dut_hitters.top(3)), 3)
+            self.assertIn(expected[0], dut_hitters)
+            # Lazily dropped entries don't pile up
+            self.assertLessEqual(len(dut_hitters.heap), 40)
+
+    def test_add_returns_estimate(self):
+        self.logger.debug("test_add_returns_estimate")
+        dut_hitters = HeavyHitters(CountingBloomFilter(size = 4096, seeds = [3, 5, 7]), num_items = 2)
+        self.assertEqual(dut_hitters.add("abc"), 1)
+        self.assertEqual(dut_hitters.add("abc"), 2)
+        self.assertEqual(list(dut_hitters.add_many(["def", "def", "ghi"])), [2, 2, 1])
+        self.assertEqual(dut_hitters.top(), [("abc", 2), ("def", 2)])
+        dut_hitters.add_many(["ghi"] * 2)
+        self.assertEqual(dut_hitters.top(1), [("ghi", 3)])
+        self.assertNotIn("abc", dut_hitters)
+        ids = HeavyHitters(CountingBloomFilter(size = 4096, seeds = [3, 5, 7]), num_items = 1)
+        ids.add_many(np.array([7, 7, 8], dtype = np.int64))
+        self.assertEqual(ids.top(), [(7, 2)])
+        with self.assertRaises(ValueError):
+            HeavyHitters(CountingBloomFilter(), num_items = 0)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import bz2
+import contextlib
+import gzip
+import io
+import logging
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+
+from kneedeepio.filters.bloom import BinaryFuseFilter, BlockedBloomFilter, CountingBloomFilter, CuckooFilter
+from kneedeepio.filters.bloom import FilterStore, SimpleBloomFilter, load
+from kneedeepio.filters.bloom.__main__ import main
+from kneedeepio.filters.bloom.ingest import READ_BUFFER_BYTES, build_filter, estimate_line_count, iter_csv_column
+from kneedeepio.filters.bloom.ingest import iter_items, iter_lines
+
+### GLOBALS ###
+TEST_VALUES = ["value-{}".format(index) for index in range(20000)]
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestIngest(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_lines(self, name: str, opener = open) -> str:
+        path = os.path.join(self.directory, name)
+        with opener(path, "wt", encoding = "utf-8") as output:
+            output.write("\n".join(TEST_VALUES) + "\n")
+        return path
+
+    def test_iter_lines(self):
+        self.logger.debug("test_iter_lines")
+        self.assertEqual(list(iter_lines(io.StringIO("a\r\nb\n\nc"))), ["a", "b", "c"])
+        self.assertEqual(list(iter_lines(io.StringIO("a\n\nb\n"), skip_empty = False)), ["a", "", "b"])
+        self.assertEqual(list(iter_lines(io.StringIO(""))), [])
+        # Lines and line endings split across blocks
+        long_line = "x" * (READ_BUFFER_BYTES - 1)
+        text = long_line + "\r\n" + "y" * (READ_BUFFER_BYTES + 5) + "\nz"
+        self.assertEqual(list(iter_lines(io.StringIO(text))), [long_line, "y" * (READ_BUFFER_BYTES + 5), "z"])
+
+    def test_iter_csv_column(self):
+        self.logger.debug("test_iter_csv_column")
+        text = "id,email\n1,a@x.com\n2,\"b,c@x.com\"\n3\n"
+        self.assertEqual(list(iter_csv_column(io.StringIO(text), "email")), ["a@x.com", "b,c@x.com"])
+        self.assertEqual(list(iter_csv_column(io.StringIO(text), 0)), ["1", "2", "3"])
+        self.assertEqual(list(iter_csv_column(io.StringIO(text), 0, has_header = False)), ["id", "1", "2", "3"])
+        self.assertEqual(list(iter_csv_column(io.StringIO("a;b\n1;2\n"), "b", delimiter = ";")), ["2"])
+        with self.assertRaises(ValueError):
+            list(iter_csv_column(io.StringIO(text), "name"))
+
+    def test_compressed_inputs(self):
+        self.logger.debug("test_compressed_inputs")
+        for name, opener in [("plain.txt", open), ("keys.gz", gzip.open), ("keys.bz2", bz2.open),
+                             ("keys.xz", lzma.open)]:
+            path = self.write_lines(name, opener)
+            self.assertEqual(list(iter_items([path])), TEST_VALUES)
+            self.assertEqual(estimate_line_count(path), len(TEST_VALUES))
+
+    def test_estimate_line_count_samples(self):
+        self.logger.debug("test_estimate_line_count_samples")
+        path = self.write_lines("keys.txt")
+        estimate = estimate_line_count(path, sample_bytes = 10000)
+        self.assertLess(abs(estimate - len(TEST_VALUES)), len(TEST_VALUES) * 0.05)
+
+    def test_build_filter(self):
+        self.logger.debug("test_build_filter")
+        for filter_type, cls in [("simple", SimpleBloomFilter), ("counting", CountingBloomFilter),
+                                 ("cuckoo", CuckooFilter), ("fuse", BinaryFuseFilter)]:
+            progress = []
+            bloom, report = build_filter(iter(TEST_VALUES), filter_type = filter_type, fp_rate = 0.001,
+                                         num_items = len(TEST_VALUES), chunk_size = 3000,
+                                         progress = lambda added, seconds, progress = progress: progress.append(added))
+            self.assertIsInstance(bloom, cls)
+            self.assertEqual(report.items, len(TEST_VALUES))
+            self.assertTrue(bloom.query_many(TEST_VALUES).all())
+            missing = ["missing-{}".format(index) for index in range(20000)]
+            self.assertLess(bloom.query_many(missing).mean(), 0.003)
+            if filter_type != "fuse":
+                self.assertEqual(progress[-1], len(TEST_VALUES))
+                self.assertEqual(len(progress), 7)
+        with self.assertRaises(ValueError):
+            build_filter(TEST_VALUES, filter_type = "simple")
+        for filter_type in ["cuckoo", "fuse"]:
+            with self.assertRaises(ValueError):
+                build_filter(TEST_VALUES, filter_type = filter_type, num_items = len(TEST_VALUES), workers = 2)
+
+    def test_command_line(self):
+        self.logger.debug("test_command_line")
+        path = self.write_lines("keys.txt.gz", gzip.open)
+        output = os.path.join(self.directory, "keys.kdbf")
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(main(["build", path, "-o", output, "--fp-rate", "0.001", "--quiet"]), 0)
+            self.assertEqual(main(["query", output, TEST_VALUES[0], TEST_VALUES[-1]]), 0)
+            self.assertEqual(main(["query", output, "missing-value"]), 1)
+            self.assertEqual(main(["info", output]), 0)
+        self.logger.debug("Output %s", stdout.getvalue())
+        self.assertIn("Added {} items".format(len(TEST_VALUES)), stdout.getvalue())
+        self.assertIn("missing-value\tabsent", stdout.getvalue())
+        self.assertIn("type: SimpleBloomFilter", stdout.getvalue())
+        with load(output) as bloom:
+            self.assertTrue(bloom.query_many(TEST_VALUES).all())
+
+    def test_command_line_workers(self):
+        self.logger.debug("test_command_line_workers")
+        path = self.write_lines("keys.txt")
+        output = os.path.join(self.directory, "keys.kdbf")
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(stderr):
+            self.assertEqual(main(["build", path, "-o", output, "--type", "cuckoo", "--workers", "2", "--quiet"]), 2)
+        self.assertIn("--workers", stderr.getvalue())
+        self.assertFalse(os.path.exists(output))
+
+    def test_command_line_blocked(self):
+        self.logger.debug("test_command_line_blocked")
+        output = os.path.join(self.directory, "blocked.kdbf")
+        bloom = BlockedBloomFilter(size = 1 << 16)
+        bloom.add_many(TEST_VALUES[:1000])
+        bloom.save(output)
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(io.StringIO()):
+            self.assertEqual(main(["info", output]), 0)
+            self.assertEqual(main(["query", output, TEST_VALUES[0]]), 0)
+            self.assertEqual(main(["query", "--tenant", "0", output, TEST_VALUES[0]]), 2)
+        self.logger.debug("Output %s", stdout.getvalue())
+        self.assertIn("type: BlockedBloomFilter", stdout.getvalue())
+        self.assertIn("num_hashes: 3", stdout.getvalue())
+        self.assertIn("{}\tpresent".format(TEST_VALUES[0]), stdout.getvalue())
+
+    def test_command_line_store(self):
+        self.logger.debug("test_command_line_store")
+        output = os.path.join(self.directory, "store.kdbf")
+        store = FilterStore(num_filters = 10, size = 4096)
+        store.add(3, TEST_VALUES[0])
+        store.add(4, TEST_VALUES[1])
+        store.save(output)
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            self.assertEqual(main(["info", output]), 0)
+            self.assertEqual(main(["query", "--tenant", "3", output, TEST_VALUES[0]]), 0)
+            self.assertEqual(main(["query", "--tenant", "3", output, TEST_VALUES[1]]), 1)
+            self.assertEqual(main(["query", output, TEST_VALUES[0]]), 2)
+            self.assertEqual(main(["query", "--tenant", "10", output, TEST_VALUES[0]]), 2)
+        self.logger.debug("Output %s", stdout.getvalue())
+        self.assertIn("type: FilterStore", stdout.getvalue())
+        self.assertIn("filters: 10", stdout.getvalue())
+        self.assertIn("empty_filters: 8", stdout.getvalue())
+        self.assertIn("{}\tabsent".format(TEST_VALUES[1]), stdout.getvalue())
+        self.assertIn("--tenant", stderr.getvalue())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import unittest
+
+from kneedeepio.filters.bloom import CountingBloomFilter, SimpleBloomFilter
+
+### GLOBALS ###
+TEST_VALUES = ["value-{}".format(index) for index in range(1000)]
+MISSING_VALUES = ["missing-{}".format(index) for index in range(1000)]
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestFilterMetrics(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_disabled_by_default(self):
+        self.logger.debug("test_disabled_by_default")
+        dut = SimpleBloomFilter(size = 1 << 14)
+        self.assertIsNone(dut.metrics)
+        self.assertNotIn("add", vars(dut))
+        self.assertNotIn("adds", dut.stats())
+
+    def test_counts_operations(self):
+        self.logger.debug("test_counts_operations")
+        for dut in [SimpleBloomFilter(size = 1 << 14), CountingBloomFilter(size = 1 << 14)]:
+            metrics = dut.enable_metrics()
+            for value in TEST_VALUES[:10]:
+                dut.add(value)
+            dut.add_many(iter(TEST_VALUES[10:]))
+            positives = sum(dut.query(value) for value in TEST_VALUES[:10])
+            positives += int(dut.query_many(TEST_VALUES[10:] + MISSING_VALUES).sum())
+            self.assertEqual(metrics.adds, len(TEST_VALUES))
+            self.assertEqual(metrics.queries, len(TEST_VALUES) + len(MISSING_VALUES))
+            self.assertEqual(metrics.positives, positives)
+            self.assertEqual(metrics.positives + metrics.negatives, metrics.queries)
+            self.assertGreaterEqual(metrics.positives, len(TEST_VALUES))
+
+    def test_disable_restores_methods(self):
+        self.logger.debug("test_disable_restores_methods")
+        dut = CountingBloomFilter(size = 1 << 14)
+        metrics = dut.enable_metrics()
+        dut.add("one")
+        dut.disable_metrics()
+        dut.add("two")
+        dut.remove("two")
+        self.assertEqual(metrics.adds, 1)
+        self.assertEqual(metrics.removes, 0)
+        self.assertIsNone(dut.metrics)
+        self.assertEqual(vars(dut).keys() & {"add", "remove", "query"}, set())
+
+    def test_timing_hook(self):
+        self.logger.debug("test_timing_hook")
+        calls = []
+        dut = SimpleBloomFilter(size = 1 << 14)
+        dut.enable_metrics(timing_hook = lambda name, seconds: calls.append((name, seconds)))
+        dut.add("one")
+        dut.query_many(["one", "two"])
+        self.assertEqual([name for name, _ in calls], ["add", "query_many"])
+        self.assertTrue(all(seconds >= 0 for _, seconds in calls))
+
+    def test_saturations_and_underflows(self):
+        self.logger.debug("test_saturations_and_underflows")
+        dut = CountingBloomFilter(size = 1 << 10, seeds = [3], ignore_errors = True, counter_bits = 4)
+        metrics = dut.enable_metrics()
+        for _ in range(17):
+            dut.add("hot")
+        self.assertEqual(metrics.saturations, 2)
+        dut.add_many(["hot"] * 3)
+        self.assertEqual(metrics.saturations, 5)
+        dut.remove("cold")
+        dut.remove_many(["cold", "cold"])
+        self.assertEqual(metrics.underflows, 3)
+
+    def test_saturating_counters_counted(self):
+        self.logger.debug("test_saturating_counters_counted")
+        dut = CountingBloomFilter(size = 1 << 10, seeds = [3], counter_bits = 4, saturate = True)
+        metrics = dut.enable_metrics()
+        dut.add_many(["hot"] * 20)
+        self.assertEqual(metrics.saturations, 5)
+
+    def test_stats(self):
+        self.logger.debug("test_stats")
+        for dut in [SimpleBloomFilter(size = 1 << 14, seeds = [3, 5, 7]),
+                    CountingBloomFilter(size = 1 << 14, seeds = [3, 5, 7], counter_bits = 4)]:
+            empty = dut.stats()
+            self.assertEqual(empty["fill_ratio"], 0)
+            self.assertEqual(empty["estimated_fp_rate"], 0)
+            dut.add_many(TEST_VALUES)
+            stats = dut.stats()
+            self.logger.debug("Stats %s", stats)
+            self.assertEqual(stats["num_hashes"], 3)
+            self.assertAlmostEqual(stats["fill_ratio"], stats["slots_set"] / (1 << 14))
+            self.assertLess(abs(stats["estimated_items"] - len(TEST_VALUES)), len(TEST_VALUES) * 0.05)
+            measured = dut.query_many(MISSING_VALUES * 10).mean()
+            self.assertLess(abs(stats["estimated_fp_rate"] - measured), 0.01)
+
+    def test_stats_full_filter(self):
+        self.logger.debug("test_stats_full_filter")
+        dut = SimpleBloomFilter(size = 64, seeds = [3])
+        dut.bit_vector[:] = b"\xff" * len(dut.bit_vector)
+        stats = dut.stats()
+        self.assertEqual(stats["fill_ratio"], 1)
+        self.assertEqual(stats["estimated_fp_rate"], 1.0)
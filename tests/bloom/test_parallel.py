@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import pickle
+import unittest
+
+from kneedeepio.filters.bloom import BlockedBloomFilter, CountingBloomFilter, CuckooFilter, SimpleBloomFilter
+from kneedeepio.filters.bloom import TooManyCountsException, parallel_build, struct_key_encoder
+
+### GLOBALS ###
+TEST_VALUES = ["value-{}".format(index) for index in range(5000)]
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestParallelBuild(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_matches_sequential_build(self):
+        self.logger.debug("test_matches_sequential_build")
+        configs = [
+            (SimpleBloomFilter, {"size": 1 << 16, "seeds": [3, 5, 7]}),
+            (BlockedBloomFilter, {"size": 1 << 16, "seeds": [3, 5, 7]}),
+            (CountingBloomFilter, {"size": 4096, "seeds": [3, 5, 7]}),
+            (CountingBloomFilter, {"size": 4096, "seeds": [3, 5, 7], "counter_bits": 16}),
+        ]
+        for cls, config in configs:
+            expected = cls(**config)
+            expected.add_many(TEST_VALUES)
+            dut = cls(**config)
+            total = parallel_build(dut, iter(TEST_VALUES), max_workers = 2, chunk_size = 300)
+            self.assertEqual(total, len(TEST_VALUES))
+            self.assertEqual(dut.bit_vector, expected.bit_vector)
+
+    def test_merge_into_existing_filter(self):
+        self.logger.debug("test_merge_into_existing_filter")
+        dut = SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7])
+        dut.add("existing")
+        parallel_build(dut, TEST_VALUES, max_workers = 2, chunk_size = 1000)
+        self.assertTrue(dut.query("existing"))
+        self.assertTrue(dut.query_many(TEST_VALUES).all())
+
+    def test_counting_merge_saturates(self):
+        self.logger.debug("test_counting_merge_saturates")
+        # 4 bit counters overflow once the per worker filters are summed
+        values = ["hot"] * 40
+        dut = CountingBloomFilter(size = 256, seeds = [3, 5, 7], counter_bits = 4, saturate = True)
+        parallel_build(dut, values, max_workers = 4, chunk_size = 10)
+        self.assertTrue(all(dut._get_counter(index) == 15 for index in dut.indices("hot")))  # pylint: disable=protected-access
+        strict = CountingBloomFilter(size = 256, seeds = [3, 5, 7], counter_bits = 4)
+        with self.assertRaises(TooManyCountsException):
+            parallel_build(strict, values, max_workers = 4, chunk_size = 10)
+
+    def test_key_encoder_reaches_workers(self):
+        self.logger.debug("test_key_encoder_reaches_workers")
+        records = [(index, index % 3) for index in range(2000)]
+        expected = SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7], key_encoder = struct_key_encoder("<QB"))
+        expected.add_many(records)
+        dut = SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7], key_encoder = struct_key_encoder("<QB"))
+        parallel_build(dut, records, max_workers = 2, chunk_size = 500)
+        self.assertEqual(dut.bit_vector, expected.bit_vector)
+        self.assertIs(dut.copy().key_encoder, dut.key_encoder)
+
+    def test_key_encoder_must_pickle(self):
+        self.logger.debug("test_key_encoder_must_pickle")
+        encoder = struct_key_encoder("<QB")
+        self.assertEqual(pickle.loads(pickle.dumps(encoder))((7, 1)), encoder((7, 1)))
+        dut = SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7],
+                                key_encoder = lambda item: repr(item).encode("utf-8"))
+        with self.assertRaises(ValueError):
+            parallel_build(dut, [(1, 2)], max_workers = 2)
+
+    def test_unmergeable_filter_rejected(self):
+        self.logger.debug("test_unmergeable_filter_rejected")
+        def never_read():
+            raise AssertionError("The items were read")
+            yield  # pylint: disable=unreachable
+        with self.assertRaises(TypeError):
+            parallel_build(CuckooFilter(size = 1024), never_read(), max_workers = 2)
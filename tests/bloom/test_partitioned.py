@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import asyncio
+import logging
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from kneedeepio.filters.bloom import FilterClient, LocalShard, PartitionedFilter, RemoteShard, Shard
+from kneedeepio.filters.bloom import SimpleBloomFilter
+from kneedeepio.filters.bloom.partitioned import HashRing, ring_positions
+from kneedeepio.filters.bloom.server import FilterServer
+
+### GLOBALS ###
+TEST_VALUES = ["value-{}".format(index) for index in range(4000)]
+MISSING_VALUES = ["missing-{}".format(index) for index in range(4000)]
+
+### FUNCTIONS ###
+def new_filter() -> SimpleBloomFilter:
+    return SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7])
+
+### CLASSES ###
+class StandInShard(Shard):
+    # In-process stand-in for a remote shard, yielding to the event loop like a network call would and
+    # recording the batches it gets and how many calls overlap
+    active = 0
+    most_active = 0
+
+    def __init__(self):
+        self.bloom = new_filter()
+        self.batches = []
+
+    async def _call(self, method, items):
+        StandInShard.active += 1
+        StandInShard.most_active = max(StandInShard.most_active, StandInShard.active)
+        try:
+            await asyncio.sleep(0.001)
+            self.batches.append(list(items))
+            return method(items)
+        finally:
+            StandInShard.active -= 1
+
+    async def add_many(self, items):
+        await self._call(self.bloom.add_many, items)
+
+    async def query_many(self, items):
+        return await self._call(self.bloom.query_many, items)
+
+class TestHashRing(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_adding_moves_only_to_new_shard(self):
+        self.logger.debug("test_adding_moves_only_to_new_shard")
+        positions = ring_positions([value.encode() for value in TEST_VALUES])
+        ring = HashRing(["a", "b", "c", "d"])
+        before = ring.owners(positions)
+        self.assertGreater(np.bincount(before).min(), len(TEST_VALUES) / 4 * 0.6)
+        after = ring.with_shard("e").owners(positions)
+        moved = before != after
+        self.assertTrue((after[moved] == 4).all())
+        self.assertLess(abs(moved.mean() - 0.2), 0.08)
+        with self.assertRaises(ValueError):
+            ring.with_shard("a")
+        with self.assertRaises(ValueError):
+            HashRing().owners(positions)
+
+class TestPartitionedFilter(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("asyncSetUp")
+
+    async def test_grouped_concurrent_batches(self):
+        self.logger.debug("test_grouped_concurrent_batches")
+        shards = {name: StandInShard() for name in ["a", "b", "c"]}
+        dut_filter = PartitionedFilter(shards)
+        StandInShard.most_active = 0
+        await dut_filter.add_many(TEST_VALUES)
+        # One batch per shard, all in flight together
+        self.assertEqual([len(shard.batches) for shard in shards.values()], [1, 1, 1])
+        self.assertEqual(StandInShard.most_active, 3)
+        self.assertEqual(sum(len(shard.batches[0]) for shard in shards.values()), len(TEST_VALUES))
+        routes = dut_filter.route(TEST_VALUES)
+        for name, shard in shards.items():
+            self.assertEqual(shard.batches[0], [TEST_VALUES[position] for position in routes[name]])
+        self.assertTrue((await dut_filter.query_many(TEST_VALUES)).all())
+        self.assertLess((await dut_filter.query_many(MISSING_VALUES)).mean(), 0.01)
+        await dut_filter.add("single")
+        self.assertTrue(await dut_filter.query("single"))
+        self.assertEqual((await dut_filter.query_many([])).tolist(), [])
+
+    async def test_add_shard_moves_affected_keys(self):
+        self.logger.debug("test_add_shard_moves_affected_keys")
+        shards = {name: LocalShard(new_filter()) for name in ["a", "b", "c"]}
+        dut_filter = PartitionedFilter(shards)
+        await dut_filter.add_many(TEST_VALUES)
+        new_shard = StandInShard()
+        moved = await dut_filter.add_shard("d", new_shard, iter(TEST_VALUES), batch_size = 500)
+        self.assertEqual(len(dut_filter), 4)
+        expected = dut_filter.route(TEST_VALUES)["d"]
+        self.assertEqual(moved, len(expected))
+        self.assertEqual(sorted(sum(new_shard.batches, [])), sorted(TEST_VALUES[position] for position in expected))
+        self.assertTrue((await dut_filter.query_many(TEST_VALUES)).all())
+        with self.assertRaises(ValueError):
+            await dut_filter.add_shard("d", StandInShard())
+
+    async def test_adds_during_move(self):
+        self.logger.debug("test_adds_during_move")
+        dut_filter = PartitionedFilter({"a": StandInShard(), "b": StandInShard()})
+        first, second = TEST_VALUES[:2000], TEST_VALUES[2000:]
+        await dut_filter.add_many(first)
+        adding = asyncio.ensure_future(dut_filter.add_shard("c", StandInShard(), first, batch_size = 100))
+        await asyncio.sleep(0.003)
+        self.assertIsNotNone(dut_filter.next_ring)
+        await dut_filter.add_many(second)
+        # Queries use the old ring until the move is done
+        self.assertTrue((await dut_filter.query_many(TEST_VALUES)).all())
+        await adding
+        self.assertIsNone(dut_filter.next_ring)
+        self.assertTrue((await dut_filter.query_many(TEST_VALUES)).all())
+
+    async def test_first_shard(self):
+        self.logger.debug("test_first_shard")
+        dut_filter = PartitionedFilter()
+        with self.assertRaises(ValueError):
+            await dut_filter.add("value")
+        self.assertEqual(await dut_filter.add_shard("a", StandInShard(), TEST_VALUES), 0)
+        await dut_filter.add("value")
+        self.assertTrue(await dut_filter.query("value"))
+
+    async def test_remote_shards(self):
+        self.logger.debug("test_remote_shards")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bloom.sock")
+            server = FilterServer()
+            listener = await server.start(path = path)
+            client = FilterClient(path, pool_size = 2)
+            try:
+                for name in ["a", "b"]:
+                    await client.create(name, size = 1 << 16, seeds = [3, 5, 7])
+                dut_filter = PartitionedFilter({name: RemoteShard(client, name) for name in ["a", "b"]})
+                await dut_filter.add_many(TEST_VALUES)
+                routes = dut_filter.route(TEST_VALUES)
+                for name in ["a", "b"]:
+                    expected = new_filter()
+                    expected.add_many([TEST_VALUES[position] for position in routes[name]])
+                    self.assertEqual(server.filters[name].bit_vector, expected.bit_vector)
+                self.assertTrue((await dut_filter.query_many(TEST_VALUES)).all())
+            finally:
+                await client.close()
+                listener.close()
+                await listener.wait_closed()
+                server.close()
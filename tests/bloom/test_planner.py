@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import unittest
+
+from kneedeepio.filters.bloom import BlockedBloomFilter, CountingBloomFilter, CuckooFilter, FilterPlan
+from kneedeepio.filters.bloom import SimpleBloomFilter, plan_filter
+from kneedeepio.filters.bloom.planner import FP_SLACK, OBJECTIVE_MEMORY, candidates, evaluate
+
+### GLOBALS ###
+CAPACITY = 20000
+FP_RATE = 0.01
+SAMPLE_CAPACITY = 2000
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestPlanner(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_candidates(self):
+        self.logger.debug("test_candidates")
+        found = candidates(CAPACITY, FP_RATE, ["simple", "blocked", "counting", "cuckoo"])
+        classes = set(candidate.filter_class for candidate in found)
+        self.assertEqual(classes, {SimpleBloomFilter, BlockedBloomFilter, CountingBloomFilter, CuckooFilter})
+        hash_counts = set(len(candidate.kwargs["seeds"]) for candidate in found if "seeds" in candidate.kwargs)
+        self.assertIn(7, hash_counts)
+        self.assertIn(2, hash_counts)
+        # 8 bit fingerprints can't reach 1%
+        self.assertEqual([candidate.kwargs["fingerprint_bits"] for candidate in found
+                          if candidate.filter_class is CuckooFilter], [16])
+        counting = [candidate for candidate in found if candidate.filter_class is CountingBloomFilter]
+        self.assertEqual(set(candidate.kwargs["counter_bits"] for candidate in counting), {4, 8, 16})
+
+    def test_evaluate_measures(self):
+        self.logger.debug("test_evaluate_measures")
+        plans = evaluate(CAPACITY, FP_RATE, filter_types = ["simple"], sample_capacity = SAMPLE_CAPACITY)
+        self.assertGreater(len(plans), 0)
+        for plan in plans:
+            self.logger.debug("%s", plan.describe())
+            self.assertIsInstance(plan, FilterPlan)
+            self.assertLess(plan.measured_fp_rate, FP_RATE * 2)
+            self.assertGreater(plan.add_ns, 0)
+            self.assertGreater(plan.query_ns, 0)
+            self.assertGreater(plan.batch_query_ns, 0)
+            self.assertEqual(plan.memory_bytes, (plan.kwargs["size"] + 7) // 8)
+
+    def test_plan_builds_and_meets_target(self):
+        self.logger.debug("test_plan_builds_and_meets_target")
+        plan = plan_filter(CAPACITY, FP_RATE, sample_capacity = SAMPLE_CAPACITY)
+        self.assertLessEqual(plan.measured_fp_rate, FP_RATE * FP_SLACK)
+        bloom = plan.build()
+        self.assertIsInstance(bloom, plan.filter_class)
+        items = ["item-{}".format(index) for index in range(CAPACITY)]
+        bloom.add_many(items)
+        self.assertTrue(bloom.query_many(items).all())
+        absent = ["absent-{}".format(index) for index in range(20000)]
+        self.assertLessEqual(bloom.query_many(absent).mean(), FP_RATE * FP_SLACK)
+
+    def test_budgets(self):
+        self.logger.debug("test_budgets")
+        plans = evaluate(CAPACITY, FP_RATE, sample_capacity = SAMPLE_CAPACITY)
+        smallest = min(plan.memory_bytes for plan in plans if plan.measured_fp_rate <= FP_RATE * FP_SLACK)
+        plan = plan_filter(CAPACITY, FP_RATE, objective = OBJECTIVE_MEMORY, sample_capacity = SAMPLE_CAPACITY)
+        self.assertLessEqual(plan.memory_bytes, smallest * 1.01)
+        plan = plan_filter(CAPACITY, FP_RATE, max_memory_bytes = smallest * 1.2, sample_capacity = SAMPLE_CAPACITY)
+        self.assertLessEqual(plan.memory_bytes, smallest * 1.2)
+        with self.assertRaises(ValueError):
+            plan_filter(CAPACITY, FP_RATE, max_memory_bytes = 100, sample_capacity = SAMPLE_CAPACITY)
+        with self.assertRaises(ValueError):
+            plan_filter(CAPACITY, FP_RATE, max_query_ns = 0.001, sample_capacity = SAMPLE_CAPACITY)
+        with self.assertRaises(ValueError):
+            plan_filter(CAPACITY, FP_RATE, filter_types = ["fuse"])
+
+    def test_removable(self):
+        self.logger.debug("test_removable")
+        plan = plan_filter(CAPACITY, FP_RATE, removable = True, sample_capacity = SAMPLE_CAPACITY)
+        self.assertIn(plan.filter_class, (CountingBloomFilter, CuckooFilter))
+        bloom = plan.build()
+        bloom.add("abc")
+        bloom.remove("abc")
+        self.assertFalse(bloom.query("abc"))
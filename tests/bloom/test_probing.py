@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import unittest
+
+import numpy as np
+
+from kneedeepio.filters.bloom import HASH_STRATEGY_DOUBLE, BlockedBloomFilter, ConcurrentBloomFilter
+from kneedeepio.filters.bloom import CountingBloomFilter, FilterStore, IncompatibleFiltersException
+from kneedeepio.filters.bloom import RotatingBloomFilter, SimpleBloomFilter, compress, compute_indices, query_matrix
+from kneedeepio.filters.bloom.compression import CompressedBloomFilter
+
+### GLOBALS ###
+TEST_VALUES = ["value-{}".format(index) for index in range(300)]
+MISSING_VALUES = ["missing-{}".format(index) for index in range(300)]
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestProbing(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_probe_matches_item(self):
+        self.logger.debug("test_probe_matches_item")
+        simple = SimpleBloomFilter(size = 4096, seeds = [3, 5, 7])
+        counting = CountingBloomFilter(size = 4096, seeds = [3, 5, 7])
+        probe = simple.probe("abc")
+        self.assertEqual(probe.indices, simple.indices("abc"))
+        self.assertEqual(compute_indices("abc", 4096, [3, 5, 7]).indices, probe.indices)
+        simple.add(probe)
+        counting.add(probe)
+        counting.add("abc")
+        self.assertTrue(simple.query("abc"))
+        self.assertEqual(counting.count(probe), 2)
+        counting.remove(probe)
+        self.assertEqual(counting.count("abc"), 1)
+        # Wrappers and other filters of the same configuration take it too
+        concurrent = ConcurrentBloomFilter(SimpleBloomFilter(size = 4096, seeds = [3, 5, 7]))
+        concurrent.add(probe)
+        self.assertTrue(concurrent.query("abc"))
+        self.assertTrue(CompressedBloomFilter(compress(simple)).query(probe))
+        store = FilterStore(num_filters = 4, size = 4096, seeds = [3, 5, 7])
+        store.add(2, probe)
+        self.assertTrue(store.query(2, "abc"))
+        self.assertFalse(store.query(1, store.probe("abc")))
+        windowed = RotatingBloomFilter(size = 4096, seeds = [3, 5, 7], generation_capacity = 100)
+        windowed.add(windowed.probe("abc"))
+        self.assertTrue(windowed.query(probe))
+
+    def test_incompatible_probe(self):
+        self.logger.debug("test_incompatible_probe")
+        probe = compute_indices("abc", 4096, [3, 5, 7])
+        for bloom in [SimpleBloomFilter(size = 4097, seeds = [3, 5, 7]), SimpleBloomFilter(size = 4096, seeds = [3, 5]),
+                      CountingBloomFilter(size = 4096, seeds = [3, 5, 7], hash_strategy = HASH_STRATEGY_DOUBLE)]:
+            with self.assertRaises(IncompatibleFiltersException):
+                bloom.query(probe)
+            with self.assertRaises(IncompatibleFiltersException):
+                bloom.add(probe)
+
+    def test_query_matrix(self):
+        self.logger.debug("test_query_matrix")
+        filters = [SimpleBloomFilter(size = 8192, seeds = [3, 5, 7]) for _ in range(3)]
+        filters.append(CountingBloomFilter(size = 8192, seeds = [3, 5, 7]))
+        filters.append(SimpleBloomFilter(size = 4096, seeds = [1, 2], hash_strategy = HASH_STRATEGY_DOUBLE))
+        filters.append(BlockedBloomFilter(size = 8192, seeds = [3, 5, 7]))
+        for column, bloom in enumerate(filters):
+            bloom.add_many(TEST_VALUES[column::2])
+        items = TEST_VALUES + MISSING_VALUES
+        dut_matrix = query_matrix(filters, iter(items))
+        self.assertEqual(dut_matrix.shape, (len(items), len(filters)))
+        for column, bloom in enumerate(filters):
+            self.assertEqual(dut_matrix[:, column].tolist(), bloom.query_many(items).tolist())
+        self.assertEqual(query_matrix([], items).shape, (len(items), 0))
+        self.assertEqual(query_matrix(filters, np.array([], dtype = np.int64)).shape, (0, len(filters)))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import asyncio
+import logging
+import unittest
+import numpy as np
+
+from kneedeepio.filters.bloom import ProtocolException
+from kneedeepio.filters.bloom.protocol import (REQUEST_STRUCT, decode_items, decode_results, encode_items,
+                                               encode_results, pack_request, read_request)
+
+### GLOBALS ###
+
+### FUNCTIONS ###
+async def read_from(data: bytes):
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return await read_request(reader)
+
+### CLASSES ###
+class TestProtocol(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_items_round_trip(self):
+        self.logger.debug("test_items_round_trip")
+        for items in [[], [""], ["one", "two", "three"], ["café", "☃" * 100, "x" * 70000]]:
+            self.assertEqual(decode_items(encode_items(items)), items)
+        self.assertEqual(decode_items(encode_items(iter(["a", "b"]))), ["a", "b"])
+
+    def test_items_rejects_bad_lengths(self):
+        self.logger.debug("test_items_rejects_bad_lengths")
+        payload = encode_items(["one", "two"])
+        with self.assertRaises(ProtocolException):
+            decode_items(payload[:-1])
+        with self.assertRaises(ProtocolException):
+            decode_items(payload + b"x")
+        with self.assertRaises(ProtocolException):
+            decode_items(payload[:6])
+
+    def test_results_round_trip(self):
+        self.logger.debug("test_results_round_trip")
+        rng = np.random.default_rng(1)
+        for count in [0, 1, 7, 8, 9, 1000]:
+            results = rng.random(count) < 0.5
+            payload = encode_results(results)
+            self.assertEqual(len(payload), 4 + (count + 7) // 8)
+            np.testing.assert_array_equal(decode_results(payload), results)
+
+    def test_request_name(self):
+        self.logger.debug("test_request_name")
+        self.assertEqual(asyncio.run(read_from(pack_request(7, 3, "café", b"payload"))), (7, 3, "café", b"payload"))
+        # A name that isn't UTF-8 is a protocol error, not an unexpected exception
+        with self.assertRaises(ProtocolException):
+            asyncio.run(read_from(REQUEST_STRUCT.pack(7, 3, 2, 0) + b"\xff\xfe"))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import unittest
+
+from kneedeepio.filters.bloom import CountingBloomFilter, IncompatibleFiltersException, MissingDeltaException
+from kneedeepio.filters.bloom import SerializationException, SimpleBloomFilter
+from kneedeepio.filters.bloom.replication import read_delta
+from kneedeepio.filters.bloom.serialization import to_bytes
+
+### GLOBALS ###
+FILTER_SIZE = 1 << 24
+PAGE_BYTES = 1024
+
+### FUNCTIONS ###
+def items(start: int, end: int):
+    return ["item-{}".format(index) for index in range(start, end)]
+
+### CLASSES ###
+class TestReplication(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_simple_catches_up(self):
+        self.logger.debug("test_simple_catches_up")
+        primary = SimpleBloomFilter(size = FILTER_SIZE, seeds = [3, 5, 7])
+        primary.add_many(items(0, 5000))
+        primary.enable_tracking(PAGE_BYTES)
+        replica = SimpleBloomFilter(size = FILTER_SIZE, seeds = [3, 5, 7])
+        self.assertTrue(replica.apply_delta(primary.export_delta()))
+        self.assertEqual(to_bytes(replica), to_bytes(primary))
+
+        version = primary.dirty.version
+        primary.add("single")
+        primary.add_many(items(5000, 5100))
+        delta = primary.export_delta(version)
+        # 101 items set at most 303 bits, far fewer pages than the vector holds
+        self.assertLessEqual(len(read_delta(delta).pages), 303)
+        self.assertLess(len(delta), FILTER_SIZE // 8 // 4)
+        self.assertTrue(replica.apply_delta(delta))
+        self.assertEqual(to_bytes(replica), to_bytes(primary))
+        self.assertEqual(replica.dirty.version, primary.dirty.version)
+        self.assertTrue(replica.query_many(items(0, 5100)).all())
+
+        # Applying a delta twice changes nothing
+        self.assertTrue(replica.apply_delta(delta))
+        self.assertEqual(to_bytes(replica), to_bytes(primary))
+        other = SimpleBloomFilter(size = FILTER_SIZE, seeds = [3, 5, 7])
+        other.add_many(items(9000, 9100))
+        primary.update(other)
+        self.assertTrue(replica.apply_delta(primary.export_delta(version)))
+        self.assertEqual(to_bytes(replica), to_bytes(primary))
+        self.assertEqual(len(read_delta(primary.export_delta(primary.dirty.version)).pages), 0)
+
+    def test_counting_overwrites(self):
+        self.logger.debug("test_counting_overwrites")
+        for counter_bits in [4, 8, 16]:
+            primary = CountingBloomFilter(size = 50000, seeds = [3, 5, 7], counter_bits = counter_bits)
+            primary.enable_tracking(PAGE_BYTES)
+            replica = CountingBloomFilter(size = 50000, seeds = [3, 5, 7], counter_bits = counter_bits)
+            primary.add_many(items(0, 1000))
+            first = primary.export_delta(0)
+            primary.remove_many(items(0, 500))
+            primary.add("single")
+            primary.remove("single")
+            second = primary.export_delta(primary.dirty.version - 3)
+            self.assertTrue(replica.apply_delta(first))
+            self.assertTrue(replica.apply_delta(second))
+            self.assertEqual(to_bytes(replica), to_bytes(primary))
+            self.assertEqual(replica.count("item-700"), primary.count("item-700"))
+            # Applying the older delta again would undo the removes
+            self.assertFalse(replica.apply_delta(first))
+            self.assertEqual(to_bytes(replica), to_bytes(primary))
+
+    def test_missing_and_mismatched(self):
+        self.logger.debug("test_missing_and_mismatched")
+        primary = CountingBloomFilter(size = 50000, seeds = [3, 5, 7])
+        primary.enable_tracking(PAGE_BYTES)
+        primary.add_many(items(0, 100))
+        primary.add_many(items(100, 200))
+        replica = CountingBloomFilter(size = 50000, seeds = [3, 5, 7])
+        with self.assertRaises(MissingDeltaException):
+            replica.apply_delta(primary.export_delta(1))
+        with self.assertRaises(IncompatibleFiltersException):
+            CountingBloomFilter(size = 50000, seeds = [3, 5]).apply_delta(primary.export_delta())
+        other_pages = CountingBloomFilter(size = 50000, seeds = [3, 5, 7])
+        other_pages.enable_tracking(2 * PAGE_BYTES)
+        with self.assertRaises(IncompatibleFiltersException):
+            other_pages.apply_delta(primary.export_delta())
+        with self.assertRaises(IncompatibleFiltersException):
+            SimpleBloomFilter(size = 50000, seeds = [3, 5, 7]).apply_delta(primary.export_delta())
+        with self.assertRaises(SerializationException):
+            replica.apply_delta(primary.export_delta()[:-1])
+        with self.assertRaises(ValueError):
+            SimpleBloomFilter().export_delta()
+        with self.assertRaises(ValueError):
+            SimpleBloomFilter().enable_tracking(100)
+
+    def test_tracking_is_opt_in(self):
+        self.logger.debug("test_tracking_is_opt_in")
+        bloom = SimpleBloomFilter(size = FILTER_SIZE)
+        self.assertIsNone(bloom.dirty)
+        self.assertNotIn("add_index_array", bloom.__dict__)
+        dirty = bloom.enable_tracking(PAGE_BYTES)
+        bloom.add("abc")
+        self.assertEqual(dirty.version, 1)
+        pages = set(index // 8 // PAGE_BYTES for index in bloom.indices("abc"))
+        self.assertEqual(dirty.pages_since(0).tolist(), sorted(pages))
+        metrics = bloom.enable_metrics()
+        bloom.add_many(items(0, 10))
+        self.assertEqual((metrics.adds, dirty.version), (10, 2))
+        bloom.disable_tracking()
+        self.assertIsNone(bloom.dirty)
+        bloom.add("def")
+        self.assertEqual(metrics.adds, 11)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import unittest
+
+from kneedeepio.filters.bloom import ScalableBloomFilter
+
+### GLOBALS ###
+TEST_VALUES = ["value-{}".format(index) for index in range(2000)]
+
+TEST_MISSING_VALUES = ["missing-{}".format(index) for index in range(20000)]
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestScalableBloomFilter(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_grows_with_items(self):
+        self.logger.debug("test_grows_with_items")
+        dut_scalable = ScalableBloomFilter(initial_capacity = 100, error_rate = 0.01)
+        self.assertEqual(len(dut_scalable.slices), 1)
+        initial_memory = dut_scalable.memory_usage()
+        for value in TEST_VALUES:
+            dut_scalable.add(value)
+        # Items that were false positives on add are not counted
+        self.assertGreater(len(dut_scalable), 0.99 * len(TEST_VALUES))
+        self.assertEqual(len(dut_scalable.slices), 5)
+        self.assertGreater(dut_scalable.memory_usage(), initial_memory)
+        self.assertTrue(all(dut_scalable.query(value) for value in TEST_VALUES))
+        count = len(dut_scalable)
+        self.assertTrue(dut_scalable.add(TEST_VALUES[0]))
+        self.assertEqual(len(dut_scalable), count)
+
+    def test_false_positive_rate_bounded(self):
+        self.logger.debug("test_false_positive_rate_bounded")
+        dut_scalable = ScalableBloomFilter(initial_capacity = 100, error_rate = 0.01)
+        dut_scalable.add_many(TEST_VALUES)
+        predicted = dut_scalable.false_positive_rate()
+        self.logger.debug("Predicted FP rate: %f", predicted)
+        self.assertLess(predicted, 0.01)
+        measured = dut_scalable.query_many(TEST_MISSING_VALUES).mean()
+        self.logger.debug("Measured FP rate: %f", measured)
+        self.assertLess(measured, 0.02)
+
+    def test_add_many(self):
+        self.logger.debug("test_add_many")
+        dut_batch = ScalableBloomFilter(initial_capacity = 100, error_rate = 0.01)
+        dut_single = ScalableBloomFilter(initial_capacity = 100, error_rate = 0.01)
+        present = dut_batch.add_many(TEST_VALUES[:1000])
+        # A few items are false positives of the items added before them, and are skipped as by add
+        self.assertEqual(list(present), [dut_single.add(value) for value in TEST_VALUES[:1000]])
+        self.assertEqual(dut_batch.counts, dut_single.counts)
+        self.assertEqual([bytes(bloom.bit_vector) for bloom in dut_batch.slices],
+                         [bytes(bloom.bit_vector) for bloom in dut_single.slices])
+        self.assertTrue(dut_batch.query_many(TEST_VALUES[:1000]).all())
+        self.assertTrue(dut_batch.add_many(TEST_VALUES[:10]).all())
+        self.assertEqual(list(dut_batch.query_many(TEST_MISSING_VALUES[:100])),
+                         [dut_batch.query(value) for value in TEST_MISSING_VALUES[:100]])
+
+    def test_add_many_repeats(self):
+        self.logger.debug("test_add_many_repeats")
+        values = [TEST_VALUES[index % 50] for index in range(1000)]
+        dut_single = ScalableBloomFilter(initial_capacity = 100, error_rate = 0.01)
+        expected = [dut_single.add(value) for value in values]
+        dut_batch = ScalableBloomFilter(initial_capacity = 100, error_rate = 0.01)
+        present = dut_batch.add_many(values)
+        self.assertEqual(list(present), expected)
+        self.assertEqual(present.sum(), 950)
+        self.assertEqual((len(dut_batch), len(dut_batch.slices)), (50, 1))
+        self.assertEqual((len(dut_batch), len(dut_batch.slices)), (len(dut_single), len(dut_single.slices)))
+
+    def test_add_many_false_positives(self):
+        self.logger.debug("test_add_many_false_positives")
+        # A loose error rate, so many items are false positives of earlier items in the same batch
+        dut_single = ScalableBloomFilter(initial_capacity = 20, error_rate = 0.5)
+        dut_batch = ScalableBloomFilter(initial_capacity = 20, error_rate = 0.5)
+        dut_single.add_many(TEST_VALUES[:30])
+        dut_batch.add_many(TEST_VALUES[:30])
+        values = TEST_VALUES[:2000]
+        expected = [dut_single.add(value) for value in values]
+        present = dut_batch.add_many(values)
+        self.assertGreater(sum(expected), 100)
+        self.assertEqual(list(present), expected)
+        self.assertEqual(dut_batch.counts, dut_single.counts)
+
+    def test_invalid_parameters(self):
+        self.logger.debug("test_invalid_parameters")
+        with self.assertRaises(ValueError):
+            ScalableBloomFilter(initial_capacity = 0)
+        with self.assertRaises(ValueError):
+            ScalableBloomFilter(error_rate = 1.5)
+        with self.assertRaises(ValueError):
+            ScalableBloomFilter(tightening_ratio = 1)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import io
+import logging
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from kneedeepio.filters.bloom import CountingBloomFilter, SimpleBloomFilter
+from kneedeepio.filters.bloom import HASH_STRATEGY_DOUBLE, HASH_STRATEGY_SEEDED, SerializationException
+from kneedeepio.filters.bloom import from_buffer, load, read_from
+
+### GLOBALS ###
+TEST_VALUES = ["abc", "def", "foo", "bar", "moo", "cow"]
+
+TEST_MISSING_VALUES = [
+    "abcdefghijklmnopqrstuvwxyz",
+    "superunknown"
+]
+
+### FUNCTIONS ###
+def build_filters():
+    filters = []
+    for strategy in [HASH_STRATEGY_SEEDED, HASH_STRATEGY_DOUBLE]:
+        filters.append(SimpleBloomFilter(size = 217, seeds = [9, 12, 15], hash_strategy = strategy))
+        filters.append(CountingBloomFilter(size = 256, seeds = [3, 5, 7], hash_strategy = strategy))
+    for bloom in filters:
+        bloom.add_many(TEST_VALUES)
+    return filters
+
+### CLASSES ###
+class TestSerialization(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def assert_same_filter(self, dut, expected):
+        self.assertIs(type(dut), type(expected))
+        self.assertEqual(dut.size, expected.size)
+        self.assertEqual(dut.seeds, expected.seeds)
+        self.assertEqual(dut.hash_strategy, expected.hash_strategy)
+        self.assertEqual(bytes(dut.bit_vector), bytes(expected.bit_vector))
+        self.assertTrue(dut.query_many(TEST_VALUES).all())
+        self.assertFalse(dut.query_many(TEST_MISSING_VALUES).any())
+
+    def test_bytes_round_trip(self):
+        self.logger.debug("test_bytes_round_trip")
+        for bloom in build_filters():
+            data = bloom.to_bytes()
+            self.assertEqual(len(data) % 8, len(bloom.bit_vector) % 8)
+            self.assert_same_filter(from_buffer(data), bloom)
+            self.assert_same_filter(type(bloom).from_buffer(data), bloom)
+
+    def test_from_buffer_is_zero_copy(self):
+        self.logger.debug("test_from_buffer_is_zero_copy")
+        bloom = SimpleBloomFilter(size = 256, seeds = [3, 5, 7])
+        data = bytearray(bloom.to_bytes())
+        dut = SimpleBloomFilter.from_buffer(data)
+        dut.add("abc")
+        self.assertTrue(np.shares_memory(np.frombuffer(dut.bit_vector, dtype = np.uint8),
+                                         np.frombuffer(data, dtype = np.uint8)))
+        self.assertTrue(SimpleBloomFilter.from_buffer(data).query("abc"))
+        readonly = SimpleBloomFilter.from_buffer(bytes(data))
+        with self.assertRaises(ValueError):
+            readonly.add_many(["def"])
+
+    def test_stream_round_trip(self):
+        self.logger.debug("test_stream_round_trip")
+        for bloom in build_filters():
+            stream = io.BytesIO()
+            bloom.write_to(stream, chunk_size = 5)
+            self.assertEqual(stream.getvalue(), bloom.to_bytes())
+            stream.seek(0)
+            self.assert_same_filter(read_from(stream, chunk_size = 7), bloom)
+            stream.seek(0)
+            self.assert_same_filter(type(bloom).read_from(stream), bloom)
+
+    def test_save_and_load(self):
+        self.logger.debug("test_save_and_load")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "filter.kdbf")
+            for bloom in build_filters():
+                bloom.save(path)
+                with load(path) as dut:
+                    self.assert_same_filter(dut, bloom)
+                with type(bloom).load(path, writable = True) as dut:
+                    dut.add("superunknown")
+                    dut.flush()
+                with load(path) as dut:
+                    self.assertTrue(dut.query("superunknown"))
+
+    def test_invalid_buffers(self):
+        self.logger.debug("test_invalid_buffers")
+        data = SimpleBloomFilter(size = 256, seeds = [3, 5, 7]).to_bytes()
+        with self.assertRaises(SerializationException):
+            from_buffer(b"XXXX" + data[4:])
+        with self.assertRaises(SerializationException):
+            from_buffer(data[:20])
+        with self.assertRaises(SerializationException):
+            from_buffer(data[:-1])
+        with self.assertRaises(SerializationException):
+            CountingBloomFilter.from_buffer(data)
+        with self.assertRaises(SerializationException):
+            read_from(io.BytesIO(data[:-1]))
+
+    def test_counter_width_round_trip(self):
+        self.logger.debug("test_counter_width_round_trip")
+        for counter_bits in [4, 8, 16]:
+            bloom = CountingBloomFilter(size = 217, seeds = [9, 12, 15], counter_bits = counter_bits, saturate = True)
+            bloom.add_many(TEST_VALUES)
+            dut = from_buffer(bloom.to_bytes())
+            self.assertEqual(dut.counter_bits, counter_bits)
+            self.assertTrue(dut.saturate)
+            self.assert_same_filter(dut, bloom)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import asyncio
+import logging
+import os
+import tempfile
+import unittest
+
+from kneedeepio.filters.bloom import FilterClient, RemoteException, SimpleBloomFilter
+from kneedeepio.filters.bloom.server import FilterServer
+
+### GLOBALS ###
+TEST_VALUES = ["value-{}".format(index) for index in range(2000)]
+MISSING_VALUES = ["missing-{}".format(index) for index in range(2000)]
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestFilterServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("asyncSetUp")
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "bloom.sock")
+        self.server = FilterServer()
+        self.listener = await self.server.start(path = self.path)
+        self.client = FilterClient(self.path, pool_size = 2)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        self.listener.close()
+        await self.listener.wait_closed()
+        self.server.close()
+        self.directory.cleanup()
+
+    async def test_matches_local_filter(self):
+        self.logger.debug("test_matches_local_filter")
+        await self.client.create("users", size = 1 << 16, seeds = [3, 5, 7])
+        expected = SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7])
+        expected.add_many(TEST_VALUES)
+        await self.client.add_many("users", TEST_VALUES)
+        self.assertEqual(self.server.filters["users"].bit_vector, expected.bit_vector)
+        self.assertTrue((await self.client.query_many("users", TEST_VALUES)).all())
+        self.assertEqual((await self.client.query_many("users", MISSING_VALUES)).tolist(),
+                         expected.query_many(MISSING_VALUES).tolist())
+        self.assertTrue(await self.client.query("users", TEST_VALUES[0]))
+        self.assertEqual(await self.client.list(), ["users"])
+
+    async def test_pipelined_requests(self):
+        self.logger.debug("test_pipelined_requests")
+        await self.client.create("events", filter_type = "counting", size = 1 << 16, seeds = [3, 5, 7])
+        batches = [TEST_VALUES[index:index + 100] for index in range(0, len(TEST_VALUES), 100)]
+        await asyncio.gather(*[self.client.add_many("events", batch) for batch in batches])
+        results = await asyncio.gather(*[self.client.query_many("events", batch) for batch in batches])
+        self.assertTrue(all(result.all() for result in results))
+        await asyncio.gather(*[self.client.remove_many("events", batch) for batch in batches])
+        self.assertEqual((await self.client.stats("events"))["slots_set"], 0)
+
+    async def test_errors_reported(self):
+        self.logger.debug("test_errors_reported")
+        await self.client.create("plain")
+        with self.assertRaises(RemoteException):
+            await self.client.create("plain")
+        with self.assertRaises(RemoteException):
+            await self.client.query("nothing", "value")
+        with self.assertRaises(RemoteException):
+            await self.client.remove("plain", "value")
+        with self.assertRaises(RemoteException):
+            await self.client.create("odd", filter_type = "simple", counter_bits = 4)
+        with self.assertRaises(RemoteException):
+            await self.client.create("odd", filter_type = "cuckoo")
+        # The connections survive failed requests
+        await self.client.add("plain", "value")
+        self.assertTrue(await self.client.query("plain", "value"))
+        await self.client.drop("plain")
+        self.assertEqual(await self.client.list(), [])
+
+    async def test_drop_flushes(self):
+        self.logger.debug("test_drop_flushes")
+        path = os.path.join(self.directory.name, "mapped.bits")
+        self.server.add_filter("mapped", SimpleBloomFilter.open_mmap(path, size = 1 << 16, writable = True))
+        await self.client.add_many("mapped", TEST_VALUES)
+        await self.client.drop("mapped")
+        with open(path, "rb") as saved:
+            reopened = SimpleBloomFilter(size = 1 << 16, bit_vector = bytearray(saved.read()))
+        self.assertTrue(reopened.query_many(TEST_VALUES).all())
+
+    async def test_tcp(self):
+        self.logger.debug("test_tcp")
+        listener = await self.server.start(host = "127.0.0.1", port = 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with FilterClient(("127.0.0.1", port)) as client:
+            await client.create("tcp")
+            await client.add_many("tcp", TEST_VALUES)
+            self.assertTrue((await client.query_many("tcp", TEST_VALUES)).all())
+        listener.close()
+        await listener.wait_closed()
+
+    async def test_reconnects(self):
+        self.logger.debug("test_reconnects")
+        await self.client.create("plain")
+        for connection in self.client.connections:
+            await connection.close()
+        await self.client.add("plain", "value")
+        self.assertTrue(await self.client.query("plain", "value"))
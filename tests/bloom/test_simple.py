@@ -4,7 +4,8 @@
 import logging
 import unittest
 
-from kneedeepio.filters.bloom import SimpleBloomFilter
+from kneedeepio.filters.bloom import SimpleBloomFilter, IncompatibleFiltersException
+from kneedeepio.filters.bloom import estimate_intersection_size, estimate_union_size
 
 ### GLOBALS ###
 # pylint: disable=C0301
@@ -73,3 +74,67 @@ class TestSimpleBloomFilter(unittest.TestCase):
             for value in TEST_MISSING_VALUES:
                 self.logger.debug("Querying Value: %s", value)
                 self.assertFalse(dut_simple.query(value))
+
+    def test_add_many_to_filter(self):
+        self.logger.debug("test_add_many_to_filter")
+        for item in TEST_DATA:
+            dut_simple = SimpleBloomFilter(size = item["size"], seeds = item["seeds"])
+            dut_simple.add_many(item["values"])
+            self.logger.debug("DUT Bit Vector (size: %d): %s", item["size"], dut_simple.bit_vector.hex())
+            self.assertEqual(dut_simple.bit_vector, item["bit_vector"])
+
+    def test_query_many_filter(self):
+        self.logger.debug("test_query_many_filter")
+        for item in TEST_DATA:
+            dut_simple = SimpleBloomFilter(size = item["size"], seeds = item["seeds"])
+            dut_simple.add_many(iter(item["values"]))
+            self.assertTrue(dut_simple.query_many(item["values"]).all())
+            self.assertFalse(dut_simple.query_many(TEST_MISSING_VALUES).any())
+            mixed = item["values"] + TEST_MISSING_VALUES
+            self.assertEqual(list(dut_simple.query_many(mixed)), [dut_simple.query(value) for value in mixed])
+
+class TestSimpleBloomFilterSetAlgebra(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+        self.first = SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7])
+        self.second = SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7])
+        self.first.add_many(["value-{}".format(index) for index in range(0, 3000)])
+        self.second.add_many(["value-{}".format(index) for index in range(2000, 4000)])
+
+    def test_union(self):
+        self.logger.debug("test_union")
+        dut_union = self.first | self.second
+        self.assertTrue(dut_union.query_many(["value-{}".format(index) for index in range(4000)]).all())
+        self.assertEqual(dut_union.popcount(), bin(int.from_bytes(dut_union.bit_vector, "little")).count("1"))
+        self.first |= self.second
+        self.assertEqual(self.first.bit_vector, dut_union.bit_vector)
+
+    def test_intersection(self):
+        self.logger.debug("test_intersection")
+        dut_intersection = self.first & self.second
+        self.assertTrue(dut_intersection.query_many(["value-{}".format(index) for index in range(2000, 3000)]).all())
+        self.assertLess(dut_intersection.popcount(), self.first.popcount())
+        self.first &= self.second
+        self.assertEqual(self.first.bit_vector, dut_intersection.bit_vector)
+
+    def test_cardinality_estimates(self):
+        self.logger.debug("test_cardinality_estimates")
+        self.assertAlmostEqual(self.first.approx_len(), 3000, delta = 60)
+        self.assertAlmostEqual(self.second.approx_len(), 2000, delta = 40)
+        self.assertAlmostEqual(estimate_union_size(self.first, self.second), 4000, delta = 80)
+        self.assertAlmostEqual(estimate_intersection_size(self.first, self.second), 1000, delta = 100)
+        self.assertEqual(SimpleBloomFilter(size = 256, seeds = [3, 5, 7]).approx_len(), 0)
+
+    def test_mismatched_filters(self):
+        self.logger.debug("test_mismatched_filters")
+        for other in [SimpleBloomFilter(size = 1 << 15, seeds = [3, 5, 7]),
+                      SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 9]),
+                      SimpleBloomFilter(size = 1 << 16, seeds = [3, 5, 7], hash_strategy = "double")]:
+            with self.assertRaises(IncompatibleFiltersException):
+                self.first.union(other)
+            with self.assertRaises(IncompatibleFiltersException):
+                self.first &= other
+            with self.assertRaises(IncompatibleFiltersException):
+                estimate_union_size(self.first, other)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import os
+import tempfile
+import unittest
+
+from kneedeepio.filters.bloom import CountingBloomFilter, SimpleBloomFilter
+
+### GLOBALS ###
+TEST_VALUES = ["abc", "def", "foo", "bar"]
+
+TEST_MISSING_VALUES = [
+    "abcdefghijklmnopqrstuvwxyz",
+    "superunknown"
+]
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestMappedFilters(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+        self.temp_dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = os.path.join(self.temp_dir.name, "filter.bin")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_simple_writable_then_readonly(self):
+        self.logger.debug("test_simple_writable_then_readonly")
+        expected = SimpleBloomFilter(size = 217, seeds = [9, 12, 15])
+        expected.add_many(TEST_VALUES)
+        with SimpleBloomFilter.open_mmap(self.path, size = 217, seeds = [9, 12, 15], writable = True) as dut_simple:
+            for value in TEST_VALUES:
+                dut_simple.add(value)
+            dut_simple.flush()
+            self.assertEqual(dut_simple.bit_vector, expected.bit_vector)
+        self.assertEqual(os.path.getsize(self.path), 28)
+        with SimpleBloomFilter.open_mmap(self.path, size = 217, seeds = [9, 12, 15]) as dut_simple:
+            self.assertEqual(dut_simple.bit_vector, expected.bit_vector)
+            self.assertTrue(all(dut_simple.query(value) for value in TEST_VALUES))
+            self.assertFalse(dut_simple.query_many(TEST_MISSING_VALUES).any())
+            with self.assertRaises(TypeError):
+                dut_simple.add("readonly")
+            with self.assertRaises(ValueError):
+                dut_simple.add_many(["readonly"])
+
+    def test_counting_writable_then_readonly(self):
+        self.logger.debug("test_counting_writable_then_readonly")
+        with CountingBloomFilter.open_mmap(self.path, size = 256, seeds = [3, 5, 7], writable = True) as dut_counting:
+            dut_counting.add_many(TEST_VALUES)
+            dut_counting.remove("abc")
+        with CountingBloomFilter.open_mmap(self.path, size = 256, seeds = [3, 5, 7]) as dut_counting:
+            self.assertFalse(dut_counting.query("abc"))
+            self.assertTrue(dut_counting.query_many(TEST_VALUES[1:]).all())
+
+    def test_size_mismatch(self):
+        self.logger.debug("test_size_mismatch")
+        with SimpleBloomFilter.open_mmap(self.path, size = 256, seeds = [3, 5, 7], writable = True):
+            pass
+        with self.assertRaises(ValueError):
+            SimpleBloomFilter.open_mmap(self.path, size = 512, seeds = [3, 5, 7])
+        with self.assertRaises(ValueError):
+            SimpleBloomFilter(size = 256, seeds = [3, 5, 7], bit_vector = bytearray(8))
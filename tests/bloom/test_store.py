@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from kneedeepio.filters.bloom import FilterStore, SimpleBloomFilter, load
+from kneedeepio.filters.bloom.serialization import to_bytes
+
+### GLOBALS ###
+NUM_TENANTS = 100
+ITEMS_PER_TENANT = 50
+
+### FUNCTIONS ###
+def tenant_items():
+    tenants = np.repeat(np.arange(NUM_TENANTS), ITEMS_PER_TENANT)
+    items = ["key-{}-{}".format(tenant, index) for tenant in range(NUM_TENANTS) for index in range(ITEMS_PER_TENANT)]
+    return tenants, items
+
+### CLASSES ###
+class TestFilterStore(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_matches_simple_filters(self):
+        self.logger.debug("test_matches_simple_filters")
+        dut_store = FilterStore(num_filters = NUM_TENANTS, size = 1021, seeds = [3, 5, 7])
+        tenants, items = tenant_items()
+        dut_store.add_many(tenants, items)
+        self.assertTrue(dut_store.query_many(tenants, items).all())
+        # Every tenant's filter holds only its own items
+        self.assertLess(dut_store.query_many((tenants + 1) % NUM_TENANTS, items).mean(), 0.1)
+        for tenant in [0, 17, NUM_TENANTS - 1]:
+            bloom = SimpleBloomFilter(size = 1021, seeds = [3, 5, 7])
+            bloom.add_many(items[tenant * ITEMS_PER_TENANT:(tenant + 1) * ITEMS_PER_TENANT])
+            self.assertEqual(to_bytes(dut_store[tenant].as_filter()), to_bytes(bloom))
+            self.assertEqual(dut_store[tenant].popcount(), bloom.popcount())
+            self.assertEqual(dut_store.popcounts()[tenant], bloom.popcount())
+
+    def test_single_and_handles(self):
+        self.logger.debug("test_single_and_handles")
+        dut_store = FilterStore(num_filters = 3, size = 256)
+        dut_store.add(1, "abc")
+        self.assertTrue(dut_store.query(1, "abc"))
+        self.assertFalse(dut_store.query(0, "abc"))
+        handle = dut_store.handle(2)
+        handle.add_many(iter(["def", "ghi"]))
+        handle.add(7)
+        self.assertEqual(handle.query_many(["def", "ghi", "abc"]).tolist(), [True, True, False])
+        self.assertTrue(handle.query(7))
+        # as_filter shares the store's memory
+        handle.as_filter().add("jkl")
+        self.assertTrue(dut_store.query(2, "jkl"))
+        handle.clear()
+        self.assertEqual(dut_store.popcounts().tolist(), [0, dut_store[1].popcount(), 0])
+        self.assertFalse(hasattr(handle, "__dict__"))
+        with self.assertRaises(IndexError):
+            dut_store.handle(3)
+        with self.assertRaises(IndexError):
+            dut_store.add_many([0, 3], ["a", "b"])
+        with self.assertRaises(ValueError):
+            dut_store.query_many([0], ["a", "b"])
+        with self.assertRaises(ValueError):
+            FilterStore(num_filters = 0)
+
+    def test_save_and_map(self):
+        self.logger.debug("test_save_and_map")
+        dut_store = FilterStore(num_filters = NUM_TENANTS, size = 1024, seeds = [1, 2])
+        tenants, items = tenant_items()
+        dut_store.add_many(tenants, items)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "store.kdbf")
+            dut_store.save(path)
+            with load(path) as loaded:
+                self.assertIsInstance(loaded, FilterStore)
+                self.assertEqual((loaded.num_filters, loaded.size, loaded.seeds), (NUM_TENANTS, 1024, [1, 2]))
+                self.assertTrue(loaded.query_many(tenants, items).all())
+                with self.assertRaises(TypeError):
+                    loaded.add(0, "abc")
+                with self.assertRaises(ValueError):
+                    loaded.add_many([0], ["abc"])
+            with FilterStore.load(path, writable = True) as loaded:
+                loaded.add(5, "new")
+            with FilterStore.load(path) as loaded:
+                self.assertTrue(loaded.query(5, "new"))
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import unittest
+
+from kneedeepio.filters.bloom.utils import false_positive_rate, optimal_number_of_hashes, optimal_size_of_filter
+from kneedeepio.filters.bloom.utils import size_for_hashes
+
+### GLOBALS ###
+
+### FUNCTIONS ###
+
+### CLASSES ###
+class TestUtils(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_optimal_parameters_meet_target(self):
+        self.logger.debug("test_optimal_parameters_meet_target")
+        for fp_rate in [0.1, 0.01, 0.001]:
+            size = optimal_size_of_filter(fp_rate, 1000)
+            num_hashes = optimal_number_of_hashes(size, 1000)
+            predicted = false_positive_rate(size, num_hashes, 1000)
+            self.logger.debug("Target %f, size %d, hashes %d, predicted %f", fp_rate, size, num_hashes, predicted)
+            self.assertLess(predicted, fp_rate * 1.1)
+            self.assertGreater(predicted, fp_rate * 0.9)
+
+    def test_false_positive_rate_empty(self):
+        self.logger.debug("test_false_positive_rate_empty")
+        self.assertEqual(false_positive_rate(1024, 3, 0), 0.0)
+
+    def test_optimal_number_of_hashes_rounds(self):
+        self.logger.debug("test_optimal_number_of_hashes_rounds")
+        # Sparse filters still hash at least once
+        self.assertEqual(optimal_number_of_hashes(100, 1000), 1)
+        # 9585 / 1000 * ln 2 is 6.64, and 7 hashes give the lower rate
+        self.assertEqual(optimal_number_of_hashes(9585, 1000), 7)
+        for size in range(1000, 20000, 777):
+            num_hashes = optimal_number_of_hashes(size, 1000)
+            for other in [num_hashes - 1, num_hashes + 1]:
+                if other > 0:
+                    self.assertLessEqual(false_positive_rate(size, num_hashes, 1000),
+                                         false_positive_rate(size, other, 1000))
+
+    def test_size_for_hashes(self):
+        self.logger.debug("test_size_for_hashes")
+        for num_hashes in [1, 2, 4, 7]:
+            size = size_for_hashes(0.01, 1000, num_hashes)
+            self.assertLessEqual(false_positive_rate(size, num_hashes, 1000), 0.01)
+            self.assertGreater(false_positive_rate(size - 1, num_hashes, 1000), 0.01)
+        # Fewer hashes than optimal need more memory
+        self.assertGreater(size_for_hashes(0.01, 1000, 2), size_for_hashes(0.01, 1000, 7))
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+### IMPORTS ###
+import logging
+import random
+import unittest
+
+from kneedeepio.filters.bloom import RotatingBloomFilter
+
+### GLOBALS ###
+TEST_VALUES = ["value-{}".format(index) for index in range(2000)]
+
+TEST_MISSING_VALUES = ["missing-{}".format(index) for index in range(20000)]
+
+### FUNCTIONS ###
+def fake_clock(now: list):
+    # A clock reading now[0], moved on by the tests
+    return lambda: now[0]
+
+### CLASSES ###
+class TestRotatingBloomFilter(unittest.TestCase):
+    def setUp(self):
+        # Setup logging for the class
+        self.logger = logging.getLogger(type(self).__name__)
+        self.logger.debug("setUp")
+
+    def test_needs_a_trigger(self):
+        self.logger.debug("test_needs_a_trigger")
+        with self.assertRaises(ValueError):
+            RotatingBloomFilter(size = 1024, seeds = [0, 1])
+        with self.assertRaises(ValueError):
+            RotatingBloomFilter(size = 1024, seeds = [0, 1], num_generations = 1, generation_capacity = 10)
+
+    def test_expires_by_time(self):
+        self.logger.debug("test_expires_by_time")
+        now = [1000.0]
+        dut_windowed = RotatingBloomFilter(size = 8192, seeds = [0, 1, 2], num_generations = 4,
+                                           window_seconds = 30.0, clock = fake_clock(now))
+        self.assertFalse(dut_windowed.add(TEST_VALUES[0]))
+        self.assertTrue(dut_windowed.add(TEST_VALUES[0]))
+        # Kept for at least the window, gone once every generation has rotated out
+        now[0] += 30.0
+        self.assertTrue(dut_windowed.query(TEST_VALUES[0]))
+        now[0] += 10.0
+        self.assertFalse(dut_windowed.query(TEST_VALUES[0]))
+
+    def test_recurring_items_stay(self):
+        self.logger.debug("test_recurring_items_stay")
+        now = [1000.0]
+        dut_windowed = RotatingBloomFilter(size = 8192, seeds = [0, 1, 2], num_generations = 4,
+                                           window_seconds = 30.0, clock = fake_clock(now))
+        dut_windowed.add(TEST_VALUES[0])
+        for _ in range(10):
+            now[0] += 20.0
+            self.assertTrue(dut_windowed.add(TEST_VALUES[0]))
+
+    def test_idle_gap_clears_everything(self):
+        self.logger.debug("test_idle_gap_clears_everything")
+        now = [1000.0]
+        dut_windowed = RotatingBloomFilter(size = 8192, seeds = [0, 1, 2], window_seconds = 30.0,
+                                           clock = fake_clock(now))
+        dut_windowed.add_many(TEST_VALUES[:100])
+        now[0] += 3600.0
+        self.assertFalse(dut_windowed.query_many(TEST_VALUES[:100]).any())
+        self.assertEqual(len(dut_windowed), 0)
+
+    def test_rotates_by_count_in_constant_memory(self):
+        self.logger.debug("test_rotates_by_count_in_constant_memory")
+        dut_windowed = RotatingBloomFilter.for_capacity(100, error_rate = 0.01, num_generations = 3)
+        memory = dut_windowed.memory_usage()
+        vectors = [id(bloom.bit_vector) for bloom in dut_windowed.generations]
+        present = dut_windowed.add_many(TEST_VALUES[:250])
+        self.assertFalse(present.any())
+        self.assertEqual(dut_windowed.counts, [100, 100, 50])
+        self.assertTrue(dut_windowed.query_many(TEST_VALUES[:250]).all())
+        for value in TEST_VALUES[250:]:
+            dut_windowed.add(value)
+        self.assertEqual(dut_windowed.memory_usage(), memory)
+        self.assertEqual([id(bloom.bit_vector) for bloom in dut_windowed.generations], vectors)
+        self.assertTrue(dut_windowed.query_many(TEST_VALUES[-200:]).all())
+        self.assertLess(dut_windowed.query_many(TEST_VALUES[:1000]).mean(), 0.05)
+
+    def test_false_positive_rate_bounded(self):
+        self.logger.debug("test_false_positive_rate_bounded")
+        dut_windowed = RotatingBloomFilter.for_capacity(500, error_rate = 0.01)
+        dut_windowed.add_many(TEST_VALUES)
+        measured = dut_windowed.query_many(TEST_MISSING_VALUES).mean()
+        self.logger.debug("Measured FP rate: %f", measured)
+        self.assertLess(measured, 0.02)
+
+    def test_add_many_matches_add(self):
+        self.logger.debug("test_add_many_matches_add")
+        dut_batch = RotatingBloomFilter.for_capacity(300, error_rate = 0.000001)
+        dut_single = RotatingBloomFilter.for_capacity(300, error_rate = 0.000001)
+        values = TEST_VALUES[:500] + TEST_VALUES[200:700]
+        present = dut_batch.add_many(values)
+        self.assertEqual(list(present), [dut_single.add(value) for value in values])
+        self.assertTrue(present[500:800].all())
+        self.assertEqual(dut_batch.counts, dut_single.counts)
+        self.assertEqual([bytes(bloom.bit_vector) for bloom in dut_batch.generations],
+                         [bytes(bloom.bit_vector) for bloom in dut_single.generations])
+        self.assertEqual(list(dut_batch.query_many(TEST_MISSING_VALUES[:100])),
+                         [dut_batch.query(value) for value in TEST_MISSING_VALUES[:100]])
+
+    def test_add_many_matches_add_rotating(self):
+        self.logger.debug("test_add_many_matches_add_rotating")
+        # Small and crowded, so items are queried while generations rotate and are often false positives of
+        # earlier items in the batch
+        generator = random.Random(5)
+        values = ["key-{}".format(generator.randrange(400)) for _ in range(3000)]
+        for size, seeds in [(256, [1, 2]), (65536, [1, 2, 3])]:
+            dut_batch = RotatingBloomFilter(size = size, seeds = seeds, generation_capacity = 50)
+            dut_single = RotatingBloomFilter(size = size, seeds = seeds, generation_capacity = 50)
+            present = dut_batch.add_many(values)
+            self.assertEqual(list(present), [dut_single.add(value) for value in values])
+            self.assertEqual((dut_batch.counts, dut_batch.newest), (dut_single.counts, dut_single.newest))
+            self.assertEqual([bytes(bloom.bit_vector) for bloom in dut_batch.generations],
+                             [bytes(bloom.bit_vector) for bloom in dut_single.generations])